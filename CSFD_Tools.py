@@ -1,8 +1,8 @@
 """ This script includes methods for geodesic measurements with GDAL/OGR as well as workarounds to ensure that GDAL libraries 
 are correctly passed to multicore processes and functions. This strongly affects how functions are defined and called in this script. """
 
-import gdal, ogr, osr, datetime, time, numpy, math, os, multiprocessing, multiprocessing.forking, shapely, shapely.ops, re, sys, ctypes, operator, pyproj, images_qr, matplotlib.pyplot as plt
-from collections import defaultdict, Counter
+import gdal, ogr, osr, datetime, time, numpy, math, os, multiprocessing, multiprocessing.forking, shapely, shapely.ops, re, sys, ctypes, operator, struct, zlib, pyproj, images_qr, matplotlib.pyplot as plt
+from collections import defaultdict, Counter, OrderedDict
 from PyQt4.QtGui import *
 from PyQt4.QtCore import *
 from matplotlib.backends.backend_qt4agg import FigureCanvasQTAgg as FigureCanvas
@@ -658,6 +658,11 @@ class GUI_window(QWidget):
 			if str(sr_area) != str(sr_crater):
 				ctypes.windll.user32.MessageBoxA(0, "Spatial reference of area shapefile and crater shapefile doesn't match. Please use the same spatial reference on both files.", "Error", 0)
 				return
+			from shapely.strtree import STRtree
+			if not hasattr(STRtree, 'nearest'):
+				print shapely_version_message
+				ctypes.windll.user32.MessageBoxA(0, shapely_version_message, "Error", 0)
+				return
 			print "Selected Parameters: "
 			print "Field:", area_file_field, "\n", "Areas:", Area_Names, "\n", "Approach:", approach, "\n", "BF:", bufferfactor, "\n", "OF:", bufferfactor_crater, "\n", "Outfile Type:", outfile_type, "\n", "Outfile Path:", path_to_craterstats_outfile,"\n", "Multicore:", multicore_operation, "\n", "Logfile:", write_logfile, "\n", "Polygon File:", generate_polygon_file, "\n", "Path to Polygon File:", path_to_outfile, "\n_____\n"
 			
@@ -677,7 +682,7 @@ class GUI_window(QWidget):
 """ Main function for processing CSFD measurement """
 
 def CSFD_measurement_main(self, generate_polygon_file, path_to_outfile, outfile_type, path_to_craterstats_outfile, area_file_field, Area_Names, approach, bufferfactor, bufferfactor_crater,  multicore_operation, write_logfile):
-	global union_polygon_centroid, total_area_size, ring_index, generate_point_file, generate_connectors_crater_polygon, layer_polygon, layer_crater, craters_for_counting_list, craters_within_range, craters_inside_area, craters_outside_area, craters_excluded_from_list, buffered_craters_wkt_list, crater_area_list, logfile
+	global union_polygon_centroid, total_area_size, ring_index, generate_point_file, generate_connectors_crater_polygon, layer_polygon, layer_crater, craters_for_counting_list, craters_within_range, craters_inside_area, craters_outside_area, craters_excluded_from_list, buffered_craters_wkb_list, crater_area_list, logfile
 
 	""" Write Logfile """
 	
@@ -740,11 +745,17 @@ def CSFD_measurement_main(self, generate_polygon_file, path_to_outfile, outfile_
 	write_crater_stats_file_header()
 	read_crater_features(layer_crater, proj_to_geog, geog_to_eq_area_proj, write_logfile, logfile)
 	
-	no_of_area_features_shapefile = layer.GetFeatureCount()
+	""" Build spatial index of crater centroids. """
+	
+	crater_index = build_crater_index(crater_features_list)
+	max_crater_diameter = max([0] + [crater[1] for crater in crater_features_list])
+	
+	""" Build index of area features (feature IDs for every value of area_file_field). """
+	
+	area_feature_index = build_area_feature_index(layer, area_file_field)
 	crater_area_list = []
 	area_sizes = []
 	Area_IDs = []
-	all_craters = []
 	n_area = 1
 	ring_index = 0
 	
@@ -752,234 +763,199 @@ def CSFD_measurement_main(self, generate_polygon_file, path_to_outfile, outfile_
 	
 	sr_wkt = sr.ExportToWkt()
 	
-	""" Iterate area features and merge research areas if more than one research area is selected (as fractions are calculated from one coherent area which needs to be buffered). 
-	Also, craters within research area (and buffered research area) are determined """
+	""" Iterate selected area features (area feature index) and merge research areas if more than one research area is selected (as fractions are calculated from one 
+	coherent area which needs to be buffered). Every area geometry is read once and cloned where needed. The merged research area (union_polygon) is generated 
+	with a single cascaded union of all selected areas. All selected areas are also collected in one multipolygon (areas_geometry, the Area_ID of every 
+	polygon is stored in areas_geometry_IDs). Craters within research areas (and buffered research areas) are determined for all areas in one pass: every 
+	crater is assigned to the nearest selected area (with its distance). Craters overlapping more than one area are detected only once. Crater candidates are 
+	taken from the crater index for every area. """
 	
-	union_polygon = ogr.Geometry(ogr.wkbPolygon)
+	areas_union_geometry = ogr.Geometry(ogr.wkbMultiPolygon)
+	areas_geometry = ogr.Geometry(ogr.wkbMultiPolygon)
+	areas_geometry_IDs = []
+	crater_candidate_ids = set()
+	
+	""" The largest crater defines the largest possible buffer range for the prefiltering of craters. """
+	
+	if approach == "TRAD":
+		crater_search_distance = 0
+	if approach == "BCC":
+		crater_search_distance = max_crater_diameter * 1000 / 2 * bufferfactor
+	if approach == "NSC" or approach == "BNSC":
+		crater_search_distance = max_crater_diameter * 1000 / 2 * max(bufferfactor, bufferfactor_crater + 1)
 	
 	for an in Area_Names:
-		i = 0
-		while i < no_of_area_features_shapefile:
-			area_feature = layer.GetFeature(i)
-			area_feature2 = layer.GetFeature(i)
-			area_feature_SCC_File = layer.GetFeature(i)
+		for area_feature_id in area_feature_index[str(an)]:
+			area_feature = layer.GetFeature(area_feature_id)
 			Area_ID = area_feature.GetField(area_file_field)
-			if str(Area_ID) == str(an):
-				geom = area_feature.GetGeometryRef()
-				union_polygon = union_polygon.Union(geom)
-				union_polygon_centroid = union_polygon.Centroid()
-				
-				""" Write SCC/DIAM area information. geom is reprojected to geographic coordinates here. """
-				
-				write_crater_stats_file_area(n_area, area_feature, area_feature2, area_feature_SCC_File, union_polygon, Area_Names, Area_ID, an, write_logfile, logfile)
-				
-				#####################################################################################
-				#																					#
-				#			Approaches for crater count (Step 1: find relevant craters):			#
-				#																					#
-				#####################################################################################
-				
-				########################
-				# Traditional Approach #
-				########################
-				
-				if approach == "TRAD":
-					
-					print "Determining craters within research area..."
-					
-					self.update_process_label("Process 1/2 Determining relevant impact craters...")
-					QApplication.processEvents()
-					
-					if write_logfile == True:
-						logfile.flush()
-					st = time.time()
-					
-					""" Find relevant craters (get_craters_for_trad function): """
-					
-					out_q = multiprocessing.Queue()
-					lock = multiprocessing.Lock()
-					get_craters_for_trad(out_q, crater_features_list, geom, generate_connectors_crater_polygon, lock, sr_wkt)
-					
-					if len(all_craters) == 0:
-						all_craters = craters_for_counting_list
-					else:
-						all_craters = all_craters + craters_for_counting_list
-					
-					print "Done.\n-\n", len(all_craters), "craters inside area\n-\nElapsed time for crater detection:", round(time.time()-st,2), "sec.\n\n-----\n"
-					if write_logfile == True:
-						logfile.flush()
-				
-				############################
-				# Buffered Crater Counting #
-				############################
-				
-				if approach == "BCC":
-					
-					print "Determining craters within research area and buffered research area..."		
-					
-					self.update_process_label("Process 1/2 Determining relevant impact craters...")
-					QApplication.processEvents()
-					
-					if write_logfile == True:
-						logfile.flush()
-					st = time.time()
-					
-					""" Find relevant craters (in get_craters_for_buffering_BCC function): """
-					
-					out_q = multiprocessing.Queue()
-					out_q_2 = multiprocessing.Queue()
-					out_q_3 = multiprocessing.Queue()
-					lock = multiprocessing.Lock()
-					get_craters_for_buffering_BCC(out_q, out_q_2, out_q_3, crater_features_list, geom, vertices_list, flattening, major_axis, bufferfactor, generate_connectors_crater_polygon, lock, sr_wkt)
-					if len(all_craters) == 0:
-						all_craters = craters_for_counting_list
-					else:
-						all_craters = all_craters + craters_for_counting_list
-					""" get total number of craters within buffer range """
-					total_no_of_craters_within_range = len(craters_within_range)
-					""" get total number of craters inside area """
-					total_no_of_craters_within_area = len(craters_inside_area)
-						
-					print "Done.\n-\n", total_no_of_craters_within_area, "craters inside area, ", total_no_of_craters_within_range, "craters inside buffered area, ", no_of_crater_features-len(all_craters), "craters outside area.\n-\nElapsed time for crater detection:", round(time.time()-st,2), "sec.\n\n-----\n"
-					if write_logfile == True:
-						logfile.flush()
-				
-				##################################################################
-				# Non-sparseness correction & Buffered non-sparseness correction #
-				##################################################################
-				
-				if approach == "NSC" or approach == "BNSC":
-					
-					print "Determining craters within research area and buffered research area..."
-					
-					self.update_process_label("Process 1/3 Determining relevant impact craters...")
-					QApplication.processEvents()
-					
-					if write_logfile == True:
-						logfile.flush()
-					st = time.time()
-					
-					""" Find relevant craters (in get_craters_for_buffering_NSC_BNSC function): """
-					
-					out_q = multiprocessing.Queue()
-					out_q_2 = multiprocessing.Queue()
-					out_q_3 = multiprocessing.Queue()
-					out_q_4 = multiprocessing.Queue()
-					lock = multiprocessing.Lock()
-					
-					""" Only one process is started during multi-core computation. It consumes more time to split the lists and determine craters 
-					of interest than to just have a singlecore process. The reason we do a multicore operation anyways is that GDAL is not always  
-					passed to a multicore process on Windows (forking issue). This effect doesn't occur with Linux. If we just do a single-core process here and have the crater buffering as a MC process later, 
-					GDAL will not be passed to the MC process at a later stage. This is really a pain. In order to make multi-core avaliable at a later
-					stage of the script, we have to start the process here even though there is no benefit time-wise. """
-					
-					if multicore_operation == True:
-						
-						pro = Process(target = get_craters_for_buffering_NSC_BNSC, args=(approach, out_q, out_q_2, out_q_3, out_q_4, crater_features_list, geom, vertices_list, flattening, major_axis, bufferfactor, bufferfactor_crater, generate_connectors_crater_polygon, lock, sr_wkt))
-						
-						pro.start()
-						
-						craters_from_multiprocessing = out_q.get()
-						craters_within_range = out_q_2.get()
-						craters_inside_area = out_q_3.get()
-						craters_excluded_from_list = out_q_4.get()
-						
-						pro.join()
-						pro.terminate()
-						
-						""" If at least one crater relevant for age determination was determined during multiprocess operation, append list to all_craters """
-						
-						if len(craters_from_multiprocessing) > 0:
-							if len(all_craters) == 0:
-								all_craters = craters_from_multiprocessing
-							else:
-								all_craters = all_craters + craters_from_multiprocessing
-					
-					if multicore_operation == False:
-						get_craters_for_buffering_NSC_BNSC(approach, out_q, out_q_2, out_q_3, out_q_4, crater_features_list, geom, vertices_list, flattening, major_axis, bufferfactor, bufferfactor_crater, generate_connectors_crater_polygon, lock, sr_wkt)
-						if len(all_craters) == 0:
-							all_craters = craters_for_counting_list
-						else:
-							all_craters = all_craters + craters_for_counting_list
-						
-					""" get total number of craters within buffer range """
-					total_no_of_craters_within_range = len(craters_within_range)
-					""" get total number of craters inside area """
-					total_no_of_craters_within_area = len(craters_inside_area)
-
-					print "\n", total_no_of_craters_within_area, "craters in area, ", total_no_of_craters_within_range, "craters in buffered area, ", no_of_crater_features - total_no_of_craters_within_area - total_no_of_craters_within_range, "craters outside area. \n", len(craters_excluded_from_list), "/", total_no_of_craters_within_area + total_no_of_craters_within_range, "craters excluded from CSFD analysis due to obliteration effects. \n\nElapsed time for crater detection:", round(time.time()-st,2), "sec.\n\n-----\n"
-					if write_logfile == True:
-						logfile.flush()
-					del total_no_of_craters_within_range
-					del total_no_of_craters_within_area
-					
-					""" Add craters that are located on an ejecta blanket. They are used to buffer (to consider their ejecta blanket for the 
-					reference area modification) but not in the actual CSFD measurement (since they don't obliterate the actual count area but an area
-					which was affected by resurfacing). """
-					
-					all_craters = all_craters + craters_excluded_from_list
-				
-				area_sizes.append(Area_Size)
-				Area_IDs.append(Area_ID)
-				n_area += 1
-				i += 1
-			else:
-				i += 1
+			geom = area_feature.GetGeometryRef()
+			add_polygons_to_multipolygon(areas_union_geometry, geom)
+			
+			""" The centroid of the area defines the projection center to determine the area size. """
+			
+			union_polygon_centroid = geom.Centroid()
+			
+			""" Write SCC/DIAM area information. geom is reprojected to geographic coordinates here. """
+			
+			write_crater_stats_file_area(n_area, geom, geom.Clone(), geom.Clone(), Area_Names, Area_ID, an, write_logfile, logfile)
+			
+			""" Add area to areas_geometry and get crater candidates of the area. """
+			
+			areas_geometry_IDs.extend([Area_ID] * len(add_polygons_to_multipolygon(areas_geometry, geom)))
+			
+			for crater_candidate in query_crater_index(crater_index, crater_features_list, geom, crater_search_distance, flattening, major_axis):
+				crater_candidate_ids.add(crater_candidate[0])
+			
+			area_sizes.append(Area_Size)
+			Area_IDs.append(Area_ID)
+			n_area += 1
+	
+	union_polygon = areas_union_geometry.UnionCascaded()
 	
 	""" Get total area of reference areas. """
 	
 	total_area_size = sum(area_sizes)
 	
-	""" Clean crater lists from duplicates! This needs to be done as craters might falsly be added multiple times. If area 1 overlaps crater A and 
-	area 2 overlaps crater A as well, area 1 and area 2 would be buffered two times. During BNSC, duplicate craters are deleted according to 
-	their distance to the reference area. """
+	""" Crater candidates of all areas (in order of crater_features_list). """
+	
+	crater_candidates_list = [crater_features_list[crater_id] for crater_id in sorted(crater_candidate_ids)]
+	
+	#####################################################################################
+	#																					#
+	#			Approaches for crater count (Step 1: find relevant craters):			#
+	#																					#
+	#####################################################################################
+	
+	########################
+	# Traditional Approach #
+	########################
+	
+	if approach == "TRAD":
+		
+		print "Determining craters within research area..."
+		
+		self.update_process_label("Process 1/2 Determining relevant impact craters...")
+		QApplication.processEvents()
+		
+		if write_logfile == True:
+			logfile.flush()
+		st = time.time()
+		
+		""" Find relevant craters (get_craters_for_trad function): """
+		
+		out_q = multiprocessing.Queue()
+		lock = multiprocessing.Lock()
+		get_craters_for_trad(out_q, crater_candidates_list, areas_geometry, areas_geometry_IDs, generate_connectors_crater_polygon, lock, sr_wkt)
+		
+		all_craters = build_crater_table(craters_for_counting_list)
+		
+		print "Done.\n-\n", len(all_craters), "craters inside area\n-\nElapsed time for crater detection:", round(time.time()-st,2), "sec.\n\n-----\n"
+		if write_logfile == True:
+			logfile.flush()
+	
+	############################
+	# Buffered Crater Counting #
+	############################
 	
 	if approach == "BCC":
 		
-		all_craters_sorted = []
+		print "Determining craters within research area and buffered research area..."		
+		
+		self.update_process_label("Process 1/2 Determining relevant impact craters...")
+		QApplication.processEvents()
+		
+		if write_logfile == True:
+			logfile.flush()
+		st = time.time()
 		
-		for orig_crater in all_craters:
-			if orig_crater not in all_craters_sorted:
-				all_craters_sorted.append(orig_crater)
+		""" Find relevant craters (in get_craters_for_buffering_BCC function): """
 		
-		all_craters = all_craters_sorted
+		out_q = multiprocessing.Queue()
+		out_q_2 = multiprocessing.Queue()
+		out_q_3 = multiprocessing.Queue()
+		lock = multiprocessing.Lock()
+		get_craters_for_buffering_BCC(out_q, out_q_2, out_q_3, crater_candidates_list, areas_geometry, areas_geometry_IDs, flattening, major_axis, bufferfactor, generate_connectors_crater_polygon, lock, sr_wkt)
+		all_craters = build_crater_table(craters_for_counting_list)
+		""" get total number of craters within buffer range """
+		total_no_of_craters_within_range = len(craters_within_range)
+		""" get total number of craters inside area """
+		total_no_of_craters_within_area = len(craters_inside_area)
+			
+		print "Done.\n-\n", total_no_of_craters_within_area, "craters inside area, ", total_no_of_craters_within_range, "craters inside buffered area, ", no_of_crater_features-len(all_craters), "craters outside area.\n-\nElapsed time for crater detection:", round(time.time()-st,2), "sec.\n\n-----\n"
+		if write_logfile == True:
+			logfile.flush()
+	
+	##################################################################
+	# Non-sparseness correction & Buffered non-sparseness correction #
+	##################################################################
 	
 	if approach == "NSC" or approach == "BNSC":
 		
-		""" Identify crater IDs which occur multiple times. """
+		print "Determining craters within research area and buffered research area..."
+		
+		self.update_process_label("Process 1/3 Determining relevant impact craters...")
+		QApplication.processEvents()
+		
+		if write_logfile == True:
+			logfile.flush()
+		st = time.time()
+		
+		""" Find relevant craters (in get_craters_for_buffering_NSC_BNSC function): """
 		
-		all_craters_id_count = Counter(crt[0] for crt in all_craters)
-		all_craters_duplicate_ids = [k for k, v in all_craters_id_count.iteritems() if v > 1]
+		out_q = multiprocessing.Queue()
+		out_q_2 = multiprocessing.Queue()
+		out_q_3 = multiprocessing.Queue()
+		out_q_4 = multiprocessing.Queue()
+		lock = multiprocessing.Lock()
 		
-		""" If a crater ID occurs multiple times (crater overlaps more than one area), compare distance to reference areas and keep entry for 
-		the crater that is closest. """
+		""" Only one process is started during multi-core computation. It consumes more time to split the lists and determine craters 
+		of interest than to just have a singlecore process. The reason we do a multicore operation anyways is that GDAL is not always  
+		passed to a multicore process on Windows (forking issue). This effect doesn't occur with Linux. If we just do a single-core process here and have the crater buffering as a MC process later, 
+		GDAL will not be passed to the MC process at a later stage. This is really a pain. In order to make multi-core avaliable at a later
+		stage of the script, we have to start the process here even though there is no benefit time-wise. """
 		
-		if len(all_craters_duplicate_ids) > 0:
+		if multicore_operation == True:
 			
-			for duplicate_id in all_craters_duplicate_ids:
-				
-				""" Save all duplicate craters is a list. """
-				
-				overlapping_craters = []
-				
-				for overlapping_crater in all_craters:
-					overlapping_crater_id = overlapping_crater[0]
-					
-					if overlapping_crater_id == duplicate_id:
-						overlapping_craters.append(overlapping_crater)
-						
-						""" Remove all overlapping craters from all_craters """
-						
-						all_craters.remove(overlapping_crater)
-					
-				""" Identify overlapping crater with minimum distance value from overlapping_craters list and add it back to all_craters """
-				
-				duplicate_crater_with_minimum_distance = min(overlapping_craters, key=lambda item: item[4])
-				all_craters.append(duplicate_crater_with_minimum_distance)
+			pro = Process(target = get_craters_for_buffering_NSC_BNSC, args=(approach, out_q, out_q_2, out_q_3, out_q_4, crater_candidates_list, areas_geometry, areas_geometry_IDs, flattening, major_axis, bufferfactor, bufferfactor_crater, generate_connectors_crater_polygon, lock, sr_wkt))
+			
+			pro.start()
+			
+			craters_from_multiprocessing = out_q.get()
+			craters_within_range = out_q_2.get()
+			craters_inside_area = out_q_3.get()
+			craters_excluded_from_list = out_q_4.get()
+			
+			pro.join()
+			pro.terminate()
+			
+			""" Craters relevant for age determination which were determined during multiprocess operation """
+			
+			all_craters = build_crater_table(craters_from_multiprocessing)
+		
+		if multicore_operation == False:
+			get_craters_for_buffering_NSC_BNSC(approach, out_q, out_q_2, out_q_3, out_q_4, crater_candidates_list, areas_geometry, areas_geometry_IDs, flattening, major_axis, bufferfactor, bufferfactor_crater, generate_connectors_crater_polygon, lock, sr_wkt)
+			all_craters = build_crater_table(craters_for_counting_list)
+			
+		""" get total number of craters within buffer range """
+		total_no_of_craters_within_range = len(craters_within_range)
+		""" get total number of craters inside area """
+		total_no_of_craters_within_area = len(craters_inside_area)
+
+		print "\n", total_no_of_craters_within_area, "craters in area, ", total_no_of_craters_within_range, "craters in buffered area, ", no_of_crater_features - total_no_of_craters_within_area - total_no_of_craters_within_range, "craters outside area. \n", len(craters_excluded_from_list), "/", total_no_of_craters_within_area + total_no_of_craters_within_range, "craters excluded from CSFD analysis due to obliteration effects. \n\nElapsed time for crater detection:", round(time.time()-st,2), "sec.\n\n-----\n"
+		if write_logfile == True:
+			logfile.flush()
+		del total_no_of_craters_within_range
+		del total_no_of_craters_within_area
 		
+		""" Add craters that are located on an ejecta blanket (status crater_status_obliterates). They are used to buffer (to consider their ejecta blanket for the 
+		reference area modification) but not in the actual CSFD measurement (since they don't obliterate the actual count area but an area
+		which was affected by resurfacing). """
+		
+		all_craters = numpy.concatenate((all_craters, build_crater_table(craters_excluded_from_list, crater_status_obliterates)))
+	
 	""" Sort craters according to crater diameter (descending). """
 	
-	all_craters = sorted(all_craters, key = operator.itemgetter(1), reverse = True)
+	all_craters = all_craters[numpy.argsort(-all_craters['diameter'], kind = 'mergesort')]
 	
 	#####################################################################################
 	#																					#
@@ -998,7 +974,11 @@ def CSFD_measurement_main(self, generate_polygon_file, path_to_outfile, outfile_
 	
 	if approach == "BCC":
 		
-		""" Buffer research areas """
+		""" Buffer research areas. The reference area is segmentized once for the largest buffer distance of all craters (adaptive densification, see
+		segmentize_reference_area), so the result does not depend on the distribution of craters among processes. """
+		
+		if len(all_craters) > 0:
+			segmentize_reference_area(union_polygon, sr, float(all_craters['diameter'].max()) * 1000 / 2 * bufferfactor, major_axis)
 		
 		if multicore_operation == True:
 			
@@ -1019,11 +999,7 @@ def CSFD_measurement_main(self, generate_polygon_file, path_to_outfile, outfile_
 			""" Rearange list of craters for optimized multicore operation. Large craters lead to simple polygon modifications; small crater lead to complex polygon modifications.
 			Craters are sorted in alternating crater diametesr so that the workload is distributed equally among the multi-core processes. """
 			
-			# sort list according to element 1 (crater diameter) in list's list
-			all_craters = sorted(all_craters, key = operator.itemgetter(1))
-			
-			# rearange alternating
-			all_craters = sum(zip(reversed(all_craters), all_craters), ())[:len(all_craters)]
+			all_craters = alternate_crater_table(all_craters)
 			
 			""" split all_craters list according to no of processes """
 			
@@ -1158,7 +1134,7 @@ def CSFD_measurement_main(self, generate_polygon_file, path_to_outfile, outfile_
 				processes[process_count2].start()
 				process_count2 += 1
 			
-			""" Get buffered crater WKT and crater diameter lists from multiprocessing operations  """
+			""" Get buffered crater WKB and crater diameter lists from multiprocessing operations  """
 			
 			for craters_for_counting_list_splitted_part in craters_for_counting_list_splitted:
 				buffered_craters_from_multiprocessing = buffered_craters_out_q.get()
@@ -1170,7 +1146,7 @@ def CSFD_measurement_main(self, generate_polygon_file, path_to_outfile, outfile_
 				else:
 					crater_area_list = crater_area_list + buffered_craters_from_multiprocessing
 			
-			buffered_craters_wkt_list = crater_area_list
+			buffered_craters_wkb_list = crater_area_list
 			
 			""" A new crater area list is used at a later point to calculate fractions. Thus, crater_area_list can be deleted. """
 			
@@ -1185,11 +1161,11 @@ def CSFD_measurement_main(self, generate_polygon_file, path_to_outfile, outfile_
 				processes[process_count3].terminate()
 				process_count3 += 1
 			
-			""" Sort buffered crater wkt list according to descending crater diameter. Since multi-core processes might end at a different time, the merged crater lists 
+			""" Sort buffered crater wkb list according to descending crater diameter. Since multi-core processes might end at a different time, the merged crater lists 
 			are not in order anymore. """
 			
-			buffered_craters_wkt_list_sorted = sorted(buffered_craters_wkt_list, key = lambda x:x[3], reverse=True)
-			buffered_craters_wkt_list = buffered_craters_wkt_list_sorted
+			buffered_craters_wkb_list_sorted = sorted(buffered_craters_wkb_list, key = lambda x:x[3], reverse=True)
+			buffered_craters_wkb_list = buffered_craters_wkb_list_sorted
 		
 		if multicore_operation == False:
 			buffered_craters_out_q = multiprocessing.Queue()
@@ -1213,23 +1189,26 @@ def CSFD_measurement_main(self, generate_polygon_file, path_to_outfile, outfile_
 		
 		craters_for_counting_list_BNSC = craters_for_counting_list
 		
-		""" Use geometries in buffered_craters_wkt_list to erase from initial reference area. For every crater, all larger craters are excluded from the count area. """
+		""" Use geometries in buffered_craters_wkb_list to erase from initial reference area. For every crater, all larger craters are excluded from the count area. """
 		
 		if multicore_operation == True and approach == "BNSC":
 			
 			""" Rearange list of craters for optimized multicore operation: sort alternating accordig to crater diameter so that the 'workload' is distributed 
 			equally among the processes (large craters require simple polygon modifications; small craters require complex polygon modifications). """
 			
-			# sort list according to element 1 (crater diameter) in list's list
-			craters_for_counting_list_BNSC = sorted(craters_for_counting_list_BNSC, key = operator.itemgetter(1))
-			
-			# rearange alternating
-			craters_for_counting_list_BNSC = sum(zip(reversed(craters_for_counting_list_BNSC), craters_for_counting_list_BNSC), ())[:len(craters_for_counting_list_BNSC)]
+			craters_for_counting_list_BNSC = alternate_crater_table(craters_for_counting_list_BNSC)
 			
 			""" split craters_for_counting list according to no of processes """
 			
 			craters_for_counting_list_BNSC_splitted = [craters_for_counting_list_BNSC[w:w + (len(craters_for_counting_list_BNSC)/no_of_processes)] for w in xrange(0, len(craters_for_counting_list_BNSC), (len(craters_for_counting_list_BNSC)/no_of_processes))]
 			
+			""" Reference area snapshots (chain of removed craters) for all processes. """
+			
+			self.update_process_label("Process 3/3 Preparing reference area snapshots... ")
+			QApplication.processEvents()
+			
+			difference_snapshots = build_difference_snapshots(self, union_polygon, buffered_craters_wkb_list, sr_wkt)
+			
 			""" Queue for passing list results """
 			
 			crater_area_out_q = multiprocessing.Queue()
@@ -1242,7 +1221,7 @@ def CSFD_measurement_main(self, generate_polygon_file, path_to_outfile, outfile_
 			""" Process definition """
 			
 			for craters_for_counting_list_BNSC_splitted_part in craters_for_counting_list_BNSC_splitted:
-				processes[process_count] = Process(target = NSC_BNSC_exclude_craters, args=(0, approach, buffered_craters_wkt_list, union_polygon, sr_wkt, generate_polygon_file, path_to_outfile, craters_for_counting_list, craters_for_counting_list_BNSC_splitted_part, multicore_operation, layer_polygon, bufferfactor, bufferfactor_crater, process_count, crater_area_out_q, flattening, major_axis, Area_IDs, write_logfile, logfile, status_out_q, multicore_log_out_q)) # self is set to 0 to avoid duplication of user interface during multi-core computation
+				processes[process_count] = Process(target = NSC_BNSC_exclude_craters, args=(0, approach, buffered_craters_wkb_list, union_polygon, sr_wkt, generate_polygon_file, path_to_outfile, craters_for_counting_list, craters_for_counting_list_BNSC_splitted_part, multicore_operation, layer_polygon, bufferfactor, bufferfactor_crater, process_count, crater_area_out_q, flattening, major_axis, Area_IDs, write_logfile, logfile, status_out_q, multicore_log_out_q, difference_snapshots)) # self is set to 0 to avoid duplication of user interface during multi-core computation
 				process_count += 1
 			process_count2 = 0
 			
@@ -1307,7 +1286,7 @@ def CSFD_measurement_main(self, generate_polygon_file, path_to_outfile, outfile_
 			multicore_log_out_q = multiprocessing.Queue()
 			process_count = 0 # placeholder
 			crater_area_out_q = multiprocessing.Queue() # placeholder
-			NSC_BNSC_exclude_craters(self, approach, buffered_craters_wkt_list, union_polygon, sr_wkt, generate_polygon_file, path_to_outfile, craters_for_counting_list, craters_for_counting_list_BNSC, multicore_operation, layer_polygon, bufferfactor, bufferfactor_crater, process_count, crater_area_out_q, flattening, major_axis, Area_IDs, write_logfile, logfile, status_out_q, multicore_log_out_q)
+			NSC_BNSC_exclude_craters(self, approach, buffered_craters_wkb_list, union_polygon, sr_wkt, generate_polygon_file, path_to_outfile, craters_for_counting_list, craters_for_counting_list_BNSC, multicore_operation, layer_polygon, bufferfactor, bufferfactor_crater, process_count, crater_area_out_q, flattening, major_axis, Area_IDs, write_logfile, logfile, status_out_q, multicore_log_out_q, None)
 		
 		if approach == "NSC":
 			print "\n-----\n\n", len(craters_for_counting_list) - len(crater_area_list), "craters removed due to location outside reference area.\n", len(crater_area_list), "areas created. \n\nElapsed time for area modification:", str(round(time.time() - st_buffer, 2)), "sec.\n\n_____\n" 
@@ -1432,157 +1411,331 @@ def define_coordinate_transformations(sr, geogr_sr):
 	geog_to_eq_area_proj = osr.CoordinateTransformation(geogr_sr, sr_equal_area_projection)
 	
 
-""" Calculate geodesic buffer points around Polygons according to Vincenty's direct formula: Calculate coordinates of point 2 from point 1, 
-azimuth and distance Point1-Point2. """
-
-def direct_vincenty(flattening, major_axis, vertices_angle_list, dist_buffer, bufferfactor): 
-	global buffer_vertices_list
-	buffer_vertices_list = []
-	for pair in vertices_angle_list:
-		
-		""" Calculation of Point 1 (phi) on auxiliary sphere, azimuth of geodesic at equator and length of geodesic between 
-		equator and Point 1. """
-		
-		f = flattening
-		a = major_axis
-		phi1 = pair[1]
-		lambda1 = pair[0]
-		alpha12 = pair[2]
-		s = bufferfactor * dist_buffer
-		piD4 = math.atan(1.0) 
-		two_pi = piD4 * 8.0 
-		phi1 = phi1 * piD4 / 45.0 
-		lambda1 = lambda1 * piD4 / 45.0 
-		alpha12 = alpha12 * piD4 / 45.0 
-		if alpha12 < 0.0: 
-			alpha12 = alpha12 + two_pi 
-		if alpha12 > two_pi: 
-			alpha12 = alpha12 - two_pi
-		b = a * (1.0 - f) 
-		tanU1 = (1-f) * math.tan(phi1) 
-		U1 = math.atan(tanU1) 
-		sigma1 = math.atan2(tanU1, math.cos(alpha12)) 
-		Sinalpha0 = math.cos(U1) * math.sin(alpha12) 
-		cosalpha0_sq = 1.0 - Sinalpha0 * Sinalpha0 
-		u_sq = cosalpha0_sq * (a * a - b * b ) / (b * b) 
-		A = 1.0 + (u_sq / 16384) * (4096 + u_sq * (-768 + u_sq * \
-			(320 - 175 * u_sq))) 
-		B = (u_sq / 1024) * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq))) 
-		sigma = (s / (b * A)) 
-		last_sigma = -9999999.9
-		
-		""" Approximation of sigma (distance Point1-Point2 on auxiliary sphere). """
-		
-		while abs(last_sigma - sigma) > 1.0e-12:
-			two_sigma_m = 2 * sigma1 + sigma 
-			delta_sigma = B * math.sin(sigma) * (math.cos(two_sigma_m) + (B/4) * (math.cos(sigma) * \
-				(-1 + 2 * math.pow(math.cos(two_sigma_m), 2) - (B/6) * math.cos(two_sigma_m) * \
-				(-3 + 4 * math.pow(math.sin(sigma), 2 )) * (-3 + 4 * math.pow(math.cos(two_sigma_m), 2)))))
-			last_sigma = sigma 
-			sigma = (s / (b * A)) + delta_sigma 
-		
-		""" Calculation of Point 2 coordinates on ellipsoid. """
-		
-		phi2 = math.atan2 ((math.sin(U1) * math.cos(sigma) + math.cos(U1) * math.sin(sigma) * math.cos(alpha12)), \
-			((1-f) * math.sqrt(math.pow(Sinalpha0, 2) + pow(math.sin(U1) * math.sin(sigma) - math.cos(U1) * \
-			math.cos(sigma) * math.cos(alpha12), 2))))
-		lambda_new = math.atan2((math.sin(sigma) * math.sin(alpha12)), (math.cos(U1) * math.cos(sigma) -  \
-			math.sin(U1) *  math.sin(sigma) * math.cos(alpha12))) 
-		C = (f/16) * cosalpha0_sq * (4 + f * (4 - 3 * cosalpha0_sq)) 
-		L = lambda_new - (1-C) * f * Sinalpha0 * (sigma + C * math.sin(sigma) * (math.cos(two_sigma_m) + \
-			C * math.cos(sigma) * (-1 + 2 * math.pow(math.cos(two_sigma_m), 2)))) 
-		lambda2 = lambda1 + L 
-		alpha21 = math.atan2 (Sinalpha0, (-math.sin(U1) * math.sin(sigma) + math.cos(U1) * math.cos(sigma) * math.cos(alpha12))) 
-		alpha21 = alpha21 + two_pi / 2.0 # backwards azimuth
-		
-		if alpha21 < 0.0: 
-			alpha21 = alpha21 + two_pi 
-		if alpha21 > two_pi: 
-			alpha21 = alpha21 - two_pi 
-		
-		phi2 = phi2 * 45.0 / piD4 
-		lambda2 = lambda2 * 45.0 / piD4 
-		alpha21 = alpha21 * 45.0 / piD4 
-		
-		buffer_vertices_list.append([lambda2, phi2, pair[3], pair[4]])
-		
-""" Calculate geodesic distance and azimuth between two points (Vincenty's inverse formula). """
-	
-def inverse_vincenty(flattening, major_axis, phi1, lambda1, phi2, lambda2 ):
-	global geodesic_distance_crater_area, geodesic_distance_crater_area2, direction12
-	
-	""" Calculation of Points 1 and 2 (phi) on auxiliary sphere and difference in latitude. """
+""" Geodesic backend used for all forward (buffer points) and inverse (distances, azimuths) geodesic problems. "vincenty" (default) uses the numpy 
+implementation of Vincenty's formulae below, including the precalculated forward terms per ring (geodesic_direct_terms). "pyproj" (optional) uses pyproj.Geod 
+(compiled geodesic routines of PROJ, Karney's algorithm - converges for nearly antipodal points); results differ slightly from Vincenty's formulae and the 
+precalculated forward terms are only used for the coordinates and azimuths of points 1. The backend is defined on module level so it is known in all 
+(spawned) processes. """
+
+geodesic_backend = "vincenty"
+geod_objects = dict()
+
+""" Spherical bodies (flattening = 0, e.g. many lunar and martian datasets) are handled with exact great circle formulas instead of the iterative 
+ellipsoidal solutions. "auto" uses them when the flattening of the body is 0, "on" forces them (the mean radius of the ellipsoid is used) and 
+"off" always uses the selected geodesic backend. """
+
+spherical_geodesics = "auto"
+
+def use_spherical_geodesics(flattening):
+	if spherical_geodesics == "on":
+		return True
+	if spherical_geodesics == "off":
+		return False
+	return flattening == 0
+
+""" Get pyproj.Geod object of the body. Objects are created once per process and body (major axis, flattening). """
+
+def get_geod(flattening, major_axis):
+	if (major_axis, flattening) not in geod_objects:
+		geod_objects[(major_axis, flattening)] = pyproj.Geod(a = major_axis, f = flattening)
+	return geod_objects[(major_axis, flattening)]
+
+""" Per-vertex terms of the forward geodesic problem which do not depend on the distance (radians). They are calculated once per ring of a reference 
+area (geodesic_direct_terms) and reused for the buffers of all craters - only the distance dependent part is calculated per crater (geodesic_direct_from_terms). """
+
+geodesic_direct_terms_dtype = numpy.dtype([('lambda1', 'f8'), ('phi1', 'f8'), ('alpha12', 'f8'), ('sin_alpha12', 'f8'), ('cos_alpha12', 'f8'), ('sin_phi1', 'f8'), 
+	('cos_phi1', 'f8'), ('sinU1', 'f8'), ('cosU1', 'f8'), ('sigma1', 'f8'), ('Sinalpha0', 'f8'), ('cosalpha0_sq', 'f8'), ('A', 'f8'), ('B', 'f8'), ('C', 'f8')])
+
+def geodesic_direct_terms(flattening, major_axis, lambda1, phi1, alpha12):
 	
+	""" Calculation of Points 1 (phi) on auxiliary sphere, azimuths of geodesics at equator and lengths of geodesics between 
+	equator and Points 1. """
+	
+	f = flattening
 	a = major_axis
+	b = a * (1.0 - f)
+	lambda1, phi1, alpha12 = [numpy.ravel(coordinate) for coordinate in numpy.broadcast_arrays(numpy.radians(lambda1), numpy.radians(phi1), numpy.radians(alpha12))]
+	
+	direct_terms = numpy.empty(len(lambda1), dtype = geodesic_direct_terms_dtype)
+	direct_terms['lambda1'] = lambda1
+	direct_terms['phi1'] = phi1
+	direct_terms['alpha12'] = numpy.mod(alpha12, math.pi * 2.0)
+	direct_terms['sin_alpha12'] = numpy.sin(direct_terms['alpha12'])
+	direct_terms['cos_alpha12'] = numpy.cos(direct_terms['alpha12'])
+	direct_terms['sin_phi1'] = numpy.sin(phi1)
+	direct_terms['cos_phi1'] = numpy.cos(phi1)
+	
+	tanU1 = (1-f) * numpy.tan(phi1)
+	U1 = numpy.arctan(tanU1)
+	direct_terms['sinU1'] = numpy.sin(U1)
+	direct_terms['cosU1'] = numpy.cos(U1)
+	direct_terms['sigma1'] = numpy.arctan2(tanU1, direct_terms['cos_alpha12'])
+	direct_terms['Sinalpha0'] = direct_terms['cosU1'] * direct_terms['sin_alpha12']
+	cosalpha0_sq = 1.0 - direct_terms['Sinalpha0'] ** 2
+	direct_terms['cosalpha0_sq'] = cosalpha0_sq
+	u_sq = cosalpha0_sq * (a * a - b * b ) / (b * b)
+	direct_terms['A'] = 1.0 + (u_sq / 16384) * (4096 + u_sq * (-768 + u_sq * \
+		(320 - 175 * u_sq)))
+	direct_terms['B'] = (u_sq / 1024) * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+	direct_terms['C'] = (f/16) * cosalpha0_sq * (4 + f * (4 - 3 * cosalpha0_sq))
+	
+	return direct_terms
+
+""" Forward geodesic problem: Calculate coordinates of points 2 from precalculated terms of points 1 and azimuths (geodesic_direct_terms) and distance 
+Point1-Point2 (scalar or one distance per point) with the selected geodesic backend. Returns longitudes and latitudes of points 2 (degrees). """
+
+def geodesic_direct_from_terms(flattening, major_axis, direct_terms, distance):
+	if use_spherical_geodesics(flattening):
+		return direct_spherical_array(flattening, major_axis, direct_terms, distance)
+	if geodesic_backend == "vincenty":
+		return direct_vincenty_array(flattening, major_axis, direct_terms, distance)
+	
+	lambda1 = numpy.degrees(direct_terms['lambda1'])
+	distances = numpy.empty(lambda1.shape)
+	distances[:] = distance
+	lambda2, phi2, alpha21 = get_geod(flattening, major_axis).fwd(lambda1, numpy.degrees(direct_terms['phi1']), numpy.degrees(direct_terms['alpha12']), distances)
+	
+	""" pyproj normalizes longitudes to -180..180 deg. Longitudes of points 2 are returned relative to points 1 (like Vincenty) to keep rings continuous 
+	in the reprojected geographic coordinate system. """
+	
+	lambda2 = lambda1 + numpy.mod(numpy.asarray(lambda2) - lambda1 + 180.0, 360.0) - 180.0
+	return lambda2, numpy.asarray(phi2)
+
+""" Forward geodesic problem for coordinates and azimuths of points 1 (arrays or scalars) which are only used once. """
+
+def geodesic_direct(flattening, major_axis, lambda1, phi1, alpha12, distance):
+	return geodesic_direct_from_terms(flattening, major_axis, geodesic_direct_terms(flattening, major_axis, lambda1, phi1, alpha12), distance)
+
+""" Inverse geodesic problem: Calculate geodesic distances and azimuths between many pairs of points with the selected geodesic backend. 
+Returns arrays (distance, forward azimuth, backward azimuth), azimuths in degrees from 0 to 360. """
+
+def geodesic_inverse(flattening, major_axis, phi1, lambda1, phi2, lambda2):
+	if use_spherical_geodesics(flattening):
+		return inverse_spherical_array(flattening, major_axis, phi1, lambda1, phi2, lambda2)
+	if geodesic_backend == "vincenty":
+		return inverse_vincenty_array(flattening, major_axis, phi1, lambda1, phi2, lambda2)
+	
+	phi1, lambda1, phi2, lambda2 = [numpy.ascontiguousarray(coordinate, dtype = float) for coordinate in numpy.broadcast_arrays(*[numpy.atleast_1d(numpy.asarray(coordinate, dtype = float)) for coordinate in (phi1, lambda1, phi2, lambda2)])]
+	alpha12, alpha21, s = get_geod(flattening, major_axis).inv(lambda1.ravel(), phi1.ravel(), lambda2.ravel(), phi2.ravel())
+	
+	s = numpy.asarray(s).reshape(phi1.shape)
+	alpha12 = numpy.mod(numpy.asarray(alpha12).reshape(phi1.shape), 360.0)
+	alpha21 = numpy.mod(numpy.asarray(alpha21).reshape(phi1.shape), 360.0)
+	return s, alpha12, alpha21
+
+""" Radius of the sphere used for great circle calculations. Equals the major axis for spherical bodies, the mean radius (2a + b) / 3 otherwise. """
+
+def spherical_radius(flattening, major_axis):
+	return major_axis * (3.0 - flattening) / 3.0
+
+""" Calculate destination points on a sphere (great circles) from precalculated terms of points 1 and azimuths (geodesic_direct_terms) and 
+distance Point1-Point2. No iteration needed. """
+
+def direct_spherical_array(flattening, major_axis, direct_terms, distance):
+	delta = numpy.asarray(distance, dtype = float) / spherical_radius(flattening, major_axis)
+	sin_delta = numpy.sin(delta)
+	cos_delta = numpy.cos(delta)
+	
+	sin_phi2 = direct_terms['sin_phi1'] * cos_delta + direct_terms['cos_phi1'] * sin_delta * direct_terms['cos_alpha12']
+	phi2 = numpy.arcsin(numpy.clip(sin_phi2, -1.0, 1.0))
+	lambda2 = direct_terms['lambda1'] + numpy.arctan2(direct_terms['sin_alpha12'] * sin_delta * direct_terms['cos_phi1'], cos_delta - direct_terms['sin_phi1'] * sin_phi2)
+	
+	return numpy.degrees(lambda2), numpy.degrees(phi2)
+
+""" Calculate great circle distances and azimuths between many pairs of points on a sphere (haversine formula). Same arguments and results as 
+inverse_vincenty_array, no iteration needed. """
+
+def inverse_spherical_array(flattening, major_axis, phi1, lambda1, phi2, lambda2):
+	two_pi = math.pi * 2.0
+	phi1, lambda1, phi2, lambda2 = numpy.broadcast_arrays(*[numpy.radians(numpy.atleast_1d(numpy.asarray(coordinate, dtype = float))) for coordinate in (phi1, lambda1, phi2, lambda2)])
+	L = lambda2 - lambda1
+	
+	haversine = numpy.sin((phi2 - phi1) / 2.0) ** 2 + numpy.cos(phi1) * numpy.cos(phi2) * numpy.sin(L / 2.0) ** 2
+	s = 2.0 * spherical_radius(flattening, major_axis) * numpy.arcsin(numpy.sqrt(numpy.clip(haversine, 0.0, 1.0)))
+	alpha12 = numpy.arctan2(numpy.sin(L) * numpy.cos(phi2), numpy.cos(phi1) * numpy.sin(phi2) - numpy.sin(phi1) * numpy.cos(phi2) * numpy.cos(L))
+	alpha21 = numpy.arctan2(-numpy.sin(L) * numpy.cos(phi1), numpy.cos(phi2) * numpy.sin(phi1) - numpy.sin(phi2) * numpy.cos(phi1) * numpy.cos(L))
+	
+	alpha12 = numpy.mod(alpha12, two_pi)
+	alpha21 = numpy.mod(alpha21, two_pi) # backwards azimuth
+	
+	return s, numpy.degrees(alpha12), numpy.degrees(alpha21)
+
+""" Calculate geodesic buffer points around Polygons according to Vincenty's direct formula: Calculate coordinates of points 2 from precalculated 
+terms of points 1 and azimuths (geodesic_direct_terms) and distance Point1-Point2. All points of a ring are calculated in one call (numpy arrays), the distance 
+is the same for all points. Every point is iterated until its own sigma converges - converged points are masked out of further iterations. """
+
+def direct_vincenty_array(flattening, major_axis, direct_terms, distance): 
+	
 	f = flattening
-	piD4 = math.atan(1.0)
-	two_pi = piD4 * 8.0
-	phi1 = phi1 * piD4 / 45.0
-	lambda1 = lambda1 * piD4 / 45.0
-	phi2 = phi2 * piD4 / 45.0
-	lambda2 = lambda2 * piD4 / 45.0
+	a = major_axis
+	b = a * (1.0 - f) 
+	s = numpy.empty(len(direct_terms))
+	s[:] = distance
+	sinU1 = direct_terms['sinU1']
+	cosU1 = direct_terms['cosU1']
+	sin_alpha12 = direct_terms['sin_alpha12']
+	cos_alpha12 = direct_terms['cos_alpha12']
+	sigma1 = direct_terms['sigma1']
+	Sinalpha0 = direct_terms['Sinalpha0']
+	A = direct_terms['A']
+	B = direct_terms['B']
+	C = direct_terms['C']
+	sigma = s / (b * A)
+	two_sigma_m = 2 * sigma1 + sigma
+	
+	""" Approximation of sigma (distance Point1-Point2 on auxiliary sphere). Only points which have not converged yet are iterated. """
+	
+	not_converged = numpy.ones(sigma.shape, dtype = bool)
+	iteration = 0
+	while not_converged.any() and iteration < 200:
+		index = numpy.nonzero(not_converged)[0]
+		sigma_i = sigma[index]
+		B_i = B[index]
+		two_sigma_m_i = 2 * sigma1[index] + sigma_i 
+		delta_sigma = B_i * numpy.sin(sigma_i) * (numpy.cos(two_sigma_m_i) + (B_i/4) * (numpy.cos(sigma_i) * \
+			(-1 + 2 * numpy.cos(two_sigma_m_i) ** 2 - (B_i/6) * numpy.cos(two_sigma_m_i) * \
+			(-3 + 4 * numpy.sin(sigma_i) ** 2) * (-3 + 4 * numpy.cos(two_sigma_m_i) ** 2))))
+		sigma[index] = (s[index] / (b * A[index])) + delta_sigma 
+		two_sigma_m[index] = two_sigma_m_i
+		not_converged[index] = numpy.abs(sigma_i - sigma[index]) > 1.0e-12
+		iteration += 1
+	
+	""" Calculation of Points 2 coordinates on ellipsoid. """
+	
+	sin_sigma = numpy.sin(sigma)
+	cos_sigma = numpy.cos(sigma)
+	phi2 = numpy.arctan2((sinU1 * cos_sigma + cosU1 * sin_sigma * cos_alpha12), \
+		((1-f) * numpy.sqrt(Sinalpha0 ** 2 + (sinU1 * sin_sigma - cosU1 * cos_sigma * cos_alpha12) ** 2)))
+	lambda_new = numpy.arctan2((sin_sigma * sin_alpha12), (cosU1 * cos_sigma - sinU1 * sin_sigma * cos_alpha12)) 
+	L = lambda_new - (1-C) * f * Sinalpha0 * (sigma + C * sin_sigma * (numpy.cos(two_sigma_m) + \
+		C * cos_sigma * (-1 + 2 * numpy.cos(two_sigma_m) ** 2))) 
+	lambda2 = direct_terms['lambda1'] + L 
+	
+	return numpy.degrees(lambda2), numpy.degrees(phi2)
+
+""" Create polygon geometry from coordinate arrays of a ring in one call (via WKB) instead of adding every vertex to the ring separately. """
+
+def polygon_wkb_from_coordinate_arrays(X, Y):
+	coordinates = numpy.empty((len(X), 2), dtype = '<f8')
+	coordinates[:, 0] = X
+	coordinates[:, 1] = Y
+	return struct.pack('<BIII', 1, ogr.wkbPolygon, 1, len(coordinates)) + coordinates.tostring()
+
+def polygon_from_coordinate_arrays(X, Y):
+	return ogr.CreateGeometryFromWkb(polygon_wkb_from_coordinate_arrays(X, Y))
+	
+""" Calculate geodesic distances and azimuths between many pairs of points (Vincenty's inverse formula). Coordinates may be arrays or scalars. 
+Results are returned as arrays (distance, forward azimuth, backward azimuth) - no global variables are used, so the function can be used in any process. 
+Every pair is iterated until its own lambda converges - converged pairs are masked out of further iterations. """
+	
+def inverse_vincenty_array(flattening, major_axis, phi1, lambda1, phi2, lambda2):
 	
+	""" Calculation of Points 1 and 2 (phi) on auxiliary sphere and difference in longitude. """
+	
+	a = major_axis
+	f = flattening
 	b = a * (1.0 - f)
-	TanU1 = (1-f) * math.tan(phi1)
-	TanU2 = (1-f) * math.tan(phi2)
-	U1 = math.atan(TanU1)
-	U2 = math.atan(TanU2)
+	two_pi = math.pi * 2.0
+	phi1, lambda1, phi2, lambda2 = numpy.broadcast_arrays(*[numpy.radians(numpy.atleast_1d(numpy.asarray(coordinate, dtype = float))) for coordinate in (phi1, lambda1, phi2, lambda2)])
+	
+	U1 = numpy.arctan((1-f) * numpy.tan(phi1))
+	U2 = numpy.arctan((1-f) * numpy.tan(phi2))
+	sinU1 = numpy.sin(U1)
+	cosU1 = numpy.cos(U1)
+	sinU2 = numpy.sin(U2)
+	cosU2 = numpy.cos(U2)
 	L = lambda2 - lambda1
-	lambda_new = L
-	last_lembda = -9999999.9
-
+	lambda_new = numpy.array(L, dtype = float)
+	
+	sqr_sin_sigma = numpy.zeros(L.shape)
+	Sin_sigma = numpy.zeros(L.shape)
+	Cos_sigma = numpy.zeros(L.shape)
+	sigma = numpy.zeros(L.shape)
+	cos_sq_alpha0 = numpy.zeros(L.shape)
+	Cos2sigma_m = numpy.zeros(L.shape)
+	
 	""" Approximation of lambda_new (difference in longitude on auxiliary sphere, sigma (distance Point1Point2 on auxiliary sphere) and alpha0 
-	(azimuth of geodesic at the equator). """
-	
-	while abs(last_lembda - lambda_new) > 1.0e-12:
-		sqr_sin_sigma = pow(math.cos(U2) * math.sin(lambda_new), 2) + pow((math.cos(U1) * math.sin(U2) - \
-			math.sin(U1) *  math.cos(U2) * math.cos(lambda_new)), 2)
-		Sin_sigma = math.sqrt(sqr_sin_sigma)
-		Cos_sigma = math.sin(U1) * math.sin(U2) + math.cos(U1) * math.cos(U2) * math.cos(lambda_new)
-		sigma = math.atan2(Sin_sigma, Cos_sigma)
-		if sigma == 0:
-			sigma += 0.0000000001 # to avoid division by zero with Sin_alpha0 computation
-		Sin_alpha0 = math.cos(U1) * math.cos(U2) * math.sin(lambda_new) / math.sin(sigma)
-		alpha0 = math.asin(Sin_alpha0)
-		Cos2sigma_m = math.cos(sigma) - (2 * math.sin(U1) * math.sin(U2) / pow(math.cos(alpha0), 2))
-		C = (f/16) * pow(math.cos(alpha0), 2) * (4 + f * (4 - 3 * pow(math.cos(alpha0), 2)))
-		last_lembda = lambda_new
-		lambda_new = L + (1-C) * f * math.sin(alpha0) * (sigma + C * math.sin(sigma) * \
-			(Cos2sigma_m + C * math.cos(sigma) * (-1 + 2 * pow(Cos2sigma_m, 2))))
-	
-	u2 = pow(math.cos(alpha0), 2) * (a * a - b * b) / (b * b)
+	(azimuth of geodesic at the equator). Only pairs which have not converged yet are iterated. """
+	
+	not_converged = numpy.ones(L.shape, dtype = bool)
+	iteration = 0
+	while not_converged.any() and iteration < 200:
+		index = numpy.nonzero(not_converged)
+		lambda_i = lambda_new[index]
+		sqr_sin_sigma_i = (cosU2[index] * numpy.sin(lambda_i)) ** 2 + (cosU1[index] * sinU2[index] - \
+			sinU1[index] * cosU2[index] * numpy.cos(lambda_i)) ** 2
+		Sin_sigma_i = numpy.sqrt(sqr_sin_sigma_i)
+		Cos_sigma_i = sinU1[index] * sinU2[index] + cosU1[index] * cosU2[index] * numpy.cos(lambda_i)
+		sigma_i = numpy.arctan2(Sin_sigma_i, Cos_sigma_i)
+		sigma_i[sigma_i == 0] += 0.0000000001 # to avoid division by zero with Sin_alpha0 computation
+		Sin_alpha0_i = cosU1[index] * cosU2[index] * numpy.sin(lambda_i) / numpy.sin(sigma_i)
+		cos_sq_alpha0_i = numpy.clip(1.0 - Sin_alpha0_i ** 2, 0.0, 1.0)
+		
+		""" Geodesics along the equator (cos(alpha0) = 0): Cos2sigma_m is set to 0. """
+		
+		equatorial = cos_sq_alpha0_i == 0
+		Cos2sigma_m_i = Cos_sigma_i - (2 * sinU1[index] * sinU2[index] / numpy.where(equatorial, 1.0, cos_sq_alpha0_i))
+		Cos2sigma_m_i[equatorial] = 0.0
+		C = (f/16) * cos_sq_alpha0_i * (4 + f * (4 - 3 * cos_sq_alpha0_i))
+		lambda_new[index] = L[index] + (1-C) * f * Sin_alpha0_i * (sigma_i + C * numpy.sin(sigma_i) * \
+			(Cos2sigma_m_i + C * Cos_sigma_i * (-1 + 2 * Cos2sigma_m_i ** 2)))
+		
+		sqr_sin_sigma[index] = sqr_sin_sigma_i
+		Sin_sigma[index] = Sin_sigma_i
+		Cos_sigma[index] = Cos_sigma_i
+		sigma[index] = sigma_i
+		cos_sq_alpha0[index] = cos_sq_alpha0_i
+		Cos2sigma_m[index] = Cos2sigma_m_i
+		not_converged[index] = numpy.abs(lambda_i - lambda_new[index]) > 1.0e-12
+		iteration += 1
+	
+	u2 = cos_sq_alpha0 * (a * a - b * b) / (b * b)
 	A = 1 + (u2/16384) * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
 	B = (u2/1024) * (256 + u2 * (-128+ u2 * (74 - 47 * u2)))
-	delta_sigma = B * Sin_sigma * (Cos2sigma_m + (B/4) * (Cos_sigma * (-1 + 2 * pow(Cos2sigma_m, 2)) - \
-		(B/6) * Cos2sigma_m * (-3 + 4 * sqr_sin_sigma) * (-3 + 4 * pow(Cos2sigma_m, 2))))
+	delta_sigma = B * Sin_sigma * (Cos2sigma_m + (B/4) * (Cos_sigma * (-1 + 2 * Cos2sigma_m ** 2) - \
+		(B/6) * Cos2sigma_m * (-3 + 4 * sqr_sin_sigma) * (-3 + 4 * Cos2sigma_m ** 2)))
 	
-	""" Calculation of distance and azimuth on ellipsoid. """
+	""" Calculation of distances and azimuths on ellipsoid. """
 	
 	s = b * A * (sigma - delta_sigma)
-	alpha12 = math.atan2((math.cos(U2) * math.sin(lambda_new)), \
-		(math.cos(U1) * math.sin(U2) - math.sin(U1) * math.cos(U2) * math.cos(lambda_new)))
-	alpha21 = math.atan2((math.cos(U1) * math.sin(lambda_new)), \
-		(-math.sin(U1) * math.cos(U2) + math.cos(U1) * math.sin(U2) * math.cos(lambda_new)))
-
-	if alpha12 < 0.0: 
-		alpha12 =  alpha12 + two_pi
-	if alpha12 > two_pi: 
-		alpha12 = alpha12 - two_pi
-		
-	alpha21 = alpha21 + two_pi / 2.0 # backwards azimuth
-	if alpha21 < 0.0: 
-		alpha21 = alpha21 + two_pi
-	if alpha21 > two_pi: 
-		alpha21 = alpha21 - two_pi
-
-	alpha12 = alpha12 * 45.0 / piD4
-	alpha21 = alpha21 * 45.0 / piD4
-	geodesic_distance_crater_area = s
-	geodesic_distance_crater_area2 = s
-	direction12 = alpha12
+	alpha12 = numpy.arctan2((cosU2 * numpy.sin(lambda_new)), \
+		(cosU1 * sinU2 - sinU1 * cosU2 * numpy.cos(lambda_new)))
+	alpha21 = numpy.arctan2((cosU1 * numpy.sin(lambda_new)), \
+		(-sinU1 * cosU2 + cosU1 * sinU2 * numpy.cos(lambda_new)))
+	
+	alpha12 = numpy.mod(alpha12, two_pi)
+	alpha21 = numpy.mod(alpha21 + two_pi / 2.0, two_pi) # backwards azimuth
+	
+	return s, numpy.degrees(alpha12), numpy.degrees(alpha21)
 	
 """ Iterate crater features: add centroid coordinates and Diameter(km) to list. """
 
+""" Index of area features: feature IDs for every value of the attribute field area_file_field (values are compared as strings). Geometries are ignored 
+while the layer is read. """
+
+def build_area_feature_index(layer, area_file_field):
+	area_feature_index = defaultdict(list)
+	
+	layer.SetIgnoredFields(["OGR_GEOMETRY"])
+	layer.ResetReading()
+	for area_feature in layer:
+		area_feature_index[str(area_feature.GetField(area_file_field))].append(area_feature.GetFID())
+	layer.SetIgnoredFields([])
+	layer.ResetReading()
+	
+	return area_feature_index
+
+""" Add the polygon(s) of a polygon or multipolygon geometry to a multipolygon (geometries are copied). Returns the added polygons. """
+
+def add_polygons_to_multipolygon(multipolygon, geom):
+	polygons = [geom]
+	if geom.GetGeometryName() == "MULTIPOLYGON":
+		polygons = [geom.GetGeometryRef(polygon_count) for polygon_count in xrange(geom.GetGeometryCount())]
+	
+	for polygon in polygons:
+		multipolygon.AddGeometry(polygon)
+	return polygons
+
 def read_crater_features(layer_crater, proj_to_geog, geog_to_eq_area_proj, write_logfile, logfile):
 	global crater_features_list, no_of_crater_features
 	
@@ -1624,10 +1777,525 @@ def read_crater_features(layer_crater, proj_to_geog, geog_to_eq_area_proj, write
 		
 		crater_features_list.append([n, Crater_Diam, Crater_X, Crater_Y])
 		n += 1
+
+""" Columnar crater table: relevant craters are stored in a NumPy structured array (one row per crater) instead of lists of lists. Fields are the crater ID, 
+diameter (km), centroid lon / lat (geographic coordinates), geodesic distance to the reference area (meters, -1 for craters inside the area, NaN if not 
+determined) and the status of the crater. Craters with status crater_status_obliterates are located on the ejecta blanket of a larger crater: they are 
+buffered (their ejecta blanket still affects the reference area) but not included in the CSFD measurement. Crater lists from the crater detection functions 
+([ID, diameter, lon, lat] or [ID, diameter, lon, lat, distance]) are converted with build_crater_table. """
+
+crater_table_dtype = numpy.dtype([('id', 'i8'), ('diameter', 'f8'), ('lon', 'f8'), ('lat', 'f8'), ('distance', 'f8'), ('status', 'i1')])
+crater_status_included = 0
+crater_status_obliterates = 1
+
+def build_crater_table(crater_list, status = crater_status_included):
+	craters = numpy.zeros(len(crater_list), dtype = crater_table_dtype)
+	craters['distance'] = numpy.nan
+	craters['status'] = status
+	for field_count, crater_column in enumerate(zip(*crater_list)):
+		craters[crater_table_dtype.names[field_count]] = crater_column
+	return craters
+
+""" Rearrange a crater table in alternating order of crater diameters (largest, smallest, second largest, second smallest, ...) for multicore operation. """
+
+def alternate_crater_table(craters):
+	craters = craters[numpy.argsort(craters['diameter'], kind = 'mergesort')]
+	crater_order = numpy.column_stack((numpy.arange(len(craters))[::-1], numpy.arange(len(craters)))).ravel()[:len(craters)]
+	return craters[crater_order]
+
+""" Index of crater IDs in a crater table (sorted IDs and the respective rows). crater_id_lookup returns the rows of crater IDs in the table (-1 if an ID 
+is not in the table). """
+
+def build_crater_id_index(craters):
+	crater_order = numpy.argsort(craters['id'], kind = 'mergesort')
+	return craters['id'][crater_order], crater_order
+
+def crater_id_lookup(crater_id_index, crater_ids):
+	sorted_crater_ids, crater_order = crater_id_index
+	if len(sorted_crater_ids) == 0:
+		return numpy.zeros(numpy.shape(crater_ids), dtype = int) - 1
+	positions = numpy.minimum(numpy.searchsorted(sorted_crater_ids, crater_ids), len(sorted_crater_ids) - 1)
+	return numpy.where(sorted_crater_ids[positions] == crater_ids, crater_order[positions], -1)
+	
+""" Transform coordinate arrays with a sequence of coordinate transformations. All points are transformed in one call per transformation instead of 
+creating and transforming a point geometry for every coordinate pair. Returns arrays of the transformed X and Y coordinates. """
+
+def transform_coordinate_arrays(X, Y, coordinate_transformations):
+	coordinates = zip(numpy.asarray(X, dtype = float).tolist(), numpy.asarray(Y, dtype = float).tolist())
+	if len(coordinates) == 0:
+		return numpy.array([]), numpy.array([])
+	
+	for coordinate_transformation in coordinate_transformations:
+		coordinates = coordinate_transformation.TransformPoints(coordinates)
+	
+	coordinates = numpy.array(coordinates, dtype = float)
+	return coordinates[:, 0], coordinates[:, 1]
+
+""" Classify many points at once: Returns a boolean array which is True for points inside or on the boundary of the (OGR) polygon geom. The polygon is 
+converted to Shapely and tested with shapely.vectorized instead of calculating the distance between every point and the polygon. The polygons of a 
+multipolygon (which may overlap when several research areas are selected) are tested one by one. """
+
+def points_in_polygon(geom, X, Y):
+	from shapely import vectorized
+	
+	X = numpy.asarray(X, dtype = float)
+	Y = numpy.asarray(Y, dtype = float)
+	if len(X) == 0:
+		return numpy.zeros(0, dtype = bool)
+	
+	polygons = [loads(geom.ExportToWkt())]
+	if polygons[0].geom_type == "MultiPolygon":
+		polygons = list(polygons[0])
+	
+	points_inside = numpy.zeros(len(X), dtype = bool)
+	for polygon in polygons:
+		points_inside = points_inside | vectorized.contains(polygon, X, Y) | vectorized.touches(polygon, X, Y)
+	return points_inside
+
+""" Get the rings of all polygons of a (multi)polygon geometry as lists of vertex coordinates (outer ring first for every polygon) and the index of the 
+polygon every ring belongs to. """
+
+def get_polygon_rings(geom):
+	polygons = [geom]
+	if geom.GetGeometryName() == "MULTIPOLYGON":
+		polygons = [geom.GetGeometryRef(polygon_count) for polygon_count in xrange(geom.GetGeometryCount())]
+	
+	rings = []
+	ring_polygons = []
+	for polygon_count, polygon in enumerate(polygons):
+		for ring_count in xrange(polygon.GetGeometryCount()):
+			ring = polygon.GetGeometryRef(ring_count)
+			rings.append([list(ring.GetPoint_2D(vertex)) for vertex in xrange(ring.GetPointCount())])
+			ring_polygons.append(polygon_count)
+	return rings, ring_polygons
+
+""" Spatial index (STRtree) of the segments of a ring (list of vertex coordinates, closed). It is built once per research area and used to find the 
+closest point on the ring for many points (nearest_points_on_ring) without projecting every point on the whole ring. STRtree.nearest and the geometries 
+returned by STRtree queries (identified by id) require Shapely 1.7 or later. """
+
+shapely_version_message = "CSFD Tools requires Shapely 1.7 or later (STRtree.nearest). Please update Shapely."
+
+def build_ring_segment_index(ring_vertices):
+	from shapely.geometry import LineString
+	from shapely.strtree import STRtree
+	
+	if not hasattr(STRtree, 'nearest'):
+		raise Exception(shapely_version_message)
+	
+	ring_vertices = numpy.asarray(ring_vertices, dtype = float)
+	segment_starts = ring_vertices[:-1]
+	segment_ends = ring_vertices[1:]
+	segments = [LineString([tuple(segment_start), tuple(segment_end)]) for segment_start, segment_end in zip(segment_starts, segment_ends)]
+	segment_ids = dict((id(segment), segment_count) for segment_count, segment in enumerate(segments))
+	return STRtree(segments), segments, segment_ids, segment_starts, segment_ends
+
+""" Get closest points on a ring (spatial index of ring segments) for points X, Y. The nearest segment of every point is taken from the index, the closest 
+point on that segment is calculated for all points at once. Returns an array of closest point coordinates [[x, y], ...]. """
+
+def nearest_points_on_ring(ring_segment_index, X, Y):
+	from shapely.geometry import Point
+	
+	segment_tree, segments, segment_ids, segment_starts, segment_ends = ring_segment_index
+	points = numpy.column_stack((numpy.asarray(X, dtype = float), numpy.asarray(Y, dtype = float)))
+	nearest_segments = numpy.array([segment_ids[id(segment_tree.nearest(Point(point_X, point_Y)))] for point_X, point_Y in points], dtype = int)
 	
+	segment_starts = segment_starts[nearest_segments]
+	segment_vectors = segment_ends[nearest_segments] - segment_starts
+	segment_lengths_sq = (segment_vectors ** 2).sum(axis = 1)
+	segment_positions = ((points - segment_starts) * segment_vectors).sum(axis = 1) / numpy.where(segment_lengths_sq > 0, segment_lengths_sq, 1.0)
+	segment_positions = numpy.clip(segment_positions, 0.0, 1.0)
+	
+	return segment_starts + segment_positions[:, numpy.newaxis] * segment_vectors
+
+""" Geodesic distances and closest points between many points and a ring (spatial index of ring segments). Points and ring are given in the coordinates 
+the ring was digitized in (X, Y), points also in geographic coordinates (lon, lat). The planar closest point defines a search radius: all segments within 
+boundary_candidate_factor times the planar distance (corrected for the convergence of meridians when the coordinates are geographic) are candidates. For all 
+pairs of points and candidate segments, the closest point on the segment is found at once by golden section search of the geodesic distance along the 
+segment (segment_pair_distances). The planar search radius does not guarantee that the geodesically closest segment is a candidate (scale distortion of the 
+projection, polar regions). Therefore, every segment whose geodesic lower bound (segment caps, see query_segment_cap_index) is below the shortest distance 
+found so far is checked as well. coordinate_transformations transform ring coordinates to geographic coordinates (empty list if the ring is geographic). 
+Returns the geodesic distances and the closest points (geographic coordinates) of all points. """
+
+boundary_candidate_factor = 1.5
+
+def geodesic_nearest_points_on_ring(ring_segment_index, X, Y, lon, lat, coordinate_transformations, flattening, major_axis):
+	from shapely.geometry import box
+	
+	segment_tree, segments, segment_ids, segment_starts, segment_ends = ring_segment_index
+	X = numpy.asarray(X, dtype = float)
+	Y = numpy.asarray(Y, dtype = float)
+	lon = numpy.asarray(lon, dtype = float)
+	lat = numpy.asarray(lat, dtype = float)
+	
+	""" Search radius of every point from the planar closest point. """
+	
+	planar_nearest_points = nearest_points_on_ring(ring_segment_index, X, Y)
+	search_radius = numpy.hypot(planar_nearest_points[:, 0] - X, planar_nearest_points[:, 1] - Y) * boundary_candidate_factor + 1e-9
+	if len(coordinate_transformations) == 0:
+		search_radius = search_radius / numpy.maximum(numpy.cos(numpy.radians(numpy.minimum(numpy.abs(Y) + search_radius, 90.0))), 0.01)
+	
+	""" Pairs of points and candidate segments. """
+	
+	pair_points = []
+	pair_segments = []
+	for point_count in xrange(len(X)):
+		for segment in segment_tree.query(box(X[point_count] - search_radius[point_count], Y[point_count] - search_radius[point_count], X[point_count] + search_radius[point_count], Y[point_count] + search_radius[point_count])):
+			pair_points.append(point_count)
+			pair_segments.append(segment_ids[id(segment)])
+	pair_points = numpy.array(pair_points, dtype = int)
+	pair_segments = numpy.array(pair_segments, dtype = int)
+	pair_distances, pair_coordinates = segment_pair_distances(pair_points, pair_segments, segment_starts, segment_ends, lon, lat, coordinate_transformations, flattening, major_axis)
+	
+	geodesic_distances = numpy.empty(len(X))
+	geodesic_distances.fill(numpy.inf)
+	numpy.minimum.at(geodesic_distances, pair_points, pair_distances)
+	
+	""" Check all further segments which may be closer than the shortest distance found among the candidates. """
+	
+	segment_cap_index = build_segment_cap_index(build_segment_caps(segment_starts, segment_ends, coordinate_transformations, flattening))
+	points_unit_vectors = geocentric_unit_vectors(lon, lat, flattening)
+	checked_segments = defaultdict(set)
+	for point_count, segment_count in zip(pair_points.tolist(), pair_segments.tolist()):
+		checked_segments[point_count].add(segment_count)
+	
+	extra_pair_points = []
+	extra_pair_segments = []
+	for point_count in xrange(len(X)):
+		for segment_count in query_segment_cap_index(segment_cap_index, points_unit_vectors[point_count], geodesic_distances[point_count], flattening, major_axis).tolist():
+			if segment_count not in checked_segments[point_count]:
+				extra_pair_points.append(point_count)
+				extra_pair_segments.append(segment_count)
+	
+	if len(extra_pair_points) > 0:
+		extra_pair_points = numpy.array(extra_pair_points, dtype = int)
+		extra_pair_segments = numpy.array(extra_pair_segments, dtype = int)
+		extra_pair_distances, extra_pair_coordinates = segment_pair_distances(extra_pair_points, extra_pair_segments, segment_starts, segment_ends, lon, lat, coordinate_transformations, flattening, major_axis)
+		pair_points = numpy.concatenate((pair_points, extra_pair_points))
+		pair_distances = numpy.concatenate((pair_distances, extra_pair_distances))
+		pair_coordinates = numpy.concatenate((pair_coordinates, extra_pair_coordinates))
+		numpy.minimum.at(geodesic_distances, extra_pair_points, extra_pair_distances)
+	
+	closest_pairs = numpy.nonzero(pair_distances == geodesic_distances[pair_points])[0]
+	closest_points = numpy.zeros((len(X), 2))
+	closest_points[pair_points[closest_pairs]] = pair_coordinates[closest_pairs]
+	
+	return geodesic_distances, closest_points
+
+""" Closest points of pairs of points (lon, lat) and segments: golden section search of the position on the segment (0: segment start, 1: segment end) with 
+the shortest geodesic distance, segment ends are checked as well. Returns the distance and the closest point (geographic coordinates) of every pair. """
+
+def segment_pair_distances(pair_points, pair_segments, segment_starts, segment_ends, lon, lat, coordinate_transformations, flattening, major_axis):
+	pair_segment_starts = segment_starts[pair_segments]
+	pair_segment_vectors = segment_ends[pair_segments] - pair_segment_starts
+	pair_lon = lon[pair_points]
+	pair_lat = lat[pair_points]
+	
+	golden_ratio = (math.sqrt(5.0) - 1.0) / 2.0
+	position_low = numpy.zeros(len(pair_points))
+	position_high = numpy.ones(len(pair_points))
+	position_1 = position_high - golden_ratio * (position_high - position_low)
+	position_2 = position_low + golden_ratio * (position_high - position_low)
+	distance_1 = segment_position_distances(position_1, pair_segment_starts, pair_segment_vectors, pair_lon, pair_lat, coordinate_transformations, flattening, major_axis)[0]
+	distance_2 = segment_position_distances(position_2, pair_segment_starts, pair_segment_vectors, pair_lon, pair_lat, coordinate_transformations, flattening, major_axis)[0]
+	
+	for iteration in xrange(40):
+		lower = distance_1 < distance_2
+		position_high = numpy.where(lower, position_2, position_high)
+		position_low = numpy.where(lower, position_low, position_1)
+		position_new = numpy.where(lower, position_high - golden_ratio * (position_high - position_low), position_low + golden_ratio * (position_high - position_low))
+		distance_new = segment_position_distances(position_new, pair_segment_starts, pair_segment_vectors, pair_lon, pair_lat, coordinate_transformations, flattening, major_axis)[0]
+		position_1_new = numpy.where(lower, position_new, position_2)
+		distance_1_new = numpy.where(lower, distance_new, distance_2)
+		position_2 = numpy.where(lower, position_1, position_new)
+		distance_2 = numpy.where(lower, distance_1, distance_new)
+		position_1 = position_1_new
+		distance_1 = distance_1_new
+	
+	pair_distances = []
+	pair_coordinates = []
+	for position in ((position_low + position_high) / 2.0, numpy.zeros(len(pair_points)), numpy.ones(len(pair_points))):
+		distances, coordinates_lon, coordinates_lat = segment_position_distances(position, pair_segment_starts, pair_segment_vectors, pair_lon, pair_lat, coordinate_transformations, flattening, major_axis)
+		pair_distances.append(distances)
+		pair_coordinates.append(numpy.column_stack((coordinates_lon, coordinates_lat)))
+	pair_distances = numpy.array(pair_distances)
+	pair_closest_position = numpy.argmin(pair_distances, axis = 0)
+	pair_coordinates = numpy.array(pair_coordinates)[pair_closest_position, numpy.arange(len(pair_points))].reshape(-1, 2)
+	pair_distances = pair_distances[pair_closest_position, numpy.arange(len(pair_points))]
+	
+	return pair_distances, pair_coordinates
+
+""" Geodesic distances between points (lon, lat) and positions on segments (segment start + position * segment vector). Returns distances and the 
+geographic coordinates of the positions. """
+
+def segment_position_distances(position, segment_starts, segment_vectors, lon, lat, coordinate_transformations, flattening, major_axis):
+	segment_points = segment_starts + position[:, numpy.newaxis] * segment_vectors
+	segment_points_lon, segment_points_lat = segment_points[:, 0], segment_points[:, 1]
+	if len(coordinate_transformations) > 0:
+		segment_points_lon, segment_points_lat = transform_coordinate_arrays(segment_points_lon, segment_points_lat, coordinate_transformations)
+	return geodesic_inverse(flattening, major_axis, lat, lon, segment_points_lat, segment_points_lon)[0], segment_points_lon, segment_points_lat
+
+""" Conservative lower bound of geodesic distances between points and a research area. The geodesic between two points on the ellipsoid is never shorter 
+than the great circle between their geocentric directions on a sphere with the semi-minor axis as radius (the sphere lies inside the ellipsoid). The area is 
+enclosed by a spherical cap (bounding cap) around the mean direction of its outer ring vertices. The angular cap radius is the largest angle between center and 
+vertices plus the longest segment (estimated from the angles between segment ends and midpoints), so segments which are straight in the digitized spatial 
+reference are enclosed as well. Craters whose lower bound exceeds their search range can be rejected before the expensive nearest-point search. 
+If lower_bound_pruning is False, all craters outside an area are passed to the geodesic distance calculation. """
+
+lower_bound_pruning = True
+
+def geocentric_unit_vectors(lon, lat, flattening):
+	lon = numpy.radians(numpy.asarray(lon, dtype = float))
+	lat = numpy.radians(numpy.asarray(lat, dtype = float))
+	eccentricity_sq = flattening * (2 - flattening)
+	N = 1 / numpy.sqrt(1 - eccentricity_sq * numpy.sin(lat) ** 2)
+	unit_vectors = numpy.column_stack((N * numpy.cos(lat) * numpy.cos(lon), N * numpy.cos(lat) * numpy.sin(lon), N * (1 - eccentricity_sq) * numpy.sin(lat)))
+	return unit_vectors / numpy.sqrt((unit_vectors ** 2).sum(axis = 1))[:, numpy.newaxis]
+
+def unit_vector_angles(unit_vectors_1, unit_vectors_2):
+	return numpy.arctan2(numpy.sqrt((numpy.cross(unit_vectors_1, unit_vectors_2) ** 2).sum(axis = 1)), (unit_vectors_1 * unit_vectors_2).sum(axis = 1))
+
+""" Bounding cap of a ring (list of closed vertex coordinates in the digitized spatial reference). coordinate_transformations transform ring coordinates to 
+geographic coordinates (empty list if the ring is geographic). Returns the unit vector of the cap center and the angular cap radius. """
+
+def build_bounding_cap(ring_vertices, coordinate_transformations, flattening):
+	ring_vertices = numpy.asarray(ring_vertices, dtype = float)
+	segment_midpoints = (ring_vertices[:-1] + ring_vertices[1:]) / 2
+	vertices_lon, vertices_lat = transform_coordinate_arrays(ring_vertices[:, 0], ring_vertices[:, 1], coordinate_transformations)
+	midpoints_lon, midpoints_lat = transform_coordinate_arrays(segment_midpoints[:, 0], segment_midpoints[:, 1], coordinate_transformations)
+	vertices_unit_vectors = geocentric_unit_vectors(vertices_lon, vertices_lat, flattening)
+	midpoints_unit_vectors = geocentric_unit_vectors(midpoints_lon, midpoints_lat, flattening)
+	
+	cap_center = vertices_unit_vectors.sum(axis = 0)
+	cap_center_norm = numpy.sqrt((cap_center ** 2).sum())
+	if cap_center_norm < 1e-9:
+		return numpy.array([0.0, 0.0, 1.0]), math.pi
+	cap_center = cap_center / cap_center_norm
+	
+	segment_lengths = unit_vector_angles(vertices_unit_vectors[:-1], midpoints_unit_vectors) + unit_vector_angles(midpoints_unit_vectors, vertices_unit_vectors[1:])
+	cap_radius = unit_vector_angles(vertices_unit_vectors, cap_center[numpy.newaxis, :]).max() + segment_lengths.max()
+	return cap_center, min(cap_radius, math.pi)
+
+""" Lower bounds of geodesic distances (meters) between points (lon, lat) and the area enclosed by a bounding cap. """
+
+def bounding_cap_distances(bounding_cap, lon, lat, flattening, major_axis):
+	cap_center, cap_radius = bounding_cap
+	minor_axis = major_axis * (1 - flattening)
+	angles = unit_vector_angles(geocentric_unit_vectors(lon, lat, flattening), cap_center[numpy.newaxis, :])
+	return minor_axis * numpy.maximum(angles - cap_radius, 0.0)
+
+""" Caps of single ring segments (same estimate as build_bounding_cap): centered on the segment midpoint, the angular radius is the segment length 
+(angles between segment ends and midpoint). The caps of a ring are indexed once (build_segment_cap_index, k-d tree of the cap centers, same SciPy fallback 
+as build_crater_neighbor_index). query_segment_cap_index returns the segments whose geodesic lower bound (meters, see bounding_cap_distances) to a point 
+(geocentric unit vector) is below a distance: the tree returns the caps whose centers are within the distance plus the largest cap radius, the lower bound 
+is calculated only for these. """
+
+def build_segment_caps(segment_starts, segment_ends, coordinate_transformations, flattening):
+	segment_midpoints = (segment_starts + segment_ends) / 2
+	starts_lon, starts_lat = transform_coordinate_arrays(segment_starts[:, 0], segment_starts[:, 1], coordinate_transformations)
+	ends_lon, ends_lat = transform_coordinate_arrays(segment_ends[:, 0], segment_ends[:, 1], coordinate_transformations)
+	midpoints_lon, midpoints_lat = transform_coordinate_arrays(segment_midpoints[:, 0], segment_midpoints[:, 1], coordinate_transformations)
+	midpoints_unit_vectors = geocentric_unit_vectors(midpoints_lon, midpoints_lat, flattening)
+	segment_lengths = unit_vector_angles(geocentric_unit_vectors(starts_lon, starts_lat, flattening), midpoints_unit_vectors) + unit_vector_angles(midpoints_unit_vectors, geocentric_unit_vectors(ends_lon, ends_lat, flattening))
+	return midpoints_unit_vectors, segment_lengths
+
+def build_segment_cap_index(segment_caps):
+	caps_centers, caps_radii = segment_caps
+	max_cap_radius = 0.0
+	if len(caps_radii) > 0:
+		max_cap_radius = float(caps_radii.max())
+	try:
+		from scipy.spatial import cKDTree
+	except ImportError:
+		return None, caps_centers, caps_radii, max_cap_radius
+	return cKDTree(caps_centers), caps_centers, caps_radii, max_cap_radius
+
+def query_segment_cap_index(segment_cap_index, point_unit_vector, distance, flattening, major_axis):
+	caps_tree, caps_centers, caps_radii, max_cap_radius = segment_cap_index
+	minor_axis = major_axis * (1 - flattening)
+	search_angle = min(distance / minor_axis + max_cap_radius, math.pi)
+	search_chord = 2 * math.sin(search_angle / 2) * (1 + 1e-9) + 1e-12
+	if caps_tree is None:
+		candidate_segments = numpy.nonzero(((caps_centers - point_unit_vector) ** 2).sum(axis = 1) <= search_chord ** 2)[0]
+	else:
+		candidate_segments = numpy.array(sorted(caps_tree.query_ball_point(point_unit_vector, search_chord)), dtype = int)
+	if len(candidate_segments) == 0:
+		return candidate_segments
+	point_unit_vectors = numpy.repeat(point_unit_vector[numpy.newaxis, :], len(candidate_segments), axis = 0)
+	lower_bounds = minor_axis * numpy.maximum(unit_vector_angles(point_unit_vectors, caps_centers[candidate_segments]) - caps_radii[candidate_segments], 0.0)
+	return candidate_segments[lower_bounds < distance]
+
+""" Neighbor index of crater centroids: a k-d tree of their geocentric unit vectors. Craters within a geodesic distance (meters) of a point are found from the 
+chord which corresponds to that distance on the semi-minor-axis sphere (lower bound, see bounding_cap_distances), i.e. the result contains all craters within 
+the distance and possibly a few more. Returns the indices of the craters in ascending order. SciPy (cKDTree) is optional: without SciPy, the chords to all 
+crater unit vectors are compared at once (same result, linear time per query). """
+
+def build_crater_neighbor_index(lon, lat, flattening):
+	unit_vectors = geocentric_unit_vectors(lon, lat, flattening)
+	try:
+		from scipy.spatial import cKDTree
+	except ImportError:
+		return None, unit_vectors
+	return cKDTree(unit_vectors), unit_vectors
+
+def query_crater_neighbor_index(crater_neighbor_index, lon, lat, search_distance, flattening, major_axis):
+	crater_tree, unit_vectors = crater_neighbor_index
+	search_angle = min(search_distance / (major_axis * (1 - flattening)), math.pi)
+	search_chord = 2 * math.sin(search_angle / 2) * (1 + 1e-9) + 1e-12
+	point_unit_vector = geocentric_unit_vectors([lon], [lat], flattening)[0]
+	if crater_tree is None:
+		return numpy.nonzero(((unit_vectors - point_unit_vector) ** 2).sum(axis = 1) <= search_chord ** 2)[0]
+	return numpy.array(sorted(crater_tree.query_ball_point(point_unit_vector, search_chord)), dtype = int)
+
+""" Spatial index (STRtree) of crater centroids. It is built once after reading the crater features and used to prefilter craters for every reference area: 
+only craters within the envelope of the area, expanded by the largest possible buffer range, are investigated by the (expensive) crater detection functions. """
+
+def build_crater_index(crater_features_list):
+	from shapely.geometry import Point
+	from shapely.strtree import STRtree
+	
+	crater_points = [Point(crater[2], crater[3]) for crater in crater_features_list]
+	crater_point_ids = dict((id(crater_point), crater_count) for crater_count, crater_point in enumerate(crater_points))
+	if len(crater_points) == 0:
+		return None, crater_points, crater_point_ids
+	return STRtree(crater_points), crater_points, crater_point_ids
+
+""" Get craters within search_distance (meters) of the envelope of a (geographic) reference area from the crater index. The envelope is expanded by the 
+search distance in latitude (using the smallest meridional radius of the body) and in longitude (at the highest latitude of the expanded envelope). If the 
+expanded envelope reaches a pole or the dateline, all longitudes are searched. Craters are returned in the order of crater_features_list. """
+
+def query_crater_index(crater_index, crater_features_list, geom, search_distance, flattening, major_axis):
+	from shapely.geometry import box
+	
+	crater_tree, crater_points, crater_point_ids = crater_index
+	if crater_tree is None:
+		return []
+	
+	envelope_min_X, envelope_max_X, envelope_min_Y, envelope_max_Y = geom.GetEnvelope()
+	expansion_Y = math.degrees(search_distance / (major_axis * (1.0 - flattening) ** 2))
+	envelope_min_Y = envelope_min_Y - expansion_Y
+	envelope_max_Y = envelope_max_Y + expansion_Y
+	
+	if envelope_min_Y <= -90 or envelope_max_Y >= 90:
+		envelope_min_X = -180.0
+		envelope_max_X = 180.0
+	else:
+		expansion_X = expansion_Y / math.cos(math.radians(max(abs(envelope_min_Y), abs(envelope_max_Y))))
+		envelope_min_X = envelope_min_X - expansion_X
+		envelope_max_X = envelope_max_X + expansion_X
+		if envelope_min_X <= -180 or envelope_max_X >= 180:
+			envelope_min_X = -180.0
+			envelope_max_X = 180.0
+	
+	""" Crater longitudes may be given from 0 to 360 deg - the envelope is also searched shifted by 360 deg. """
+	
+	crater_candidate_ids = set()
+	for shift_X in (-360.0, 0.0, 360.0):
+		for crater_point in crater_tree.query(box(envelope_min_X + shift_X, envelope_min_Y, envelope_max_X + shift_X, envelope_max_Y)):
+			crater_candidate_ids.add(crater_point_ids[id(crater_point)])
+	
+	return [crater_features_list[crater_count] for crater_count in sorted(crater_candidate_ids)]
+
+""" Reproject the selected research areas (geom in geographic coordinates, Area_ID of every polygon in geom_area_IDs) and the crater centroids (craters_X,
+craters_Y) to avoid problems during dateline intersection. The reference meridian of the geographic coordinate system is changed to the center (centroid) of
+the research areas. This new geographic coordinate system is used for an equal area projection which consists of the geographic reference with new reference
+meridian and the parameters from the sr projected reference system. Craters are reprojected first to projected, then to geographic system. This is mandatory,
+as the generation of geographic coordinates from projected coordinates considers the pure distance from the central meridian. This avoids misinterpretations
+of nearest neighbors by (lon 175deg - lon -175deg) distances.
+
+All selected areas share one projection center if their combined longitude extent is not larger than projection_center_max_extent (degrees). Otherwise,
+far-apart areas (or areas on both sides of the dateline) would be cut by the antimeridian of the common projection center, so every research area (Area_ID)
+is reprojected with its own projection center. Returns the polygon indices and the reprojected geometry of every group of polygons with a common projection
+center, the reprojected crater coordinates (in sr and in the geographic reprojection, one row per group), the transformations of ring vertices to the
+geographic reprojection and the transformation from the geographic reprojection back to geographic coordinates of every group. """
+
+projection_center_max_extent = 90.0
+
+def reproject_areas_and_craters(geom, geom_area_IDs, craters_X, craters_Y, sr, geogr_sr, proj_to_geog):
+	polygons = [geom]
+	if geom.GetGeometryName() == "MULTIPOLYGON":
+		polygons = [geom.GetGeometryRef(polygon_count) for polygon_count in xrange(geom.GetGeometryCount())]
+	
+	envelope_min_X, envelope_max_X, envelope_min_Y, envelope_max_Y = geom.GetEnvelope()
+	if envelope_max_X - envelope_min_X <= projection_center_max_extent:
+		polygon_groups = [range(len(polygons))]
+	else:
+		polygon_groups = []
+		group_area_IDs = []
+		for polygon_count in xrange(len(polygons)):
+			if geom_area_IDs[polygon_count] not in group_area_IDs:
+				group_area_IDs.append(geom_area_IDs[polygon_count])
+				polygon_groups.append([])
+			polygon_groups[group_area_IDs.index(geom_area_IDs[polygon_count])].append(polygon_count)
+	
+	group_geoms = []
+	craters_X_reprojected = []
+	craters_Y_reprojected = []
+	craters_X_geogr_reprojection = []
+	craters_Y_geogr_reprojection = []
+	ring_coordinate_transformations = []
+	geogr_reprojection_to_geogr = []
+	
+	for polygon_group in polygon_groups:
+		group_geom = ogr.Geometry(ogr.wkbMultiPolygon)
+		for polygon_count in polygon_group:
+			group_geom.AddGeometry(polygons[polygon_count])
+		
+		""" Get center of research areas to define projection center (if an area directly intersects the dateline, the center is not in the dateline area,
+		but somewhere between min/max longitude on the map. It's not very elegant but as long as the central meridian is not at 0 deg lon in that case,
+		it's all good. """
+		
+		group_geom_centroid = group_geom.Centroid()
+		projection_center_X = round(group_geom_centroid.GetX(), 1)
+		
+		geogr_sr_reprojection_text = re.sub('(PRIMEM)(.*)(,)', r'\1["Reference_Meridian",' + str(projection_center_X) + '],', str(geogr_sr))
+		geogr_sr_reprojection = osr.SpatialReference(geogr_sr_reprojection_text)
+		sr_reprojection_text = 'PROJCS["MOLLWEIDE_REPROJECTION_EQ_AREA",'+str(geogr_sr_reprojection_text)+',PROJECTION["Mollweide"],PARAMETER["False_Easting",0.0],PARAMETER["False_Northing",0.0],PARAMETER["central_meridian",' + str(projection_center_X) + '],PARAMETER["latitude_of_origin",0.0],UNIT["Meter",1.0]]'
+		sr_reprojection = osr.SpatialReference(sr_reprojection_text)
+		
+		""" Define reprojections """
+		
+		geogr_to_proj_reprojection = osr.CoordinateTransformation(geogr_sr, sr_reprojection)
+		proj_reprojection_to_geogr_reprojection = osr.CoordinateTransformation(sr_reprojection, geogr_sr_reprojection)
+		geogr_reprojection_to_proj_reprojection = osr.CoordinateTransformation(geogr_sr_reprojection, sr_reprojection)
+		eq_area_proj_to_proj = osr.CoordinateTransformation(sr_reprojection, sr)
+		
+		""" Reproject input geometry """
+		
+		group_geom.Transform(geogr_to_proj_reprojection)
+		group_geom.Transform(proj_reprojection_to_geogr_reprojection)
+		
+		if sr.IsProjected():
+			group_geom.Transform(geogr_reprojection_to_proj_reprojection)
+			group_geom.Transform(eq_area_proj_to_proj)
+		
+		""" Reproject craters to the geographic reprojection. Reproject data back to original spatial reference when original spatial reference is projected.
+		The interpolate function to identify the nearest point on the reference area identifies the coordinates with respect to its spatial reference. A
+		straight line between two vertices looks different in every projection. In order to identify craters with respect to the polygon boundaries as they
+		were digitized, this step needs to be conducted. Geographic coordinates (Vincenty needs them) are derived from the coordinates in the original
+		spatial reference. """
+		
+		group_craters_X_geogr_reprojection, group_craters_Y_geogr_reprojection = transform_coordinate_arrays(craters_X, craters_Y, [geogr_to_proj_reprojection, proj_reprojection_to_geogr_reprojection])
+		group_craters_X_reprojected, group_craters_Y_reprojected = group_craters_X_geogr_reprojection, group_craters_Y_geogr_reprojection
+		group_ring_coordinate_transformations = []
+		
+		if sr.IsProjected():
+			group_craters_X_reprojected, group_craters_Y_reprojected = transform_coordinate_arrays(group_craters_X_geogr_reprojection, group_craters_Y_geogr_reprojection, [geogr_reprojection_to_proj_reprojection, eq_area_proj_to_proj])
+			group_craters_X_geogr_reprojection, group_craters_Y_geogr_reprojection = transform_coordinate_arrays(group_craters_X_reprojected, group_craters_Y_reprojected, [proj_to_geog, geogr_to_proj_reprojection, proj_reprojection_to_geogr_reprojection])
+			group_ring_coordinate_transformations = [proj_to_geog, geogr_to_proj_reprojection, proj_reprojection_to_geogr_reprojection]
+		
+		group_geoms.append(group_geom)
+		craters_X_reprojected.append(group_craters_X_reprojected)
+		craters_Y_reprojected.append(group_craters_Y_reprojected)
+		craters_X_geogr_reprojection.append(group_craters_X_geogr_reprojection)
+		craters_Y_geogr_reprojection.append(group_craters_Y_geogr_reprojection)
+		ring_coordinate_transformations.append(group_ring_coordinate_transformations)
+		geogr_reprojection_to_geogr.append(osr.CoordinateTransformation(geogr_sr_reprojection, geogr_sr))
+	
+	return polygon_groups, group_geoms, numpy.array(craters_X_reprojected), numpy.array(craters_Y_reprojected), numpy.array(craters_X_geogr_reprojection), numpy.array(craters_Y_geogr_reprojection), ring_coordinate_transformations, geogr_reprojection_to_geogr
+
 """ Get craters inside reference area for traditional crater counting. """
 
-def get_craters_for_trad(out_q, crater_features_list_part, geom, generate_connectors_crater_polygon, lock, sr_wkt): 
+def get_craters_for_trad(out_q, crater_features_list_part, geom, geom_area_IDs, generate_connectors_crater_polygon, lock, sr_wkt):
 	from shapely.geometry import Point, LineString
 	global craters_for_counting_list
 	
@@ -1660,66 +2328,20 @@ def get_craters_for_trad(out_q, crater_features_list_part, geom, generate_connec
 		proj_to_geog = osr.CoordinateTransformation(sr, geogr_sr)
 		geog_to_proj = osr.CoordinateTransformation(geogr_sr, sr)
 	
-	""" Get center of research area to define projection center (if geom directly intersects the dateline, the center is not in the dateline area, 
-	but somewhere between min/max longitude on the map. It's not very nice but as long as the central meridian is not at 0 deg lon in that case, 
-	everything is fine. """
-	
-	geom_centroid = geom.Centroid()
-	geom_centroid_X, geom_centroid_Y, geom_centroid_Z = geom_centroid.GetPoint()
-	projection_center_X = round(geom_centroid_X, 1)
-	projection_center_Y = round(geom_centroid_Y, 1)
-
-	""" Change reference meridian in geographic coordinate system to center of input polygon to avoid problems during dateline intersection. This new geographic 
-	coordinate system is used for an equal area projection which consists of the geographic reference with new reference meridian and the parameters from the sr 
-	projected reference system. """
-	
-	geogr_sr_reprojection_text = re.sub('(PRIMEM)(.*)(,)', r'\1["Reference_Meridian",' + str(projection_center_X) + '],', str(geogr_sr))
-	geogr_sr_reprojection = osr.SpatialReference(geogr_sr_reprojection_text)
-	
-	sr_reprojection_text = 'PROJCS["MOLLWEIDE_REPROJECTION_EQ_AREA",'+str(geogr_sr_reprojection_text)+',PROJECTION["Mollweide"],PARAMETER["False_Easting",0.0],PARAMETER["False_Northing",0.0],PARAMETER["central_meridian",' + str(projection_center_X) + '],PARAMETER["latitude_of_origin",0.0],UNIT["Meter",1.0]]'
-	sr_reprojection = osr.SpatialReference(sr_reprojection_text)
-	
-	""" Define reprojections """
-	
-	geogr_to_geogr_reprojection = osr.CoordinateTransformation(geogr_sr, geogr_sr_reprojection)
-	geogr_to_proj_reprojection = osr.CoordinateTransformation(geogr_sr, sr_reprojection)
-	proj_reprojection_to_geogr_reprojection = osr.CoordinateTransformation(sr_reprojection, geogr_sr_reprojection)
-	geogr_reprojection_to_geogr = osr.CoordinateTransformation(geogr_sr_reprojection, geogr_sr)
-	geogr_reprojection_to_eq_area = osr.CoordinateTransformation(geogr_sr_reprojection, sr_reprojection)
-	eq_area_proj_to_proj = osr.CoordinateTransformation(sr_reprojection, sr)
-	geogr_reprojection_to_geogr = osr.CoordinateTransformation(geogr_sr_reprojection, geogr_sr)
-	geogr_reprojection_to_proj_reprojection = osr.CoordinateTransformation(geogr_sr_reprojection, sr_reprojection)
+	""" Reproject research areas and craters (reproject_areas_and_craters, all crater centroids are reprojected at once with transform_coordinate_arrays).
+	Far-apart research areas get their own projection center, every crater is reprojected for every group of areas. Accordingly, dateline intersections
+	will be considered during processing. """
 	
-	""" Reproject input geometry """
+	polygon_groups, group_geoms, craters_X_reprojected, craters_Y_reprojected, craters_X_geogr_reprojection, craters_Y_geogr_reprojection, ring_coordinate_transformations, geogr_reprojection_to_geogr = reproject_areas_and_craters(geom, geom_area_IDs, [crater_centroid[2] for crater_centroid in crater_features_list_part], [crater_centroid[3] for crater_centroid in crater_features_list_part], sr, geogr_sr, proj_to_geog)
 	
-	geom.Transform(geogr_to_proj_reprojection)
-	geom.Transform(proj_reprojection_to_geogr_reprojection)
+	""" Get craters inside research area (centroids inside or on the boundary of the research area, classified at once). """
 	
-	if sr.IsProjected():
-		geom.Transform(geogr_reprojection_to_proj_reprojection)
-		geom.Transform(eq_area_proj_to_proj)
+	craters_inside_mask = numpy.zeros(len(crater_features_list_part), dtype = bool)
+	for group_count, group_geom in enumerate(group_geoms):
+		craters_inside_mask = craters_inside_mask | points_in_polygon(group_geom, craters_X_reprojected[group_count], craters_Y_reprojected[group_count])
 	
-	for crater_centroid in crater_features_list_part:
-		
-		crater_centroid_geometry = Point(crater_centroid[2], crater_centroid[3])
-		crater_centroid_geometry_2 = ogr.CreateGeometryFromWkt(crater_centroid_geometry.wkt)
-		
-		""" Reproject craters. First to projected, then to geographic system. This is mandatory, as the generation of geographic coordinates from projected coordinates 
-		considers the pure distance from the central meridian. This avoids misinterpretations of nearest neighbors by (lon 175deg - lon -175deg) distances. 
-		Accordingly, dateline intersections will be considered during processing. """
-		
-		crater_centroid_geometry_2.Transform(geogr_to_proj_reprojection)
-		crater_centroid_geometry_2.Transform(proj_reprojection_to_geogr_reprojection)
-		
-		if sr.IsProjected():
-			crater_centroid_geometry_2.Transform(geogr_reprojection_to_proj_reprojection) 
-			crater_centroid_geometry_2.Transform(eq_area_proj_to_proj)
-		
-		distance_crater_polygon = crater_centroid_geometry_2.Distance(geom)
-		
-		""" Get craters inside research area """
-		
-		if distance_crater_polygon <= 0:
+	for crater_count, crater_centroid in enumerate(crater_features_list_part):
+		if craters_inside_mask[crater_count] == True:
 			craters_for_counting_list.append(crater_centroid)
 		
 	""" Pass list """
@@ -1729,12 +2351,14 @@ def get_craters_for_trad(out_q, crater_features_list_part, geom, generate_connec
 """ Get distance between crater centroid and area polygon and determine which craters are inside bufferfactor * crater radius range without using 
 ogr.intersection method (time consuming) """
 
-def get_craters_for_buffering_BCC(out_q, out_q_2, out_q_3, crater_features_list_part, geom, vertices_list, flattening, major_axis, bufferfactor, generate_connectors_crater_polygon, lock, sr_wkt): 
+def get_craters_for_buffering_BCC(out_q, out_q_2, out_q_3, crater_features_list_part, geom, geom_area_IDs, flattening, major_axis, bufferfactor, generate_connectors_crater_polygon, lock, sr_wkt): 
 	from shapely.geometry import Point, LineString
 	global craters_inside_area, craters_outside_area, craters_within_range, craters_for_counting_list
 	
 	craters_inside_area = []
 	craters_outside_area = []
+	craters_outside_area_count = []
+	craters_outside_area_distances_2D = []
 	craters_within_range = []
 	st = time.time()
 	
@@ -1765,226 +2389,129 @@ def get_craters_for_buffering_BCC(out_q, out_q_2, out_q_3, crater_features_list_
 		proj_to_geog = osr.CoordinateTransformation(sr, geogr_sr)
 		geog_to_proj = osr.CoordinateTransformation(geogr_sr, sr)
 	
-	""" Get center of research area to define projection center (if geom directly intersects the dateline, the center is not in the dateline area, 
-	but somewhere between min/max longitude on the map. It's not very elegant but as long as the central meridian is not at 0 deg lon in that case, 
-	it's all good. """
-	
-	geom_centroid = geom.Centroid()
-	geom_centroid_X, geom_centroid_Y, geom_centroid_Z = geom_centroid.GetPoint()
-	projection_center_X = round(geom_centroid_X, 1)
-	projection_center_Y = round(geom_centroid_Y, 1)
-
-	""" Change reference meridian in geographic coordinate system to center of input polygon to avoid problems during dateline intersection. This new geographic 
-	coordinate system is used for an equal area projection which consists of the geographic reference with new reference meridian and the parameters from the sr 
-	projected reference system. """
+	""" Reproject research areas and craters (reproject_areas_and_craters, all crater centroids are reprojected at once with transform_coordinate_arrays).
+	Far-apart research areas get their own projection center, every crater is reprojected for every group of areas. Accordingly, dateline intersections
+	will be considered during processing. """
 	
-	geogr_sr_reprojection_text = re.sub('(PRIMEM)(.*)(,)', r'\1["Reference_Meridian",' + str(projection_center_X) + '],', str(geogr_sr))
-	geogr_sr_reprojection = osr.SpatialReference(geogr_sr_reprojection_text)
-	sr_reprojection_text = 'PROJCS["MOLLWEIDE_REPROJECTION_EQ_AREA",'+str(geogr_sr_reprojection_text)+',PROJECTION["Mollweide"],PARAMETER["False_Easting",0.0],PARAMETER["False_Northing",0.0],PARAMETER["central_meridian",' + str(projection_center_X) + '],PARAMETER["latitude_of_origin",0.0],UNIT["Meter",1.0]]'
-	sr_reprojection = osr.SpatialReference(sr_reprojection_text)
+	polygon_groups, group_geoms, craters_X_reprojected, craters_Y_reprojected, craters_X_geogr_reprojection, craters_Y_geogr_reprojection, ring_coordinate_transformations, geogr_reprojection_to_geogr = reproject_areas_and_craters(geom, geom_area_IDs, [crater_centroid[2] for crater_centroid in crater_features_list_part], [crater_centroid[3] for crater_centroid in crater_features_list_part], sr, geogr_sr, proj_to_geog)
 	
-	""" Define reprojections """
+	#########################
+	#	OUTER / INNER RINGS	#
+	#########################
 	
-	geogr_to_geogr_reprojection = osr.CoordinateTransformation(geogr_sr, geogr_sr_reprojection)
-	geogr_to_proj_reprojection = osr.CoordinateTransformation(geogr_sr, sr_reprojection)
-	proj_reprojection_to_geogr_reprojection = osr.CoordinateTransformation(sr_reprojection, geogr_sr_reprojection)
-	geogr_reprojection_to_geogr = osr.CoordinateTransformation(geogr_sr_reprojection, geogr_sr)
-	geogr_reprojection_to_eq_area = osr.CoordinateTransformation(geogr_sr_reprojection, sr_reprojection)
-	eq_area_proj_to_proj = osr.CoordinateTransformation(sr_reprojection, sr)
-	geogr_reprojection_to_geogr = osr.CoordinateTransformation(geogr_sr_reprojection, geogr_sr)
-	geogr_reprojection_to_input_sr = osr.CoordinateTransformation(geogr_sr_reprojection, sr)
-	input_sr_to_geogr_reprojection = osr.CoordinateTransformation(sr, geogr_sr_reprojection)
-	input_sr_to_sr_reprojection = osr.CoordinateTransformation(sr, sr_reprojection)
-	geogr_reprojection_to_proj_reprojection = osr.CoordinateTransformation(geogr_sr_reprojection, sr_reprojection)
+	""" Generate lists of the reprojected outer and inner rings of all polygons in geom (all selected research areas) and spatial indexes of their segments.
+	They are used to find the closest point between reprojected crater centroids and polygons / inner rings. ring_polygons holds the polygon of every ring
+	(Area_ID in geom_area_IDs), ring_groups the group of areas with a common projection center. """
 	
-	geogr_to_sr = osr.CoordinateTransformation(geogr_sr, sr)
+	rings_reprojected = []
+	ring_polygons = []
+	ring_groups = []
+	for group_count, group_geom in enumerate(group_geoms):
+		group_rings_reprojected, group_ring_polygons = get_polygon_rings(group_geom)
+		rings_reprojected.extend(group_rings_reprojected)
+		ring_polygons.extend([polygon_groups[group_count][ring_polygon] for ring_polygon in group_ring_polygons])
+		ring_groups.extend([group_count] * len(group_rings_reprojected))
+	ring_segment_indexes = [build_ring_segment_index(ring_vertices) for ring_vertices in rings_reprojected]
 	
-	geom.Transform(geogr_to_proj_reprojection)
-	geom.Transform(proj_reprojection_to_geogr_reprojection)
+	""" Reject craters which are too far away from the research areas to be within range (lower bound of the geodesic distance to the bounding caps of the 
+	outer rings). Rejected craters are outside the research area. Pruning is skipped when connectors are generated as they are drawn for all craters outside. """
 	
-	if sr.IsProjected():
-		geom.Transform(geogr_reprojection_to_proj_reprojection)
-		geom.Transform(eq_area_proj_to_proj)
+	craters_rejected_mask = numpy.zeros(len(crater_features_list_part), dtype = bool)
+	if lower_bound_pruning == True and generate_connectors_crater_polygon == False and len(crater_features_list_part) > 0:
+		craters_search_range = numpy.array([crater_centroid[1] for crater_centroid in crater_features_list_part], dtype = float) / 2 * 1000 * bufferfactor
+		craters_lower_bound = numpy.min([bounding_cap_distances(build_bounding_cap(ring_vertices, ring_coordinate_transformations[ring_groups[ring_count]], flattening), craters_X_geogr_reprojection[ring_groups[ring_count]], craters_Y_geogr_reprojection[ring_groups[ring_count]], flattening, major_axis) for ring_count, ring_vertices in enumerate(rings_reprojected) if ring_count == 0 or ring_polygons[ring_count] != ring_polygons[ring_count - 1]], axis = 0)
+		craters_rejected_mask = craters_lower_bound > craters_search_range
+		print "Lower bound pruning:", int(craters_rejected_mask.sum()), "/", len(crater_features_list_part), "craters rejected (" + str(round(float(craters_rejected_mask.sum()) / len(crater_features_list_part) * 100, 1)) + " %)"
 	
-	#################
-	#	OUTER RING	#
-	#################
+	""" Classify craters inside and outside the research areas at once (points_in_polygon). Distance > 0 would lead to craters with centroid exactly on 
+	polygon boundary to always be considered closer to the inner ring than the outer boundary. That's why a little extra distance is considered: the research 
+	areas are buffered by 0.001 for the classification. """
 	
-	""" Generate list of reprojected geometry outline. This one is used to find closest point to reprojected crater centroids. """
+	craters_inside_mask = numpy.zeros(len(crater_features_list_part), dtype = bool)
+	for group_count, group_geom in enumerate(group_geoms):
+		craters_inside_mask = craters_inside_mask | points_in_polygon(group_geom.Buffer(0.001), craters_X_reprojected[group_count], craters_Y_reprojected[group_count])
 	
-	vertices_list_reprojected = []
-	geom_reprojected = geom.GetGeometryRef(0)
-	no_of_polygon_vertices = geom_reprojected.GetPointCount()
-	for vertex in xrange(no_of_polygon_vertices):
-		current_vertex_X, current_vertex_Y, z = geom_reprojected.GetPoint(vertex)
-		vertices_list_reprojected.append([current_vertex_X, current_vertex_Y])
-	area_linestring = LineString(list(vertices_list_reprojected))
-	
-	#################
-	#	INNER RING	#
-	#################
-	
-	""" Generate lists of inner ring geometry lines. They are used to find the closest point between crater centroids and polygons / inner rings.  """
-	
-	no_of_inner_rings = geom.GetGeometryCount() - 1
-	if no_of_inner_rings > 0:
-		inner_rings = dict()
-		for inner_polygon_count in range(no_of_inner_rings):
-			inner_polygon_count += 1
-			vertices_inner_rings = []
-			inner_rings[inner_polygon_count] = []
-			inner_ring = geom.GetGeometryRef(inner_polygon_count)
-			no_of_ring_vertices = inner_ring.GetPointCount()
-			for vertex in xrange(no_of_ring_vertices):
-				current_vertex_X, current_vertex_Y, z = inner_ring.GetPoint(vertex)
-				vertices_inner_rings.append([current_vertex_X, current_vertex_Y])
-			inner_linestring = LineString(list(vertices_inner_rings))
-			inner_rings[inner_polygon_count].append([inner_linestring])
-	
-	for crater_centroid in crater_features_list_part:
+	for crater_count, crater_centroid in enumerate(crater_features_list_part):
+		if craters_rejected_mask[crater_count] == True:
+			continue
 		
 		""" Exclude craters within polygon for distance determination (geodesic distance between area and crater from two point coordinates) 
 		(as closest point between crater centroid and area can later only be conducted using a line, not a polygon feature 
 		- difficult du destinguish between inside and outside craters) """
 		
-		""" crater_centroid_geometry and crater_centroid_geometry_2 are the same reprojected point geometries. crater_centroid_geometry is in 
-		Shapely, crater_centroid_geometry_2 in OGR format. Both libraries can apply their functions only to their own geometry format. """
-		
-		crater_centroid_geometry = Point(crater_centroid[2], crater_centroid[3])
-		crater_centroid_geometry_2 = ogr.CreateGeometryFromWkt(crater_centroid_geometry.wkt)
-		
-		""" Reproject craters. First to projected, then to geographic system. This is mandatory, as the generation of geographic coordinates from projected coordinates 
-		considers the pure distance from the central meridian. This avoids misinterpretations of nearest neighbors by (lon 175deg - lon -175deg) distances. 
-		Accordingly, dateline intersections will be considered during processing. """
-		
-		crater_centroid_geometry_2.Transform(geogr_to_proj_reprojection)
-		crater_centroid_geometry_2.Transform(proj_reprojection_to_geogr_reprojection)
-		
-		""" Reproject data back to original spatial reference when original spatial reference is projected. The interpolate function to 
-		identify the nearest point on the reference area identifies the coordinates with respect to its spatial reference. A straight line 
-		between two vertices looks different in every projection. In order to identify craters with respect to the polygon boundaries as they were 
-		digitized, this step needs to be conducted. """
-		
-		if sr.IsProjected():
-			crater_centroid_geometry_2.Transform(geogr_reprojection_to_proj_reprojection)
-			crater_centroid_geometry_2.Transform(eq_area_proj_to_proj)
-		
-		crater_centroid_geometry_reprojected = Point(crater_centroid_geometry_2.GetX(), crater_centroid_geometry_2.GetY())
-		
-		distance_crater_polygon = crater_centroid_geometry_2.Distance(geom)
 		crater_centroid_diameter_km = crater_centroid[1]
 		
 		""" Distinguish between craters inside and outside research area. """
 		
-		""" Investigate craters outside research area. Distance > 0 would lead to craters with centroid exactly on polygon boundary to always 
-		be considered closer to the inner ring than the outer boundary. That's why a little extra distance is considered (> 0.001). """
-
-		if distance_crater_polygon > 0.001:  
-			
-			#################
-			#	OUTER RING	#
-			#################
+		""" Investigate craters outside research area. The 2D distance between crater centroid and research area is only needed for the connectors 
+		(Dist2Dgeo). """
+		
+		if craters_inside_mask[crater_count] == False:
 			
-			intersect_point = area_linestring.interpolate(area_linestring.project(crater_centroid_geometry_reprojected)) 
 			craters_outside_area.append(crater_centroid)
-			 
-			""" Determine distance of intersecting point to crater using geographic coordinates - Vincenty needs them. """
-			 
-			intersect_point_2 = ogr.CreateGeometryFromWkt(intersect_point.wkt)
-
-			if sr.IsProjected():
-				intersect_point_2.Transform(proj_to_geog)
-				intersect_point_2.Transform(geogr_to_proj_reprojection)
-				intersect_point_2.Transform(proj_reprojection_to_geogr_reprojection)
-				crater_centroid_geometry_2.Transform(proj_to_geog)
-				crater_centroid_geometry_2.Transform(geogr_to_proj_reprojection)
-				crater_centroid_geometry_2.Transform(proj_reprojection_to_geogr_reprojection)
-			
-			intersect_point = Point(intersect_point_2.GetX(),intersect_point_2.GetY()) 
-			
-			""" Calculate geodesic distance between crater centroid and intersection with research area. """
-			
-			lembda1 = crater_centroid_geometry_2.GetX() 
-			phi1 = crater_centroid_geometry_2.GetY() 
-			lembda2 = intersect_point.x
-			phi2 = intersect_point.y
-			
-			inverse_vincenty(flattening, major_axis, phi1, lembda1, phi2, lembda2)
-			geodesic_distance_crater_area = geodesic_distance_crater_area2
-			
-			#################
-			#	INNER RING	#
-			#################
-			
-			if no_of_inner_rings > 0:
-				
-				""" Copy values of distance to outer polygon boundary analysis to compare distances to the inner ring. The shortest distance is used for 
-				the CSFD analysis. """
-				
-				distance_value_closest = geodesic_distance_crater_area
-				intersect_point_closest = intersect_point
-				
-				for inner_polygon_count in range(no_of_inner_rings):
-					inner_polygon_count += 1
-					inner_ring = inner_rings[inner_polygon_count][0][0]
-					
-					intersect_point = inner_ring.interpolate(inner_ring.project(crater_centroid_geometry_reprojected))
-					
-					intersect_point_2 = ogr.CreateGeometryFromWkt(intersect_point.wkt)
-					
-					if sr.IsProjected():
-						intersect_point_2.Transform(proj_to_geog)
-					
-						intersect_point_2.Transform(geogr_to_proj_reprojection) 
-						intersect_point_2.Transform(proj_reprojection_to_geogr_reprojection)
-						intersect_point = Point(intersect_point_2.GetX(),intersect_point_2.GetY())
-					
-					lembda2 = intersect_point.x
-					phi2 = intersect_point.y
-					
-					inverse_vincenty(flattening, major_axis, phi1, lembda1, phi2, lembda2)
-					
-					""" Save intersect point for geometry line generation and overwrite distance value if crater is closer to the inner ring than the outer ring. """
-					
-					if geodesic_distance_crater_area2 < distance_value_closest:
-						intersect_point_closest = intersect_point
-						distance_value_closest = geodesic_distance_crater_area2
-					
-				""" Get final intersect point and distance """
-				
-				intersect_point = intersect_point_closest
-				geodesic_distance_crater_area = distance_value_closest
-			
-			""" Check if geodesic distance between crater centroid and area is smaller than / equal to craterradius * bufferfactor. 
-			If so, craters are considered relevant for buffered crater counting. """
-			
-			if geodesic_distance_crater_area <= crater_centroid_diameter_km / 2 * 1000 * bufferfactor:
-				craters_within_range.append(crater_centroid)
-			
-			""" Append coordinates to craters within range list """
+			craters_outside_area_count.append(crater_count)
 			
 			if generate_connectors_crater_polygon == True:
-				
-				""" Transform intersect_point to OGR format - which is intersect_point_2 - to reproject data back to original geographic coordinates. 
-				Transform intersect_point_2 back to Shapely format - which is intersect_point_orig_geogr. Transformation can only be done in OGR.  """
-				
-				intersect_point_2 = ogr.CreateGeometryFromWkt(intersect_point.wkt)
-				intersect_point_2.Transform(geogr_reprojection_to_geogr) 
-				intersect_point_orig_geogr = Point(intersect_point_2.GetX(), intersect_point_2.GetY())
-				
-				line_crater_polygon = LineString([Point(crater_centroid[2], crater_centroid[3]), intersect_point_orig_geogr])
-				line_crater_polygon_layer = ogr.CreateGeometryFromWkt(line_crater_polygon.wkt)
-				ll_featureDefn = layer_line_crater_polygon.GetLayerDefn()
-				ll_feature = ogr.Feature(ll_featureDefn)
-				ll_feature.SetGeometry(line_crater_polygon_layer) 
-				ll_feature.SetField('Area', Area_ID)
-				ll_feature.SetField('Dist2Dgeo', distance_crater_polygon)
-				ll_feature.SetField('Dist3Dmet', geodesic_distance_crater_area)
-				layer_line_crater_polygon.CreateFeature(ll_feature)
+				distance_crater_polygon = float('inf')
+				for group_count, group_geom in enumerate(group_geoms):
+					crater_centroid_geometry_2 = ogr.Geometry(ogr.wkbPoint)
+					crater_centroid_geometry_2.AddPoint_2D(craters_X_reprojected[group_count, crater_count], craters_Y_reprojected[group_count, crater_count])
+					distance_crater_polygon = min(distance_crater_polygon, crater_centroid_geometry_2.Distance(group_geom))
+				craters_outside_area_distances_2D.append(distance_crater_polygon)
 		
 		else: # craters inside research area
 			craters_inside_area.append(crater_centroid)
 	
+	""" Calculate geodesic distances between crater centroids and the outer ring and all inner rings of the research area for all craters outside the research 
+	area at once (candidate segments from the spatial indexes of ring segments). Closest points (intersections) are returned in geographic coordinates. 
+	Get final intersect point (closest ring) and distance for each crater. """
+	
+	if len(craters_outside_area_count) > 0:
+		geodesic_distances_rings = []
+		craters_outside_area_intersect_points = []
+		for ring_count, ring_segment_index in enumerate(ring_segment_indexes):
+			group_count = ring_groups[ring_count]
+			geodesic_distances_ring, intersect_points_ring = geodesic_nearest_points_on_ring(ring_segment_index, craters_X_reprojected[group_count, craters_outside_area_count], craters_Y_reprojected[group_count, craters_outside_area_count], craters_X_geogr_reprojection[group_count, craters_outside_area_count], craters_Y_geogr_reprojection[group_count, craters_outside_area_count], ring_coordinate_transformations[group_count], flattening, major_axis)
+			geodesic_distances_rings.append(geodesic_distances_ring)
+			craters_outside_area_intersect_points.append(intersect_points_ring)
+		
+		geodesic_distances_rings = numpy.column_stack(geodesic_distances_rings)
+		craters_outside_area_intersect_points = numpy.array(craters_outside_area_intersect_points).transpose(1, 0, 2)
+		closest_ring = numpy.argmin(geodesic_distances_rings, axis = 1)
+		geodesic_distances_crater_area = geodesic_distances_rings[numpy.arange(len(closest_ring)), closest_ring]
+	
+	for outside_crater_count, crater_centroid in enumerate(craters_outside_area):
+		geodesic_distance_crater_area = geodesic_distances_crater_area[outside_crater_count]
+		crater_centroid_diameter_km = crater_centroid[1]
+		
+		""" Check if geodesic distance between crater centroid and area is smaller than / equal to craterradius * bufferfactor. 
+		If so, craters are considered relevant for buffered crater counting. """
+		
+		if geodesic_distance_crater_area <= crater_centroid_diameter_km / 2 * 1000 * bufferfactor:
+			craters_within_range.append(crater_centroid)
+		
+		""" Append coordinates to craters within range list """
+		
+		if generate_connectors_crater_polygon == True:
+			
+			""" Transform intersect_point to OGR format - which is intersect_point_2 - to reproject data back to original geographic coordinates. 
+			Transform intersect_point_2 back to Shapely format - which is intersect_point_orig_geogr. Transformation can only be done in OGR.  """
+			
+			intersect_point = Point(craters_outside_area_intersect_points[outside_crater_count, closest_ring[outside_crater_count]])
+			intersect_point_2 = ogr.CreateGeometryFromWkt(intersect_point.wkt)
+			intersect_point_2.Transform(geogr_reprojection_to_geogr[ring_groups[closest_ring[outside_crater_count]]])
+			intersect_point_orig_geogr = Point(intersect_point_2.GetX(), intersect_point_2.GetY())
+			
+			line_crater_polygon = LineString([Point(crater_centroid[2], crater_centroid[3]), intersect_point_orig_geogr])
+			line_crater_polygon_layer = ogr.CreateGeometryFromWkt(line_crater_polygon.wkt)
+			ll_featureDefn = layer_line_crater_polygon.GetLayerDefn()
+			ll_feature = ogr.Feature(ll_featureDefn)
+			ll_feature.SetGeometry(line_crater_polygon_layer) 
+			ll_feature.SetField('Area', geom_area_IDs[ring_polygons[closest_ring[outside_crater_count]]])
+			ll_feature.SetField('Dist2Dgeo', craters_outside_area_distances_2D[outside_crater_count])
+			ll_feature.SetField('Dist3Dmet', geodesic_distance_crater_area)
+			layer_line_crater_polygon.CreateFeature(ll_feature)
+	
 	""" Merge lists of craters within research area and craters within buffer range of research area. """
 	
 	craters_for_counting_list = craters_inside_area + craters_within_range
@@ -1995,12 +2522,15 @@ def get_craters_for_buffering_BCC(out_q, out_q_2, out_q_3, crater_features_list_
 	out_q_2.put(len(craters_within_range))
 	out_q_3.put(len(craters_inside_area))
 
-def get_craters_for_buffering_NSC_BNSC(approach, out_q, out_q_2, out_q_3, out_q_4, crater_features_list_part, geom, vertices_list, flattening, major_axis, bufferfactor, bufferfactor_crater, generate_connectors_crater_polygon, lock, sr_wkt): 
+def get_craters_for_buffering_NSC_BNSC(approach, out_q, out_q_2, out_q_3, out_q_4, crater_features_list_part, geom, geom_area_IDs, flattening, major_axis, bufferfactor, bufferfactor_crater, generate_connectors_crater_polygon, lock, sr_wkt): 
 	from shapely.geometry import Point, LineString
 	global craters_inside_area, craters_outside_area, craters_within_range, craters_for_counting_list, craters_excluded_from_list
 	
 	craters_inside_area = []
 	craters_outside_area = []
+	craters_outside_area_2 = []
+	craters_outside_area_count = []
+	craters_outside_area_distances_2D = []
 	craters_within_range = []
 	st = time.time()
 	
@@ -2032,85 +2562,54 @@ def get_craters_for_buffering_NSC_BNSC(approach, out_q, out_q_2, out_q_3, out_q_
 		proj_to_geog = osr.CoordinateTransformation(sr, geogr_sr)
 		geog_to_proj = osr.CoordinateTransformation(geogr_sr, sr)
 	
-	""" Get center of research area to define projection center (if geom directly intersects the dateline, the center is not in the dateline area, 
-	but somewhere between min/max longitude on the map. It's not very elegant but as long as the central meridian is not at 0 deg lon in that case, 
-	it's all good. """
+	""" Reproject research areas and craters (reproject_areas_and_craters, all crater centroids are reprojected at once with transform_coordinate_arrays).
+	Far-apart research areas get their own projection center, every crater is reprojected for every group of areas. Accordingly, dateline intersections
+	will be considered during processing. """
 	
-	geom_centroid = geom.Centroid()
-	geom_centroid_X, geom_centroid_Y, geom_centroid_Z = geom_centroid.GetPoint()
-	projection_center_X = round(geom_centroid_X, 1)
-	projection_center_Y = round(geom_centroid_Y, 1)
-
-	""" Change reference meridian in geographic coordinate system to center of input polygon to avoid problems during dateline intersection. This new geographic 
-	coordinate system is used for an equal area projection which consists of the geographic reference with new reference meridian and the parameters from the sr 
-	projected reference system. """
+	polygon_groups, group_geoms, craters_X_reprojected, craters_Y_reprojected, craters_X_geogr_reprojection, craters_Y_geogr_reprojection, ring_coordinate_transformations, geogr_reprojection_to_geogr = reproject_areas_and_craters(geom, geom_area_IDs, [crater_centroid[2] for crater_centroid in crater_features_list_part], [crater_centroid[3] for crater_centroid in crater_features_list_part], sr, geogr_sr, proj_to_geog)
 	
-	geogr_sr_reprojection_text = re.sub('(PRIMEM)(.*)(,)', r'\1["Reference_Meridian",' + str(projection_center_X) + '],', str(geogr_sr))
-	geogr_sr_reprojection = osr.SpatialReference(geogr_sr_reprojection_text)
-
-	sr_reprojection_text = 'PROJCS["MOLLWEIDE_REPROJECTION_EQ_AREA",'+str(geogr_sr_reprojection_text)+',PROJECTION["Mollweide"],PARAMETER["False_Easting",0.0],PARAMETER["False_Northing",0.0],PARAMETER["central_meridian",' + str(projection_center_X) + '],PARAMETER["latitude_of_origin",0.0],UNIT["Meter",1.0]]'
-	sr_reprojection = osr.SpatialReference(sr_reprojection_text)
+	#########################
+	#	OUTER / INNER RINGS	#
+	#########################
 	
-	""" define reprojections """
+	""" Generate lists of the reprojected outer and inner rings of all polygons in geom (all selected research areas) and spatial indexes of their segments.
+	They are used to find the closest point between reprojected crater centroids and polygons / inner rings. ring_polygons holds the polygon of every ring
+	(Area_ID in geom_area_IDs), ring_groups the group of areas with a common projection center. """
 	
-	geogr_to_geogr_reprojection = osr.CoordinateTransformation(geogr_sr, geogr_sr_reprojection)
-	geogr_to_proj_reprojection = osr.CoordinateTransformation(geogr_sr, sr_reprojection)
-	proj_reprojection_to_geogr_reprojection = osr.CoordinateTransformation(sr_reprojection, geogr_sr_reprojection)
-	geogr_reprojection_to_geogr = osr.CoordinateTransformation(geogr_sr_reprojection, geogr_sr)
-	geogr_reprojection_to_eq_area = osr.CoordinateTransformation(geogr_sr_reprojection, sr_reprojection)
-	eq_area_proj_to_proj = osr.CoordinateTransformation(sr_reprojection, sr)
-	geogr_reprojection_to_geogr = osr.CoordinateTransformation(geogr_sr_reprojection, geogr_sr)
-	geogr_reprojection_to_input_sr = osr.CoordinateTransformation(geogr_sr_reprojection, sr)
-	input_sr_to_geogr_reprojection = osr.CoordinateTransformation(sr, geogr_sr_reprojection)
-	input_sr_to_sr_reprojection = osr.CoordinateTransformation(sr, sr_reprojection)
-	geogr_reprojection_to_proj_reprojection = osr.CoordinateTransformation(geogr_sr_reprojection, sr_reprojection)
-	geogr_to_sr = osr.CoordinateTransformation(geogr_sr, sr)
+	rings_reprojected = []
+	ring_polygons = []
+	ring_groups = []
+	for group_count, group_geom in enumerate(group_geoms):
+		group_rings_reprojected, group_ring_polygons = get_polygon_rings(group_geom)
+		rings_reprojected.extend(group_rings_reprojected)
+		ring_polygons.extend([polygon_groups[group_count][ring_polygon] for ring_polygon in group_ring_polygons])
+		ring_groups.extend([group_count] * len(group_rings_reprojected))
+	ring_segment_indexes = [build_ring_segment_index(ring_vertices) for ring_vertices in rings_reprojected]
 	
-	""" Reproject input geometry """
+	""" Reject craters which are too far away from the research areas to be within range (lower bound of the geodesic distance to the bounding caps of the 
+	outer rings). Rejected craters are outside the research area. Pruning is skipped when connectors are generated as they are drawn for all craters outside. """
 	
-	geom.Transform(geogr_to_proj_reprojection)
-	geom.Transform(proj_reprojection_to_geogr_reprojection)
+	craters_rejected_mask = numpy.zeros(len(crater_features_list_part), dtype = bool)
+	if lower_bound_pruning == True and generate_connectors_crater_polygon == False and len(crater_features_list_part) > 0:
+		craters_search_factor = bufferfactor
+		if approach == "NSC":
+			craters_search_factor = bufferfactor_crater + 1
+		craters_search_range = numpy.array([crater_centroid[1] for crater_centroid in crater_features_list_part], dtype = float) / 2 * 1000 * craters_search_factor
+		craters_lower_bound = numpy.min([bounding_cap_distances(build_bounding_cap(ring_vertices, ring_coordinate_transformations[ring_groups[ring_count]], flattening), craters_X_geogr_reprojection[ring_groups[ring_count]], craters_Y_geogr_reprojection[ring_groups[ring_count]], flattening, major_axis) for ring_count, ring_vertices in enumerate(rings_reprojected) if ring_count == 0 or ring_polygons[ring_count] != ring_polygons[ring_count - 1]], axis = 0)
+		craters_rejected_mask = craters_lower_bound > craters_search_range
+		print "Lower bound pruning:", int(craters_rejected_mask.sum()), "/", len(crater_features_list_part), "craters rejected (" + str(round(float(craters_rejected_mask.sum()) / len(crater_features_list_part) * 100, 1)) + " %)"
 	
-	if sr.IsProjected():
-		geom.Transform(geogr_reprojection_to_proj_reprojection) 
-		geom.Transform(eq_area_proj_to_proj)
-
-	#################
-	#	OUTER RING	#
-	#################
+	""" Classify craters inside and outside the research areas at once (points_in_polygon). Distance > 0 would lead to craters with centroid exactly on 
+	polygon boundary to always be considered closer to the inner ring than the outer boundary. That's why a little extra distance is considered: the research 
+	areas are buffered by 0.001 for the classification. """
 	
-	""" Generate list of reprojected geometry outline. This one is used to find closest point to reprojected crater centroids. """
+	craters_inside_mask = numpy.zeros(len(crater_features_list_part), dtype = bool)
+	for group_count, group_geom in enumerate(group_geoms):
+		craters_inside_mask = craters_inside_mask | points_in_polygon(group_geom.Buffer(0.001), craters_X_reprojected[group_count], craters_Y_reprojected[group_count])
 	
-	vertices_list_reprojected = []
-	geom_reprojected = geom.GetGeometryRef(0)
-	no_of_polygon_vertices = geom_reprojected.GetPointCount()
-	for vertex in xrange(no_of_polygon_vertices):
-		current_vertex_X, current_vertex_Y, z = geom_reprojected.GetPoint(vertex)
-		vertices_list_reprojected.append([current_vertex_X, current_vertex_Y])
-	area_linestring = LineString(list(vertices_list_reprojected))
-	
-	#################
-	#	INNER RING	#
-	#################
-	
-	""" Generate lists of inner ring geometry lines. They are used to find the closest point between crater centroids and polygons / inner rings. """
-	
-	no_of_inner_rings = geom.GetGeometryCount() - 1
-	if no_of_inner_rings > 0:
-		inner_rings = dict()
-		for inner_polygon_count in range(no_of_inner_rings):
-			inner_polygon_count += 1
-			vertices_inner_rings = []
-			inner_rings[inner_polygon_count] = []
-			inner_ring = geom.GetGeometryRef(inner_polygon_count)
-			no_of_ring_vertices = inner_ring.GetPointCount()
-			for vertex in xrange(no_of_ring_vertices):
-				current_vertex_X, current_vertex_Y, z = inner_ring.GetPoint(vertex)
-				vertices_inner_rings.append([current_vertex_X, current_vertex_Y])
-			inner_linestring = LineString(list(vertices_inner_rings))
-			inner_rings[inner_polygon_count].append([inner_linestring])
-	
-	for crater_centroid in crater_features_list_part:
+	for crater_count, crater_centroid in enumerate(crater_features_list_part):
+		if craters_rejected_mask[crater_count] == True:
+			continue
 		
 		""" Create copy of crater centroid for later use. Distance between crater and area is added. If more than one reference area is investigated, 
 		distances would sum up otherwise. """
@@ -2125,151 +2624,26 @@ def get_craters_for_buffering_NSC_BNSC(approach, out_q, out_q_2, out_q_3, out_q_
 		(as closest point between crater centroid and area can later only be conducted using a line, not a polygon feature 
 		- difficult du destinguish between inside and outside craters) """
 		
-		""" crater_centroid_geometry and crater_centroid_geometry_2 are the same reprojected point geometries. crater_centroid_geometry is in 
-		Shapely, crater_centroid_geometry_2 in OGR format. Both libraries can apply their functions only to their own geometry format. """
-		
-		crater_centroid_geometry = Point(crater_centroid[2], crater_centroid[3])
-		crater_centroid_geometry_2 = ogr.CreateGeometryFromWkt(crater_centroid_geometry.wkt)
-		
-		""" Reproject craters. First to projected, then to geographic. This is mandatory as the generation of geographic coordinates from projected coordinates 
-		considers the pure distance from the central meridian. This avoids misinterpretations of nearest neighbors by (lon 175deg - lon -175deg) distances. 
-		Accordingly, dateline intersections will be considered during processing. """
-		
-		crater_centroid_geometry_2.Transform(geogr_to_proj_reprojection)
-		crater_centroid_geometry_2.Transform(proj_reprojection_to_geogr_reprojection)
-		
-		""" Reproject data back to original spatial reference when original spatial reference is projected. The interpolate function to 
-		identify the nearest point on the reference area identifies the coordinates with respect to its spatial reference. A straight line 
-		between two vertices looks different in every projection. In order to identify craters with respect to the polygon boundaries as they were 
-		digitized, this step needs to be conducted. """
-		
-		if sr.IsProjected():
-			crater_centroid_geometry_2.Transform(geogr_reprojection_to_proj_reprojection)
-			crater_centroid_geometry_2.Transform(eq_area_proj_to_proj)
-		
-		crater_centroid_geometry_reprojected = Point(crater_centroid_geometry_2.GetX(), crater_centroid_geometry_2.GetY())
-		
-		distance_crater_polygon = crater_centroid_geometry_2.Distance(geom)
 		crater_centroid_diameter_km = crater_centroid[1]
 		
 		""" Distinguish between craters inside and outside research area. """
 		
-		""" Investigate craters outside research area. Distance > 0 would lead to craters with centroid exactly on polygon boundary to always 
-		be considered closer to inner ring than outer boundary. That's why a little extra distance is considered (> 0.001). """
-
-		if distance_crater_polygon > 0.001:  
-			
-			#################
-			#	OUTER RING	#
-			#################
+		""" Investigate craters outside research area. The 2D distance between crater centroid and research area is only needed for the connectors 
+		(Dist2Dgeo). """
+		
+		if craters_inside_mask[crater_count] == False:
 			
-			intersect_point = area_linestring.interpolate(area_linestring.project(crater_centroid_geometry_reprojected)) 
 			craters_outside_area.append(crater_centroid)
-			 
-			""" Determine distance of intersecting point to crater using geographic coordinates - Vincenty needs them. """
-			 
-			intersect_point_2 = ogr.CreateGeometryFromWkt(intersect_point.wkt)
-			
-			if sr.IsProjected():
-				intersect_point_2.Transform(proj_to_geog)
-				
-				intersect_point_2.Transform(geogr_to_proj_reprojection)
-				intersect_point_2.Transform(proj_reprojection_to_geogr_reprojection)
-				
-				crater_centroid_geometry_2.Transform(proj_to_geog)
-				crater_centroid_geometry_2.Transform(geogr_to_proj_reprojection)
-				crater_centroid_geometry_2.Transform(proj_reprojection_to_geogr_reprojection)
-			
-				intersect_point = Point(intersect_point_2.GetX(),intersect_point_2.GetY())
-			
-			""" Calculate geodesic distance between crater centroid and intersection with research area. """
-			
-			lembda1 = crater_centroid_geometry_2.GetX() 
-			phi1 = crater_centroid_geometry_2.GetY() 
-			lembda2 = intersect_point.x
-			phi2 = intersect_point.y
-			
-			inverse_vincenty(flattening, major_axis, phi1, lembda1, phi2, lembda2)
-			geodesic_distance_crater_area = geodesic_distance_crater_area2
-			
-			#################
-			#	INNER RING	#
-			#################
-			
-			if no_of_inner_rings > 0:
-				
-				""" Copy values of distance to outer polygon boundary analysis to compare distances to inner ring. The shortest distance is used for the
-				CSFD measurement. """
-				
-				distance_value_closest = geodesic_distance_crater_area
-				intersect_point_closest = intersect_point
-				
-				for inner_polygon_count in range(no_of_inner_rings):
-					inner_polygon_count += 1
-					inner_ring = inner_rings[inner_polygon_count][0][0]
-					
-					intersect_point = inner_ring.interpolate(inner_ring.project(crater_centroid_geometry_reprojected))
-					intersect_point_2 = ogr.CreateGeometryFromWkt(intersect_point.wkt)
-					
-					if sr.IsProjected():
-						intersect_point_2.Transform(proj_to_geog)
-						intersect_point_2.Transform(geogr_to_proj_reprojection)
-						intersect_point_2.Transform(proj_reprojection_to_geogr_reprojection)
-						intersect_point = Point(intersect_point_2.GetX(),intersect_point_2.GetY())
-					
-					lembda2 = intersect_point.x
-					phi2 = intersect_point.y
-					
-					inverse_vincenty(flattening, major_axis, phi1, lembda1, phi2, lembda2)
-					
-					""" Save intersect point for geometry line generation and overwrite distance value if crater is closer to the inner ring than the outer ring. """
-					
-					if geodesic_distance_crater_area2 < distance_value_closest:
-						intersect_point_closest = intersect_point
-						distance_value_closest = geodesic_distance_crater_area2
-					
-				""" Get final intersect point and distance. """
-				
-				intersect_point = intersect_point_closest
-				geodesic_distance_crater_area = distance_value_closest
-			
-			crater_centroid_2.append(geodesic_distance_crater_area)
-			
-			""" Check if geodesic distance between crater centroid and area is smaller than / equal to craterradius * bufferfactor (BNSC) 
-			or craterradius * ( bufferfactor + bufferfactor_crater ) (NSC). If so, craters are considered relevant for buffered crater counting. 
-			bufferfactor_crater is considererd at a later stage for BNSC. During NSC, it is needed to buffer craters outside of the 
-			reference area and to erase parts of the area even though such craters are not included in the actual counting. """
-			
-			if approach == "NSC":
-				
-				if geodesic_distance_crater_area <= crater_centroid_diameter_km / 2 * 1000 * (bufferfactor_crater + 1):
-					craters_within_range.append(crater_centroid_2)
-			
-			if approach == "BNSC":
-				if geodesic_distance_crater_area <= crater_centroid_diameter_km / 2 * 1000 * (bufferfactor):
-					craters_within_range.append(crater_centroid_2)
-			
-			""" Append coordinates to craters within range list. """
+			craters_outside_area_count.append(crater_count)
+			craters_outside_area_2.append(crater_centroid_2)
 			
 			if generate_connectors_crater_polygon == True:
-				
-				""" Transform intersect_point to OGR format - which is intersect_point_2 - to reproject data back to original geographic coordinates. 
-				Transform intersect_point_2 back to Shapely format - which is intersect_point_orig_geogr. Transformation can only be done in OGR.  """
-				
-				intersect_point_2 = ogr.CreateGeometryFromWkt(intersect_point.wkt)
-				intersect_point_2.Transform(geogr_reprojection_to_geogr) 
-				intersect_point_orig_geogr = Point(intersect_point_2.GetX(), intersect_point_2.GetY())
-				
-				line_crater_polygon = LineString([Point(crater_centroid[2], crater_centroid[3]), intersect_point_orig_geogr])
-				line_crater_polygon_layer = ogr.CreateGeometryFromWkt(line_crater_polygon.wkt)
-				
-				ll_featureDefn = layer_line_crater_polygon.GetLayerDefn()
-				ll_feature = ogr.Feature(ll_featureDefn)
-				ll_feature.SetGeometry(line_crater_polygon_layer) 
-				ll_feature.SetField('Area', Area_ID)
-				ll_feature.SetField('Dist2Dgeo', distance_crater_polygon)
-				ll_feature.SetField('Dist3Dmet', geodesic_distance_crater_area)
-				layer_line_crater_polygon.CreateFeature(ll_feature)
+				distance_crater_polygon = float('inf')
+				for group_count, group_geom in enumerate(group_geoms):
+					crater_centroid_geometry_2 = ogr.Geometry(ogr.wkbPoint)
+					crater_centroid_geometry_2.AddPoint_2D(craters_X_reprojected[group_count, crater_count], craters_Y_reprojected[group_count, crater_count])
+					distance_crater_polygon = min(distance_crater_polygon, crater_centroid_geometry_2.Distance(group_geom))
+				craters_outside_area_distances_2D.append(distance_crater_polygon)
 			
 		else: # craters inside research area
 			
@@ -2278,6 +2652,66 @@ def get_craters_for_buffering_NSC_BNSC(approach, out_q, out_q_2, out_q_3, out_q_
 			crater_centroid_2.append(-1)
 			craters_inside_area.append(crater_centroid_2)
 	
+	""" Calculate geodesic distances between crater centroids and the outer ring and all inner rings of the research area for all craters outside the research 
+	area at once (candidate segments from the spatial indexes of ring segments). Closest points (intersections) are returned in geographic coordinates. 
+	Get final intersect point (closest ring) and distance for each crater. """
+	
+	if len(craters_outside_area_count) > 0:
+		geodesic_distances_rings = []
+		craters_outside_area_intersect_points = []
+		for ring_count, ring_segment_index in enumerate(ring_segment_indexes):
+			group_count = ring_groups[ring_count]
+			geodesic_distances_ring, intersect_points_ring = geodesic_nearest_points_on_ring(ring_segment_index, craters_X_reprojected[group_count, craters_outside_area_count], craters_Y_reprojected[group_count, craters_outside_area_count], craters_X_geogr_reprojection[group_count, craters_outside_area_count], craters_Y_geogr_reprojection[group_count, craters_outside_area_count], ring_coordinate_transformations[group_count], flattening, major_axis)
+			geodesic_distances_rings.append(geodesic_distances_ring)
+			craters_outside_area_intersect_points.append(intersect_points_ring)
+		
+		geodesic_distances_rings = numpy.column_stack(geodesic_distances_rings)
+		craters_outside_area_intersect_points = numpy.array(craters_outside_area_intersect_points).transpose(1, 0, 2)
+		closest_ring = numpy.argmin(geodesic_distances_rings, axis = 1)
+		geodesic_distances_crater_area = geodesic_distances_rings[numpy.arange(len(closest_ring)), closest_ring]
+	
+	for outside_crater_count, crater_centroid_2 in enumerate(craters_outside_area_2):
+		geodesic_distance_crater_area = geodesic_distances_crater_area[outside_crater_count]
+		crater_centroid_diameter_km = crater_centroid_2[1]
+		crater_centroid_2.append(geodesic_distance_crater_area)
+		
+		""" Check if geodesic distance between crater centroid and area is smaller than / equal to craterradius * bufferfactor (BNSC) 
+		or craterradius * ( bufferfactor + bufferfactor_crater ) (NSC). If so, craters are considered relevant for buffered crater counting. 
+		bufferfactor_crater is considererd at a later stage for BNSC. During NSC, it is needed to buffer craters outside of the 
+		reference area and to erase parts of the area even though such craters are not included in the actual counting. """
+		
+		if approach == "NSC":
+			
+			if geodesic_distance_crater_area <= crater_centroid_diameter_km / 2 * 1000 * (bufferfactor_crater + 1):
+				craters_within_range.append(crater_centroid_2)
+		
+		if approach == "BNSC":
+			if geodesic_distance_crater_area <= crater_centroid_diameter_km / 2 * 1000 * (bufferfactor):
+				craters_within_range.append(crater_centroid_2)
+		
+		""" Append coordinates to craters within range list. """
+		
+		if generate_connectors_crater_polygon == True:
+			
+			""" Transform intersect_point to OGR format - which is intersect_point_2 - to reproject data back to original geographic coordinates. 
+			Transform intersect_point_2 back to Shapely format - which is intersect_point_orig_geogr. Transformation can only be done in OGR.  """
+			
+			intersect_point = Point(craters_outside_area_intersect_points[outside_crater_count, closest_ring[outside_crater_count]])
+			intersect_point_2 = ogr.CreateGeometryFromWkt(intersect_point.wkt)
+			intersect_point_2.Transform(geogr_reprojection_to_geogr[ring_groups[closest_ring[outside_crater_count]]])
+			intersect_point_orig_geogr = Point(intersect_point_2.GetX(), intersect_point_2.GetY())
+			
+			line_crater_polygon = LineString([Point(crater_centroid_2[2], crater_centroid_2[3]), intersect_point_orig_geogr])
+			line_crater_polygon_layer = ogr.CreateGeometryFromWkt(line_crater_polygon.wkt)
+			
+			ll_featureDefn = layer_line_crater_polygon.GetLayerDefn()
+			ll_feature = ogr.Feature(ll_featureDefn)
+			ll_feature.SetGeometry(line_crater_polygon_layer) 
+			ll_feature.SetField('Area', geom_area_IDs[ring_polygons[closest_ring[outside_crater_count]]])
+			ll_feature.SetField('Dist2Dgeo', craters_outside_area_distances_2D[outside_crater_count])
+			ll_feature.SetField('Dist3Dmet', geodesic_distance_crater_area)
+			layer_line_crater_polygon.CreateFeature(ll_feature)
+	
 	""" Merge lists of craters within research area and craters within buffer range of research area. """
 	
 	craters_for_counting_list = craters_inside_area + craters_within_range
@@ -2294,62 +2728,71 @@ def get_craters_for_buffering_NSC_BNSC(approach, out_q, out_q_2, out_q_3, out_q_
 	craters_on_resurfaced_area = []
 	
 	""" For crater inside area: Determine width of buffered crater. We start with the largest and exclude smaller craters from the list as they are situated on a 
-	resurfaced area. """
+	resurfaced area. Only craters within the largest obliteration range of a crater (neighbor index of crater centroids) are candidates. Distances between 
+	a crater and all candidates are calculated in one call (geodesic_inverse). """
+	
+	other_craters = craters_for_counting_list[1:] # skip the first one because we don't need the distance between the same crater
+	other_craters_diameter = numpy.array([other_crater[1] for other_crater in other_craters], dtype = float)
+	other_craters_centroid_X = numpy.array([other_crater[2] for other_crater in other_craters], dtype = float)
+	other_craters_centroid_Y = numpy.array([other_crater[3] for other_crater in other_craters], dtype = float)
+	if len(other_craters) > 0:
+		other_craters_neighbor_index = build_crater_neighbor_index(other_craters_centroid_X, other_craters_centroid_Y, flattening)
 	
 	for crater in craters_for_counting_list:
+		if len(other_craters) == 0:
+			break
 		
 		crater_id = crater[0]
 		crater_diameter = crater[1]
 		crater_centroid_X = crater[2]
 		crater_centroid_Y = crater[3]
 		
+		""" Get other craters within the largest obliteration range (crater radius * bufferfactor_crater, BNSC ranges are smaller for each other crater). 
+		Check if crater diameter is smaller (only smaller crater can obliterate larger crater). """
+		
+		neighbor_craters_index = query_crater_neighbor_index(other_craters_neighbor_index, crater_centroid_X, crater_centroid_Y, (crater_diameter * 1000) / 2 * bufferfactor_crater, flattening, major_axis)
+		if len(neighbor_craters_index) == 0:
+			continue
+		
+		smaller_craters_index = neighbor_craters_index[other_craters_diameter[neighbor_craters_index] < crater_diameter]
+		if len(smaller_craters_index) == 0:
+			continue
+		
+		""" Check distance to buffered crater. """
+		
 		if approach == "NSC":
 			dist_buffer_meter = ((crater_diameter * 1000) / 2) + ((crater_diameter * 1000)/2 * (bufferfactor_crater - 1))
 		
-		""" For other craters in list (smaller craters, since we sorted the list before): check distance to buffered crater. """
+		if approach == "BNSC":
+			dist_buffer_meter = ((crater_diameter * 1000) / 2) + ((crater_diameter * 1000)/2 * (bufferfactor_crater - 1)) - ((other_craters_diameter[smaller_craters_index] * 1000)/2 * bufferfactor)
 		
-		for other_crater in craters_for_counting_list[1:]: # skip the first one because we don't need the distance between the same crater
-			
-			other_crater_diameter = other_crater[1]
-			other_crater_centroid_X = other_crater[2]
-			other_crater_centroid_Y = other_crater[3]
-			
-			if approach == "BNSC":
-				dist_buffer_meter = ((crater_diameter * 1000) / 2) + ((crater_diameter * 1000)/2 * (bufferfactor_crater - 1)) - ((other_crater_diameter * 1000)/2 * bufferfactor)
-			
-			""" Check if crater diameter is smaller (only smaller crater can obliterate larger crater). """
-			
-			if other_crater_diameter < crater_diameter:
-			
-				""" Get distance between crater and other crater. """
-				
-				inverse_vincenty(flattening, major_axis, crater_centroid_Y, crater_centroid_X, other_crater_centroid_Y, other_crater_centroid_X)
-				
-				""" Find craters obliterating larger crater. If geodesic distance between crater centroids is smaller than original crater diameter 
-				+ surrounding buffer of bufferfactor * crater radius, then other crater is obliterating the original crater. The craters are added to the 
-				craters_on_resurfaced_area list. """
-				
-				if geodesic_distance_crater_area2 < dist_buffer_meter:
-					#print "Crater", other_crater, "excluded since it obliterates", crater
-					craters_on_resurfaced_area.append(other_crater)
+		""" Get distance between crater and other craters. """
+		
+		geodesic_distances_craters = geodesic_inverse(flattening, major_axis, crater_centroid_Y, crater_centroid_X, other_craters_centroid_Y[smaller_craters_index], other_craters_centroid_X[smaller_craters_index])[0]
+		
+		""" Find craters obliterating larger crater. If geodesic distance between crater centroids is smaller than original crater diameter 
+		+ surrounding buffer of bufferfactor * crater radius, then other crater is obliterating the original crater. The craters are added to the 
+		craters_on_resurfaced_area list. """
+		
+		for other_crater_index in smaller_craters_index[geodesic_distances_craters < dist_buffer_meter]:
+			#print "Crater", other_craters[other_crater_index], "excluded since it obliterates", crater
+			craters_on_resurfaced_area.append(other_craters[other_crater_index])
 	
 	""" Eliminate duplicates in craters_on_resurfaced_area list (craters are on top of more than one ejecta blanket) and delete crater from 
 	craters_for_counting_list. Such craters are located on top of larger craters and will not be considered for CSFD analysis. """
 	
 	craters_on_resurfaced_area_clean = []
+	resurfaced_crater_ids = set()
 	for resurfaced_crater in craters_on_resurfaced_area:
-		
-		if resurfaced_crater in craters_for_counting_list:
-			craters_for_counting_list.remove(resurfaced_crater)
-		
-		if resurfaced_crater not in craters_on_resurfaced_area_clean:
-			
-			""" Inclute identifier 'obliterates' for obliterating crater. Used later to include obliterating craters in the buffering (ejecta blanket 
-			still affects reference area) but not in the CSFD measurement (crater is located on a resurfaced area). """
-			
-			resurfaced_crater.append("obliterates")
+		if resurfaced_crater[0] not in resurfaced_crater_ids:
+			resurfaced_crater_ids.add(resurfaced_crater[0])
 			craters_on_resurfaced_area_clean.append(resurfaced_crater)
-			
+	
+	craters_for_counting_list = [crater for crater in craters_for_counting_list if crater[0] not in resurfaced_crater_ids]
+	
+	""" Obliterating craters are included in the buffering (ejecta blanket still affects reference area) but not in the CSFD measurement (crater is located 
+	on a resurfaced area). They are added to the crater table with status crater_status_obliterates. """
+	
 	craters_excluded_from_list = craters_on_resurfaced_area_clean
 	
 	""" Pass list """
@@ -2426,7 +2869,347 @@ def get_area_size(union_polygon):
 	
 	Area_Size = union_polygon.GetArea()/1000000
 
-""" Buffer research areas for buffered crater counting (geodesic buffer). """ 
+""" Buffer research areas for buffered crater counting (geodesic buffer). """ 
+
+""" Adaptive densification (BCC and BNSC). Reference areas are segmentized before buffering. Buffer points are calculated for the vertices only and
+connected by straight lines (in geographic coordinates), so the buffered boundary between two vertices deviates from the buffer of the segment. The segment
+length follows from the buffer distance d, the body radius R (semi-major axis) and densification_chord_tolerance (meters), with phi the largest latitude
+of the reference area plus the buffer distance:
+- the chord between two buffer points deviates from the parallel curve at distance d (curvature tan(d / R) / R) by L^2 * tan(d / R) / (8 * R)
+  (L: segment length),
+- the longitude offset of a buffer point scales with 1 / cos(phi): a straight line between two buffer points deviates by about
+  d * dphi^2 * (1 + 2 * tan(phi)^2) / 8 (dphi: latitude difference of the segment),
+- the buffer point is perpendicular to the geodesic to the neighbor vertex, which turns by about dlambda * sin(phi) / 2 against a straight line in
+  geographic coordinates (dlambda: longitude difference), the buffer point deviates by about d * (dlambda * sin(phi) / 2)^2 / 2.
+Geographic reference areas are segmentized in degrees (the smallest of the three limits), projected reference areas in meters of the projected coordinate
+system (ground length of the limits). Segments are never shorter than the fixed segmentation used before adaptive densification (densification_min_segment
+in degrees, densification_min_segment_projected in meters) and at most densification_max_segment (degrees of a great circle) long. Small buffers therefore
+need fewer vertices while large buffers and polar areas keep the previous resolution.
+
+Round buffer joins use the angular step at which the chord of a circle with the buffer distance as radius deviates by densification_chord_tolerance from
+the arc (2 * acos(1 - tolerance / buffer distance)), between densification_min_join_step (the previous fixed step) and densification_max_join_step (deg).
+Join steps are rounded down to 90 / n degrees (but not below densification_min_join_step) so that craters of similar size share their buffer vertices.
+
+The reference area is segmentized once for the largest buffer distance of all craters (segmentize_reference_area), before BCC buffering is split into
+multi-core processes. """
+
+densification_chord_tolerance = 10.0
+densification_min_segment = 1.0
+densification_min_segment_projected = 10000.0
+densification_max_segment = 10.0
+densification_min_join_step = 8.0
+densification_max_join_step = 45.0
+
+def max_abs_latitude(geographic_geometry):
+	envelope = geographic_geometry.GetEnvelope()
+	return max(abs(envelope[2]), abs(envelope[3]))
+
+def adaptive_segment_length(buffer_distance, max_latitude, major_axis, projected):
+	chord_length = math.radians(densification_max_segment)
+	latitude_length = math.radians(densification_max_segment)
+	longitude_length = math.radians(densification_max_segment)
+	latitude = math.radians(min(max_latitude + math.degrees(buffer_distance / major_axis), 89.9))
+	
+	if buffer_distance > 0:
+		chord_length = min(math.sqrt(8 * densification_chord_tolerance / (major_axis * math.tan(min(buffer_distance / major_axis, math.pi / 4)))), chord_length)
+		latitude_length = min(math.sqrt(8 * densification_chord_tolerance / (buffer_distance * (1 + 2 * math.tan(latitude) ** 2))), latitude_length)
+		if math.sin(latitude) > 0:
+			longitude_length = min(2 * math.sqrt(2 * densification_chord_tolerance / buffer_distance) / math.sin(latitude), longitude_length)
+	
+	if projected == True:
+		return max(major_axis * min(chord_length, latitude_length, longitude_length * math.cos(latitude)), densification_min_segment_projected)
+	return max(math.degrees(min(chord_length, latitude_length, longitude_length)), densification_min_segment)
+
+def adaptive_join_step(buffer_distance):
+	if buffer_distance <= densification_chord_tolerance / 2:
+		join_step = densification_max_join_step
+	else:
+		join_step = math.degrees(2 * math.acos(1 - densification_chord_tolerance / buffer_distance))
+	join_step = min(max(join_step, densification_min_join_step), densification_max_join_step)
+	return max(90.0 / math.ceil(90.0 / join_step), densification_min_join_step)
+
+""" Segmentize the reference area (union_polygon, in place) for the buffer distance (adaptive_segment_length). Projected reference areas are segmentized
+in the projected coordinate system. union_polygon may already be geographic although the spatial reference is projected (see buffer_area). """
+
+def segmentize_reference_area(union_polygon, sr, buffer_distance, major_axis):
+	union_polygon_sr = union_polygon.GetSpatialReference()
+	union_polygon_projected = sr.IsProjected() and (not union_polygon_sr or union_polygon_sr.IsProjected())
+	
+	union_polygon_geographic = union_polygon.Clone()
+	if union_polygon_projected == True:
+		union_polygon_geographic.Transform(osr.CoordinateTransformation(sr, sr.CloneGeogCS()))
+	union_polygon.Segmentize(adaptive_segment_length(buffer_distance, max_abs_latitude(union_polygon_geographic), major_axis, union_polygon_projected))
+
+""" Coordinates of the ring vertices (array) and indices of their neighbors (BCC and BNSC). Check if polygon is closed (first and last vertex share 
+same coordinates). If so, neighbors of the first and the last vertex are the second and the second to last vertex. """
+
+def ring_vertices_and_neighbors(linear_ring):
+	ring_vertices = numpy.array(linear_ring.GetPoints(), dtype = float)[:, :2]
+	no_of_polygon_vertices = len(ring_vertices)
+	previous_vertex_index = numpy.arange(no_of_polygon_vertices) - 1
+	next_vertex_index = numpy.arange(no_of_polygon_vertices) + 1
+	
+	if (ring_vertices[0] == ring_vertices[-1]).all():
+		previous_vertex_index[0] = no_of_polygon_vertices - 2
+		next_vertex_index[-1] = 1
+	else:
+		previous_vertex_index[0] = no_of_polygon_vertices - 1
+		next_vertex_index[-1] = 0
+	
+	return ring_vertices, previous_vertex_index, next_vertex_index
+
+""" Buffer points of a ring (BCC and BNSC), all vertices at once. For every vertex: the buffer point perpendicular to the previous segment 
+(angle_prev - 90), points of the round join between angle_prev - 90 and angle_next - 90 (join_step degrees apart, outside the original polygon) and the 
+buffer point perpendicular to the next segment (angle_next - 90). Joins of scissor intersections (angle difference of more than 180 deg) wrap around 
+360 deg and consist of two angle ranges. The buffer polygon is closed with the first vertex. Returns an (n, 5) array - rows: vertex X, vertex Y, angle of 
+the buffer point, angle_prev, angle_next. """
+
+def ring_buffer_vertices_angles(ring_vertices, angles_prev, angles_next, join_step):
+	
+	""" Ensure that angles remain within 0-360 deg range and that buffer points are perpendicular to reference area. """
+	
+	angles_prev = numpy.asarray(angles_prev, dtype = float)
+	angles_next = numpy.asarray(angles_next, dtype = float)
+	angles_prev = numpy.where(angles_prev < 0, angles_prev + 360, angles_prev)
+	angles_next = numpy.where(angles_next < 0, angles_next + 360, angles_next)
+	angles_prev_BP = angles_prev - 90
+	angles_next_BP = angles_next - 90
+	angles_prev_BP = numpy.where(angles_prev_BP < 0, angles_prev_BP + 360, angles_prev_BP)
+	angles_next_BP = numpy.where(angles_next_BP < 0, angles_next_BP + 360, angles_next_BP)
+	
+	""" Join angle ranges (first range and the range starting at 0 deg for scissor intersections). """
+	
+	angle_difference = angles_next_BP - angles_prev_BP
+	join_cases = [(angle_difference > 0) & (angle_difference <= 180), angle_difference > 180, (angle_difference < 0) & (angle_difference > -180), angle_difference <= -180]
+	first_range_start = numpy.select(join_cases, [angles_prev_BP, angles_next_BP, angles_next_BP, angles_prev_BP], 0.0)
+	first_range_stop = numpy.select(join_cases, [angles_next_BP, 360.0, angles_prev_BP, 360.0], 0.0)
+	second_range_stop = numpy.select(join_cases[1::2], [angles_prev_BP, angles_next_BP], 0.0)
+	
+	first_range_count = numpy.maximum(numpy.ceil((first_range_stop - first_range_start) / join_step), 0).astype(int)
+	second_range_count = numpy.maximum(numpy.ceil(second_range_stop / join_step), 0).astype(int)
+	
+	""" Row position of every buffer point within the rows of its vertex. """
+	
+	vertex_row_count = first_range_count + second_range_count + 2
+	vertex_row_end = numpy.cumsum(vertex_row_count)
+	row_vertex = numpy.repeat(numpy.arange(len(ring_vertices)), vertex_row_count)
+	row_position = numpy.arange(len(row_vertex)) - (vertex_row_end - vertex_row_count)[row_vertex]
+	row_first_count = first_range_count[row_vertex]
+	
+	row_angles = numpy.where(row_position <= row_first_count, first_range_start[row_vertex] + (row_position - 1) * join_step, (row_position - 1 - row_first_count) * join_step)
+	row_angles[row_position == 0] = angles_prev_BP[row_vertex[row_position == 0]]
+	row_angles[row_position == vertex_row_count[row_vertex] - 1] = angles_next_BP
+	
+	vertices_angle_list = numpy.empty((len(row_vertex) + 1, 5), dtype = float)
+	vertices_angle_list[:-1, :2] = ring_vertices[row_vertex]
+	vertices_angle_list[:-1, 2] = row_angles
+	vertices_angle_list[:-1, 3] = angles_prev[row_vertex]
+	vertices_angle_list[:-1, 4] = angles_next[row_vertex]
+	
+	""" Close polygon using the first vertex. """
+	
+	vertices_angle_list[-1] = vertices_angle_list[0]
+	
+	return vertices_angle_list
+
+""" Buffer points and the terms of the forward geodesic problem (which do not depend on the buffer distance) of all rings for one join step. ring_azimuths 
+holds the vertices and azimuths of every ring. """
+
+def build_ring_direct_terms(ring_azimuths, join_step, flattening, major_axis):
+	vertices_angle_list = dict()
+	vertices_direct_terms = dict()
+	for geometry_dict_count in ring_azimuths:
+		ring_vertices, angles_prev, angles_next = ring_azimuths[geometry_dict_count]
+		vertices_angle_list[geometry_dict_count] = ring_buffer_vertices_angles(ring_vertices, angles_prev, angles_next, join_step)
+		vertices_direct_terms[geometry_dict_count] = geodesic_direct_terms(flattening, major_axis, vertices_angle_list[geometry_dict_count][:, 0], vertices_angle_list[geometry_dict_count][:, 1], vertices_angle_list[geometry_dict_count][:, 2])
+	return vertices_angle_list, vertices_direct_terms
+
+""" Buffer assembly (BCC and BNSC). The buffer of every ring is cleaned with a planar buffer of zero distance to eliminate unwanted holes due to 
+self-intersections on the outer boundary. Errors may occur during Buffer(0) so that two polygons are formed from one polygon due to severe self-intersections. 
+This would lead to an invalid geometry. To prevent this, all parts of the geometry are buffered (0) again. clean_ring_buffer returns the cleaned parts and 
+whether severe self-intersections could not be resolved. The cleaned parts of all rings are merged with a single cascaded union (union_ring_buffers). """
+
+def clean_ring_buffer(splitted_buffered_polygon):
+	splitted_buffered_polygon = splitted_buffered_polygon.Buffer(0)
+	if splitted_buffered_polygon.IsValid() == True:
+		return [splitted_buffered_polygon], False
+	
+	ring_buffer_parts = []
+	self_intersection = False
+	for linear_ring_splitted_buffered_polygon in splitted_buffered_polygon:
+		
+		""" Add linear_ring_splitted_buffered_polygon to new polygon. """
+		
+		polygon_part_splitted_buffered_polygon = ogr.Geometry(ogr.wkbPolygon)
+		polygon_part_splitted_buffered_polygon.AddGeometry(linear_ring_splitted_buffered_polygon)
+		polygon_part_splitted_buffered_polygon = polygon_part_splitted_buffered_polygon.Buffer(0)
+		
+		if polygon_part_splitted_buffered_polygon.IsValid() == False:
+			self_intersection = True
+		ring_buffer_parts.append(polygon_part_splitted_buffered_polygon)
+	
+	return ring_buffer_parts, self_intersection
+
+def union_ring_buffers(ring_buffers):
+	ring_buffers_geometry = ogr.Geometry(ogr.wkbMultiPolygon)
+	for ring_buffer in ring_buffers:
+		if ring_buffer.IsEmpty() == False:
+			add_polygons_to_multipolygon(ring_buffers_geometry, ring_buffer)
+	
+	if ring_buffers_geometry.GetGeometryCount() == 0:
+		return ogr.Geometry(ogr.wkbPolygon)
+	if ring_buffers_geometry.GetGeometryCount() == 1:
+		return ring_buffers_geometry.GetGeometryRef(0).Clone()
+	return ring_buffers_geometry.UnionCascaded()
+
+""" Buffer the reference area (all rings, BCC) by buffer_distance using the precalculated terms of the forward geodesic problem of every ring. Returns the 
+union of the buffered rings (in the reprojected geographic coordinate system), the buffer point coordinates of every ring and whether severe self-intersections 
+could not be resolved. """
+
+def buffer_union_polygon(flattening, major_axis, vertices_direct_terms, buffer_distance):
+	ring_buffers = []
+	buffer_vertices = []
+	self_intersection = False
+	
+	for geometry_dict_count in range(len(vertices_direct_terms)):
+		
+		""" Calculate coordinates of buffer points and create polygon geometry from buffer points. """
+		
+		buffer_vertices_X, buffer_vertices_Y = geodesic_direct_from_terms(flattening, major_axis, vertices_direct_terms[geometry_dict_count], buffer_distance)
+		buffer_vertices.append([buffer_vertices_X, buffer_vertices_Y])
+		splitted_buffered_polygon = polygon_from_coordinate_arrays(buffer_vertices_X, buffer_vertices_Y)
+		
+		""" Eliminate unwanted holes due to self-intersections (see clean_ring_buffer). """
+		
+		ring_buffer_parts, ring_self_intersection = clean_ring_buffer(splitted_buffered_polygon)
+		ring_buffers.extend(ring_buffer_parts)
+		if ring_self_intersection == True:
+			self_intersection = True
+	
+	""" Merge buffered rings with one cascaded union. """
+	
+	BCC_union_polygon = union_ring_buffers(ring_buffers)
+	
+	return BCC_union_polygon, buffer_vertices, self_intersection
+
+""" Area-versus-distance curve of a buffered reference area (BCC without shapefile output). The buffered area changes smoothly with the buffer distance 
+between topological events (e.g. closing holes, merging buffers of separated parts). The curve is sampled at the smallest and largest buffer distance and 
+intervals are bisected until the area at the midpoint of an interval is predicted by linear interpolation within relative_error - intervals around kinks 
+are refined further. Only intervals containing buffer distances of craters are refined, an interval with a single crater distance is sampled at that 
+distance. Areas (sq km) of all buffer distances are interpolated from the samples. area_transformations transform the buffered polygon to an equal 
+area projection. Returns areas, number of buffer constructions and whether severe self-intersections occurred. """
+
+buffer_area_curve_mode = False
+buffer_area_curve_relative_error = 0.001
+
+def buffer_area_curve(flattening, major_axis, vertices_direct_terms, area_transformations, buffer_distances, relative_error):
+	buffer_distances = numpy.asarray(buffer_distances, dtype = float)
+	crater_distances = numpy.unique(buffer_distances)
+	sampled_areas = dict()
+	self_intersection = False
+	
+	distance_min = crater_distances[0]
+	distance_max = crater_distances[-1]
+	intervals = [[distance_min, distance_max]]
+	sample_distances = [distance_min, distance_max]
+	
+	while len(sample_distances) > 0 or len(intervals) > 0:
+		
+		""" Calculate buffered areas of new sample distances. """
+		
+		for buffer_distance in sample_distances:
+			if buffer_distance not in sampled_areas:
+				BCC_union_polygon, buffer_vertices, polygon_self_intersection = buffer_union_polygon(flattening, major_axis, vertices_direct_terms, buffer_distance)
+				for area_transformation in area_transformations:
+					BCC_union_polygon.Transform(area_transformation)
+				sampled_areas[buffer_distance] = BCC_union_polygon.GetArea()/1000000
+				self_intersection = self_intersection or polygon_self_intersection
+		sample_distances = []
+		
+		""" Check intervals: compare the sampled area at the midpoint with the linear interpolation between the interval limits. """
+		
+		next_intervals = []
+		for distance_0, distance_1 in intervals:
+			interior_distances = crater_distances[(crater_distances > distance_0) & (crater_distances < distance_1)]
+			
+			if len(interior_distances) == 0:
+				continue
+			
+			if len(interior_distances) == 1:
+				sample_distances.append(interior_distances[0])
+				continue
+			
+			distance_mid = (distance_0 + distance_1) / 2.0
+			if distance_mid not in sampled_areas:
+				sample_distances.append(distance_mid)
+				next_intervals.append([distance_0, distance_1])
+				continue
+			
+			area_interpolated = (sampled_areas[distance_0] + sampled_areas[distance_1]) / 2.0
+			if abs(sampled_areas[distance_mid] - area_interpolated) > relative_error * abs(sampled_areas[distance_mid]):
+				next_intervals.append([distance_0, distance_mid])
+				next_intervals.append([distance_mid, distance_1])
+		
+		intervals = next_intervals
+	
+	curve_distances = numpy.array(sorted(sampled_areas))
+	curve_areas = numpy.array([sampled_areas[buffer_distance] for buffer_distance in curve_distances])
+	
+	return numpy.interp(buffer_distances, curve_distances, curve_areas), len(sampled_areas), self_intersection
+
+""" Buffered reference areas (BCC) are cached by buffer distance: craters with the same diameter reuse the buffered polygon and its area. Buffer distances 
+are quantized to multiples of buffer_cache_tolerance (meters, 0 = exact distances only). The cache holds at most buffer_cache_size polygons per process - the 
+least recently used polygon is removed first. """
+
+buffer_cache_size = 64
+buffer_cache_tolerance = 0.0
+
+def buffer_cache_distance(buffer_distance):
+	if buffer_cache_tolerance > 0:
+		return round(buffer_distance / buffer_cache_tolerance) * buffer_cache_tolerance
+	return buffer_distance
+
+def buffer_cache_get(buffer_cache, buffer_distance):
+	if buffer_distance not in buffer_cache:
+		return None
+	cached_buffer = buffer_cache.pop(buffer_distance)
+	buffer_cache[buffer_distance] = cached_buffer
+	return cached_buffer
+
+def buffer_cache_put(buffer_cache, buffer_distance, cached_buffer):
+	buffer_cache[buffer_distance] = cached_buffer
+	while len(buffer_cache) > buffer_cache_size:
+		buffer_cache.popitem(last = False)
+
+""" Hybrid buffer engine (BCC). For small buffer distances, the geodesic buffer of the reference area matches a planar buffer in a local azimuthal 
+equidistant projection centered on the reference area. Distances from the projection center are true; perpendicular to them, the scale is x / sin(x) on a 
+sphere (x: angular distance from the center). The planar buffer distance therefore deviates from the geodesic buffer distance by at most 
+buffer_distance * (x / sin(x) - 1), with x the angular distance of the farthest buffer point (area radius + buffer distance, on a sphere with the semi-minor 
+axis). buffer_distance * flattening * x^2 is added as an estimate (not a strict bound) for the ellipsoidal projection. Between two vertices of the 
+segmentized reference area, the edges of the planar buffer are straight in the local projection while the geodesic buffer follows edges which are straight 
+in geographic coordinates. They deviate by up to densification_chord_tolerance (see adaptive_segment_length), which is added to the error. The planar 
+buffer is used if this error is smaller than planar_buffer_tolerance (meters, it has to be larger than densification_chord_tolerance) and the buffer does 
+not reach a pole; otherwise the geodesic buffer is calculated. Round joins of the planar buffer use the join step of the geodesic buffer 
+(adaptive_join_step, 90 / join step segments per quarter circle). The engine used for every crater is written to the logfile. The geodesic buffer is 
+always used when buffer points are written to the point file. As the planar buffer changes the buffered areas (within planar_buffer_tolerance), the hybrid 
+buffer engine is off by default. """
+
+hybrid_buffer_engine = False
+planar_buffer_tolerance = 15.0
+
+def planar_buffer_distortion_error(area_radius, center_latitude, buffer_distance, flattening, major_axis):
+	minor_axis = major_axis * (1 - flattening)
+	x = (area_radius + buffer_distance) / minor_axis
+	if x == 0:
+		return 0.0
+	if x >= math.pi / 2 or abs(center_latitude) + math.degrees(x) >= 90:
+		return float('inf')
+	return buffer_distance * (x / math.sin(x) - 1 + flattening * x ** 2) + densification_chord_tolerance
+
+def planar_buffer_union_polygon(local_aeqd_union_polygon, local_aeqd_to_geogr_reprojection, buffer_distance):
+	BCC_union_polygon = local_aeqd_union_polygon.Buffer(buffer_distance, int(round(90.0 / adaptive_join_step(buffer_distance))))
+	BCC_union_polygon.Transform(local_aeqd_to_geogr_reprojection)
+	return BCC_union_polygon
 
 def buffer_area(self, union_polygon, crater_area_list, all_craters, sr_wkt, generate_point_file, generate_polygon_file, generate_connectors_crater_polygon, flattening, major_axis, bufferfactor, crater_area_out_q, Area_IDs, multicore_operation, path_to_outfile, process_count, lock, layer_polygon, write_logfile, logfile, multicore_log_out_q, status_out_q):
 
@@ -2475,28 +3258,28 @@ def buffer_area(self, union_polygon, crater_area_list, all_craters, sr_wkt, gene
 		
 		Also, a geographic and a projected reference system from the input spatial reference is defined. """
 		
-		if sr.IsProjected():
-			union_polygon.Segmentize(10000)
-		if sr.IsGeographic():
-			union_polygon.Segmentize(1)
-		
 		if sr.IsProjected():
 			geogr_sr = sr.CloneGeogCS()
 			sr_text = 'PROJCS["PROJECTED_LAMBERT_AEA",'+str(geogr_sr)+',PROJECTION["Lambert_Azimuthal_Equal_Area"],PARAMETER["False_Easting",0.0],PARAMETER["False_Northing",0.0],PARAMETER["central_meridian",0.0],PARAMETER["latitude_of_origin",0.0],UNIT["Meter",1.0]]'
 			proj_to_geog = osr.CoordinateTransformation(sr, geogr_sr)
 			geog_to_proj = osr.CoordinateTransformation(geogr_sr, sr)
-			union_polygon_sr = union_polygon.GetSpatialReference()
-			if union_polygon_sr:
-				if union_polygon_sr.IsProjected():
-					union_polygon.Transform(proj_to_geog)
-			if not union_polygon_sr:
-				union_polygon.Transform(proj_to_geog)
 		if sr.IsGeographic():
 			geogr_sr = sr
 			proj_to_geog = osr.CoordinateTransformation(sr, geogr_sr)
 			geog_to_proj = osr.CoordinateTransformation(geogr_sr, sr)
 			sr_text = 'PROJCS["PROJECTED_LAMBERT_AEA",'+str(geogr_sr)+',PROJECTION["Lambert_Azimuthal_Equal_Area"],PARAMETER["False_Easting",0.0],PARAMETER["False_Northing",0.0],PARAMETER["central_meridian",0.0],PARAMETER["latitude_of_origin",0.0],UNIT["Meter",1.0]]'
 		
+		""" The reference area was segmentized for the largest buffer distance of all craters before buffering (segmentize_reference_area). Projected
+		reference areas are transformed to geographic coordinates. """
+		
+		max_buffer_distance = 0
+		if len(all_craters) > 0:
+			max_buffer_distance = float(all_craters['diameter'].max()) * 1000 / 2 * bufferfactor
+		
+		union_polygon_sr = union_polygon.GetSpatialReference()
+		if sr.IsProjected() and (not union_polygon_sr or union_polygon_sr.IsProjected()):
+			union_polygon.Transform(proj_to_geog)
+		
 		""" Get center of research area to define projection center  """
 		
 		union_polygon_centroid = union_polygon.Centroid()
@@ -2567,7 +3350,7 @@ def buffer_area(self, union_polygon, crater_area_list, all_craters, sr_wkt, gene
 		
 		counter = 0
 		linear_ring_count = 0
-		vertices_angle_list = dict()
+		ring_azimuths = dict()
 		
 		for area in union_polygon:
 			
@@ -2646,7 +3429,6 @@ def buffer_area(self, union_polygon, crater_area_list, all_craters, sr_wkt, gene
 			Holes are not present anymore. """
 			
 			for linear_ring in area_polygon:
-				vertices_angle_list[linear_ring_count] = []
 				
 				""" area_polygon is MULTIPOLYGON when polygon with holes (splitted polygon) is present. area_polygon is LINEARRING when no holes 
 				are present (no splitted polygon). Using GetGeometryRef(0) we get the linear ring from the polygon when splitting was conducted. """
@@ -2656,125 +3438,19 @@ def buffer_area(self, union_polygon, crater_area_list, all_craters, sr_wkt, gene
 				else:
 					linear_ring = linear_ring.GetGeometryRef(0)
 				
-				no_of_polygon_vertices = linear_ring.GetPointCount()
+				""" Get coordinates of the ring vertices (array) and indices of their neighbors (see ring_vertices_and_neighbors). """
 				
-				""" Get Buffer Points for outer polygon boundary. """
-		
-				for vertex in xrange(no_of_polygon_vertices):
-					current_vertex_X, current_vertex_Y, z = linear_ring.GetPoint(vertex)
-					
-					""" Check if polygon is closed (first and last vertex share same coordinates). If not, change neighboring vertices accordingly. """
-					
-					if linear_ring.GetPoint(0) == linear_ring.GetPoint(no_of_polygon_vertices - 1):
-						if vertex == 0:
-							vertex_position = "first"
-							previous_vertex_X, previous_vertex_Y, z = linear_ring.GetPoint(no_of_polygon_vertices - 2)
-							next_vertex_X, next_vertex_Y, z = linear_ring.GetPoint(vertex + 1)
-						if vertex == no_of_polygon_vertices - 1:
-							vertex_position = "last"
-							previous_vertex_X, previous_vertex_Y, z = linear_ring.GetPoint(vertex - 1)
-							next_vertex_X, next_vertex_Y, z = linear_ring.GetPoint(1)
-						if vertex > 0 and vertex < no_of_polygon_vertices - 1:
-							vertex_position = "middle" 
-							previous_vertex_X, previous_vertex_Y, z = linear_ring.GetPoint(vertex - 1)
-							next_vertex_X, next_vertex_Y, z = linear_ring.GetPoint(vertex + 1)
-					else:
-						if vertex == 0:
-							vertex_position = "first"
-							previous_vertex_X, previous_vertex_Y, z = linear_ring.GetPoint(no_of_polygon_vertices - 1)
-							next_vertex_X, next_vertex_Y, z = linear_ring.GetPoint(vertex + 1)
-						if vertex == no_of_polygon_vertices - 1:
-							vertex_position = "last"
-							previous_vertex_X, previous_vertex_Y, z = linear_ring.GetPoint(vertex - 1)
-							next_vertex_X, next_vertex_Y, z = linear_ring.GetPoint(0)
-						if vertex > 0 and vertex < no_of_polygon_vertices - 1:
-							vertex_position = "middle" 
-							previous_vertex_X, previous_vertex_Y, z = linear_ring.GetPoint(vertex - 1)
-							next_vertex_X, next_vertex_Y, z = linear_ring.GetPoint(vertex + 1)
-					
-					""" Calculate angle between previous vertex - current vertex and current vertex - next vertex from vincenty's inverse formula 
-					(calculation on a spheroid). """
-					
-					inverse_vincenty(flattening, major_axis, previous_vertex_Y, previous_vertex_X, current_vertex_Y, current_vertex_X )
-					angle_prev = direction12
-					
-					inverse_vincenty(flattening, major_axis, current_vertex_Y, current_vertex_X, next_vertex_Y, next_vertex_X )
-					angle_next = direction12
-					
-					""" Ensure that angles remain within 0-360 deg range. """
-					
-					if angle_prev < 0:
-						angle_prev = angle_prev + 360
-					if angle_next < 0:
-						angle_next = angle_next + 360
-					
-					angle_prev_BP = angle_prev - 90 
-					angle_next_BP = angle_next - 90 
-					
-					""" Ensure that buffer points are perpendicular to reference area and remain within 0-360 deg range. """
-					
-					if angle_prev_BP < 0:
-						angle_prev_BP = angle_prev_BP + 360  
-					if angle_next_BP < 0:
-						angle_next_BP = angle_next_BP + 360 
-					
-					""" Add to list in which coordinates and angles for buffer vertices calculation are stored. """
-					
-					vertices_angle_list[linear_ring_count].append([current_vertex_X, current_vertex_Y, angle_prev_BP, angle_prev, angle_next])
-					
-					""" Remember coordinates of the buffer polygon's first vertex - used later to close polygon. """
-					
-					if vertex == 0:
-						X_0 = current_vertex_X
-						Y_0 = current_vertex_Y
-						angle_0 = angle_prev_BP
-						angle_prev_0 = angle_prev
-						angle_next_0 = angle_next
-					
-					""" Calculate buffer points between angle_prev-90 and angle_next-90 (used for round buffer edges). """
-					
-					if angle_next_BP > angle_prev_BP:
-						if (angle_next_BP) - (angle_prev_BP) <= 180:
-							
-							""" Angles between previous and next buffer point - generate buffer points which are outside the original polygon. """
-							
-							angles = numpy.arange(angle_prev_BP, angle_next_BP, 8)
-							for angle in angles:
-								vertices_angle_list[linear_ring_count].append([current_vertex_X, current_vertex_Y, angle, angle_prev, angle_next])
-						if (angle_next_BP) - (angle_prev_BP) > 180:
-							
-							""" Scissor intersection: angles between next buffer point and 360 degrees and between 0 degrees and previous buffer point - generate buffer points which are outside the original polygon. """
-							
-							angles = numpy.arange(angle_next_BP, 360, 8)
-							for angle in angles:
-								vertices_angle_list[linear_ring_count].append([current_vertex_X, current_vertex_Y, angle, angle_prev, angle_next])
-							angles = numpy.arange(0, angle_prev_BP, 8)
-							for angle in angles:
-								vertices_angle_list[linear_ring_count].append([current_vertex_X, current_vertex_Y, angle, angle_prev, angle_next])
-					
-					if angle_next_BP < angle_prev_BP:
-						if angle_next_BP - angle_prev_BP > -180:
-							
-							""" Angles between next and previous buffer point - generate buffer points which are outside the original polygon. """
-							
-							angles = numpy.arange(angle_next_BP, angle_prev_BP, 8)
-							for angle in angles:
-								vertices_angle_list[linear_ring_count].append([current_vertex_X, current_vertex_Y, angle, angle_prev, angle_next])
-						if angle_next_BP - angle_prev_BP <= -180:
-							
-							""" Scissor intersection - angles between previous buffer point and 360 degrees and between 0 degrees and next buffer point - generate buffer points which are outside the original polygon. """
-							
-							angles = numpy.arange(angle_prev_BP, 360, 8)
-							for angle in angles:
-								vertices_angle_list[linear_ring_count].append([current_vertex_X, current_vertex_Y, angle, angle_prev, angle_next])
-							angles = numpy.arange(0, angle_next_BP, 8)
-							for angle in angles:
-								vertices_angle_list[linear_ring_count].append([current_vertex_X, current_vertex_Y, angle, angle_prev, angle_next])
-					vertices_angle_list[linear_ring_count].append([current_vertex_X, current_vertex_Y, angle_next_BP, angle_prev, angle_next])
-					
-				""" Close polygon using the first vertex. """
+				ring_vertices, previous_vertex_index, next_vertex_index = ring_vertices_and_neighbors(linear_ring)
+				
+				""" Calculate angles between previous vertex - current vertex and current vertex - next vertex from vincenty's inverse formula 
+				(calculation on a spheroid) for all vertices of the ring at once. """
 				
-				vertices_angle_list[linear_ring_count].append([X_0, Y_0, angle_0, angle_prev_0, angle_next_0])
+				distances_prev, angles_prev, back_angles_prev = geodesic_inverse(flattening, major_axis, ring_vertices[previous_vertex_index, 1], ring_vertices[previous_vertex_index, 0], ring_vertices[:, 1], ring_vertices[:, 0])
+				distances_next, angles_next, back_angles_next = geodesic_inverse(flattening, major_axis, ring_vertices[:, 1], ring_vertices[:, 0], ring_vertices[next_vertex_index, 1], ring_vertices[next_vertex_index, 0])
+				
+				""" Buffer points (round joins) are generated per join step (see ring_buffer_vertices_angles). """
+				
+				ring_azimuths[linear_ring_count] = (ring_vertices, angles_prev, angles_next)
 				
 				linear_ring_count += 1
 			
@@ -2785,6 +3461,12 @@ def buffer_area(self, union_polygon, crater_area_list, all_craters, sr_wkt, gene
 			
 			if len(Area_IDs) == 1 and number_of_holes >= 1:
 				break
+		
+		""" Buffer points of all rings as arrays (one per linear ring) - all buffer points of a ring are calculated in one call. The terms of the forward 
+		geodesic problem which do not depend on the buffer distance are calculated once per join step (adaptive_join_step) and used for all craters with 
+		that join step. """
+		
+		ring_direct_terms = dict()
 			
 		#################################
 		#	Step 3: BUFFER POLYGON		#
@@ -2792,8 +3474,55 @@ def buffer_area(self, union_polygon, crater_area_list, all_craters, sr_wkt, gene
 		
 		""" Iterate crater features """
 		
+		buffer_cache = OrderedDict()
+		buffer_cache_hits = 0
+		buffer_cache_misses = 0
+		
+		""" Hybrid buffer engine: reference area in a local azimuthal equidistant projection centered on the reference area (the reprojected geographic 
+		coordinate system is centered on longitude 0) and the radius of the reference area (envelope) around the projection center. """
+		
+		use_planar_buffer_engine = hybrid_buffer_engine == True and generate_point_file == False
+		buffer_engine_counts = {"planar": 0, "geodesic": 0}
+		
+		if use_planar_buffer_engine == True:
+			sr_local_aeqd = osr.SpatialReference()
+			sr_local_aeqd.CopyGeogCSFrom(geogr_sr_reprojection)
+			sr_local_aeqd.SetAE(projection_center_Y, 0, 0, 0)
+			geogr_reprojection_to_local_aeqd = osr.CoordinateTransformation(geogr_sr_reprojection, sr_local_aeqd)
+			local_aeqd_to_geogr_reprojection = osr.CoordinateTransformation(sr_local_aeqd, geogr_sr_reprojection)
+			
+			local_aeqd_union_polygon = union_polygon.Clone()
+			local_aeqd_union_polygon.Transform(geogr_reprojection_to_local_aeqd)
+			local_aeqd_envelope = local_aeqd_union_polygon.GetEnvelope()
+			local_aeqd_area_radius = math.hypot(max(abs(local_aeqd_envelope[0]), abs(local_aeqd_envelope[1])), max(abs(local_aeqd_envelope[2]), abs(local_aeqd_envelope[3])))
+		
+		""" Without shapefile output, only the buffered area size is needed for every crater. It is interpolated from the area-versus-distance curve of the 
+		reference area, which is sampled at adaptively chosen buffer distances (see buffer_area_curve). """
+		
+		use_buffer_area_curve = buffer_area_curve_mode == True and generate_polygon_file == False and generate_point_file == False and len(all_craters) > 0
+		
+		if use_buffer_area_curve == True:
+			buffer_distances = all_craters['diameter'] * 1000 / 2 * bufferfactor
+			vertices_angle_list, vertices_direct_terms = build_ring_direct_terms(ring_azimuths, adaptive_join_step(max_buffer_distance), flattening, major_axis)
+			buffer_curve_areas, buffer_curve_samples, self_intersection = buffer_area_curve(flattening, major_axis, vertices_direct_terms, [geogr_reprojection_to_proj_reprojection, proj_reprojection_to_geogr, geogr_to_eq_area], buffer_distances, buffer_area_curve_relative_error)
+			
+			print "Process", process_count, ": Buffered area curve:", buffer_curve_samples, "buffer constructions for", len(all_craters), "craters"
+			if write_logfile == True and multicore_operation == False:
+				logfile.flush()
+			if write_logfile == True and multicore_operation == True:
+				multicore_log.append(["Process " + str(process_count) + " : Buffered area curve: " + str(buffer_curve_samples) + " buffer constructions for " + str(len(all_craters)) + " craters"])
+			
+			if self_intersection == True:
+				print "Error due to severe self-intersection during buffering. Please use shapefile output and check the modified shapefile for errors."
+				ctypes.windll.user32.MessageBoxA(0, "Error due to severe self-intersection during buffering.", "Error", 0)
+				if write_logfile == True and multicore_operation == False:
+					logfile.flush()
+				if write_logfile == True and multicore_operation == True:
+					multicore_log.append(["Error due to severe self-intersection during buffering. Please use shapefile output and check the modified shapefile for errors."])
+					raise Exception("Self-intersection")
+		
 		cr_cnt = 0
-		for crater in all_craters:
+		for crater in all_craters.tolist():
 			
 			if len(all_craters) > 0:
 				print "Process", process_count, ": Processing crater", crater[0], ":", round(((float(cr_cnt) / float(len(all_craters)))*100), 1), "%"
@@ -2822,79 +3551,88 @@ def buffer_area(self, union_polygon, crater_area_list, all_craters, sr_wkt, gene
 			
 			dist_buffer = crater[1]*1000/2
 			
-			""" Calculate coordinates of buffer points for outer polygon """
+			""" Get buffered area from the area-versus-distance curve (if calculated). """
 			
-			geometry_dict_count = 0
-			len_vertices_angle_list = len(vertices_angle_list)
+			if use_buffer_area_curve == True:
+				geodesic_area = float(buffer_curve_areas[cr_cnt])
 			
-			for geometry_dict_count in range(len_vertices_angle_list):
+			if use_buffer_area_curve == False:
 				
-				splitted_buffered_ring = ogr.Geometry(ogr.wkbLinearRing)
-				splitted_buffered_polygon = ogr.Geometry(ogr.wkbPolygon)
+				""" Reuse the buffered reference area of a previous crater with the same (quantized) buffer distance. The cache is not used when buffer points 
+				are written to the point file. """
 				
-				direct_vincenty(flattening, major_axis, vertices_angle_list[geometry_dict_count], dist_buffer, bufferfactor)
+				buffer_distance = buffer_cache_distance(dist_buffer * bufferfactor)
+				cached_buffer = None
+				if generate_point_file == False:
+					cached_buffer = buffer_cache_get(buffer_cache, buffer_distance)
 				
-				for buffer_vertex in buffer_vertices_list:
+				if cached_buffer is not None:
+					BCC_union_polygon = cached_buffer[0].Clone()
+					geodesic_area = cached_buffer[1]
+					buffer_engine = cached_buffer[2]
+					buffer_cache_hits += 1
+				
+				if cached_buffer is None:
+					buffer_cache_misses += 1
 					
-					""" Add point to ring geometry """
+					""" Hybrid buffer engine: planar buffer if the distortion error is below planar_buffer_tolerance, geodesic buffer otherwise. """
 					
-					splitted_buffered_ring.AddPoint(buffer_vertex[0], buffer_vertex[1])
+					buffer_engine = "geodesic"
+					if use_planar_buffer_engine == True:
+						if planar_buffer_distortion_error(local_aeqd_area_radius, projection_center_Y, buffer_distance, flattening, major_axis) < planar_buffer_tolerance:
+							buffer_engine = "planar"
 					
-					if generate_point_file == True:
-						
-						point_geometry.AddPoint(buffer_vertex[0], buffer_vertex[1])
-						point_geometry.Transform(geogr_reprojection_to_proj_reprojection)
-						point_geometry.Transform(proj_reprojection_to_geogr)
-						point_feature.SetGeometry(point_geometry)
-						point_feature.SetField('prev', buffer_vertex[2])
-						point_feature.SetField('next', buffer_vertex[3])
-						point_feature.SetField('angle', angle_prev_BP)
-						layer_points.CreateFeature(point_feature)
-				
-				""" Add ring to polygon geometry """
-				
-				splitted_buffered_polygon.AddGeometry(splitted_buffered_ring)
-				
-				""" eliminate unwanted holes due to self-intersections on outer boundary using a planar 0 buffer """
-				
-				splitted_buffered_polygon = splitted_buffered_polygon.Buffer(0)
-				
-				""" Errors may occur during Buffer(0) so that two polygons are formed from one polygon due to severe self-intersections. 
-				This would lead to an invalid geometry which could not be added to the BNSC_union_polygon. To prevent this, all geometries 
-				in the splitted_buffered_polygon are investigated, Buffered (0) again and then added to the BNSC_union_polygon. """
-				
-				if splitted_buffered_polygon.IsValid() == False:
-				
-					for linear_ring_splitted_buffered_polygon in splitted_buffered_polygon:
-						
-						""" Add linear_ring_splitted_buffered_polygon to new polygon. """
-						
-						polygon_part_splitted_buffered_polygon = ogr.Geometry(ogr.wkbPolygon)
-						polygon_part_splitted_buffered_polygon.AddGeometry(linear_ring_splitted_buffered_polygon)
-						polygon_part_splitted_buffered_polygon = polygon_part_splitted_buffered_polygon.Buffer(0)
-						
-						if polygon_part_splitted_buffered_polygon.IsValid() == False:
-							print "Error due to severe self-intersection during buffering. Please use shapefile output and check the modified shapefile for errors."
-							ctypes.windll.user32.MessageBoxA(0, "Error due to severe self-intersection during buffering.", "Error", 0)
-							if write_logfile == True and multicore_operation == False:
-								logfile.flush()
-							if write_logfile == True and multicore_operation == True:
-								multicore_log.append(["Error due to severe self-intersection during buffering. Please use shapefile output and check the modified shapefile for errors."])
-								raise Exception("Self-intersection")
+					if buffer_engine == "planar":
+						BCC_union_polygon = planar_buffer_union_polygon(local_aeqd_union_polygon, local_aeqd_to_geogr_reprojection, buffer_distance)
+						self_intersection = False
+					
+					if buffer_engine == "geodesic":
+						join_step = adaptive_join_step(buffer_distance)
+						if join_step not in ring_direct_terms:
+							ring_direct_terms[join_step] = build_ring_direct_terms(ring_azimuths, join_step, flattening, major_axis)
+						vertices_angle_list, vertices_direct_terms = ring_direct_terms[join_step]
 						
-						BCC_union_polygon = BCC_union_polygon.Union(polygon_part_splitted_buffered_polygon)
-				
-				if splitted_buffered_polygon.IsValid() == True:
+						BCC_union_polygon, buffer_vertices, self_intersection = buffer_union_polygon(flattening, major_axis, vertices_direct_terms, buffer_distance)
+					
+					if self_intersection == True:
+						print "Error due to severe self-intersection during buffering. Please use shapefile output and check the modified shapefile for errors."
+						ctypes.windll.user32.MessageBoxA(0, "Error due to severe self-intersection during buffering.", "Error", 0)
+						if write_logfile == True and multicore_operation == False:
+							logfile.flush()
+						if write_logfile == True and multicore_operation == True:
+							multicore_log.append(["Error due to severe self-intersection during buffering. Please use shapefile output and check the modified shapefile for errors."])
+							raise Exception("Self-intersection")
+					
+					if generate_point_file == True:
+						for geometry_dict_count in range(len(buffer_vertices)):
+							buffer_vertices_X, buffer_vertices_Y = buffer_vertices[geometry_dict_count]
+							ring_vertices_angles = vertices_angle_list[geometry_dict_count]
+							for buffer_vertex in xrange(len(buffer_vertices_X)):
+								point_geometry.AddPoint(buffer_vertices_X[buffer_vertex], buffer_vertices_Y[buffer_vertex])
+								point_geometry.Transform(geogr_reprojection_to_proj_reprojection)
+								point_geometry.Transform(proj_reprojection_to_geogr)
+								point_feature.SetGeometry(point_geometry)
+								point_feature.SetField('prev', ring_vertices_angles[buffer_vertex, 3])
+								point_feature.SetField('next', ring_vertices_angles[buffer_vertex, 4])
+								point_feature.SetField('angle', ring_vertices_angles[buffer_vertex, 2])
+								layer_points.CreateFeature(point_feature)
+					
+					BCC_union_polygon.Transform(geogr_reprojection_to_proj_reprojection)
+					BCC_union_polygon.Transform(proj_reprojection_to_geogr)
+					BCC_union_polygon.Transform(geogr_to_eq_area)
+					
+					geodesic_area = BCC_union_polygon.GetArea()/1000000
 					
-					BCC_union_polygon = BCC_union_polygon.Union(splitted_buffered_polygon)
+					if generate_point_file == False:
+						buffer_cache_put(buffer_cache, buffer_distance, [BCC_union_polygon.Clone(), geodesic_area, buffer_engine])
 				
-				geometry_dict_count += 1
-			
-			BCC_union_polygon.Transform(geogr_reprojection_to_proj_reprojection)
-			BCC_union_polygon.Transform(proj_reprojection_to_geogr)
-			BCC_union_polygon.Transform(geogr_to_eq_area)
-			
-			geodesic_area = BCC_union_polygon.GetArea()/1000000
+				buffer_engine_counts[buffer_engine] += 1
+				
+				print "Process", process_count, ": Crater", crater[0], ":", buffer_engine, "buffer"
+				if write_logfile == True and multicore_operation == False:
+					logfile.flush()
+				if write_logfile == True and multicore_operation == True:
+					multicore_log.append(["Process " + str(process_count) + " : Crater " + str(crater[0]) + " : " + buffer_engine + " buffer"])
 			
 			if generate_polygon_file == True:
 				
@@ -2913,8 +3651,6 @@ def buffer_area(self, union_polygon, crater_area_list, all_craters, sr_wkt, gene
 			
 			""" Delete geometries """
 			
-			del splitted_buffered_ring
-			del splitted_buffered_polygon
 			del BCC_union_polygon
 			del point_geometry
 			if generate_point_file == True:
@@ -2938,6 +3674,18 @@ def buffer_area(self, union_polygon, crater_area_list, all_craters, sr_wkt, gene
 				self.update_process_label("Process 2/2 Modifying reference areas... " + str(results_percent) +"%")
 				QApplication.processEvents()
 		
+		print "Process", process_count, ": Buffer cache:", buffer_cache_hits, "hits,", buffer_cache_misses, "misses"
+		if write_logfile == True and multicore_operation == False:
+			logfile.flush()
+		if write_logfile == True and multicore_operation == True:
+			multicore_log.append(["Process " + str(process_count) + " : Buffer cache: " + str(buffer_cache_hits) + " hits, " + str(buffer_cache_misses) + " misses"])
+		
+		print "Process", process_count, ": Buffer engines:", buffer_engine_counts["planar"], "planar,", buffer_engine_counts["geodesic"], "geodesic"
+		if write_logfile == True and multicore_operation == False:
+			logfile.flush()
+		if write_logfile == True and multicore_operation == True:
+			multicore_log.append(["Process " + str(process_count) + " : Buffer engines: " + str(buffer_engine_counts["planar"]) + " planar, " + str(buffer_engine_counts["geodesic"]) + " geodesic"])
+		
 		crater_area_out_q.put(crater_area_list)
 		
 		""" Indicator when multicore operation is finished """
@@ -2960,8 +3708,40 @@ def buffer_area(self, union_polygon, crater_area_list, all_craters, sr_wkt, gene
 	
 	""" Buffer craters to define the size of ejecta blankets. """
 	
+""" Ejecta blanket polygons (NSC/BNSC). The number of vertices of a crater's ejecta polygon follows from its buffer distance (radius r) and 
+densification_chord_tolerance: a regular polygon with n vertices deviates by r * (1 - cos(pi / n)) from the circle. The number of vertices is limited to 
+ejecta_min_vertices .. ejecta_max_vertices. ejecta_max_vertices is the previous fixed number of vertices (one every 2 degrees), so large craters are never 
+densified beyond it (their deviation from the circle exceeds the tolerance). ejecta_polygons_wkbcalculates the polygons of all craters with one forward geodesic call and returns them 
+as WKB (one polygon per crater, ring closed with the vertex at azimuth 0). """
+
+ejecta_min_vertices = 16
+ejecta_max_vertices = 180
+
+def ejecta_vertex_counts(buffer_distances):
+	chord_ratio = densification_chord_tolerance / numpy.asarray(buffer_distances, dtype = float)
+	max_vertex_angle = numpy.arccos(numpy.clip(1 - chord_ratio, -1.0, 1.0))
+	vertex_counts = numpy.ceil(math.pi / numpy.maximum(max_vertex_angle, 1.0e-12))
+	return numpy.clip(vertex_counts, ejecta_min_vertices, ejecta_max_vertices).astype(int)
+
+def ejecta_polygons_wkb(flattening, major_axis, crater_X, crater_Y, buffer_distances):
+	buffer_distances = numpy.asarray(buffer_distances, dtype = float)
+	if len(buffer_distances) == 0:
+		return []
+	
+	""" Crater and vertex index of every polygon vertex (closing vertex included). """
+	
+	ring_lengths = ejecta_vertex_counts(buffer_distances) + 1
+	ring_ends = numpy.cumsum(ring_lengths)
+	crater_index = numpy.repeat(numpy.arange(len(ring_lengths)), ring_lengths)
+	vertex_index = numpy.arange(ring_ends[-1]) - (ring_ends - ring_lengths)[crater_index]
+	ejecta_angles = numpy.mod(360.0 * vertex_index / (ring_lengths[crater_index] - 1), 360.0)
+	
+	buffer_X, buffer_Y = geodesic_direct(flattening, major_axis, numpy.asarray(crater_X, dtype = float)[crater_index], numpy.asarray(crater_Y, dtype = float)[crater_index], ejecta_angles, buffer_distances[crater_index])
+	
+	return [polygon_wkb_from_coordinate_arrays(buffer_X[ring_end - ring_length:ring_end], buffer_Y[ring_end - ring_length:ring_end]) for ring_end, ring_length in zip(ring_ends, ring_lengths)]
+
 def NSC_BNSC_buffer_craters(buffered_craters_out_q, craters_for_counting_list, flattening, major_axis, sr_wkt, lock, bufferfactor_crater):
-	global buffered_craters_wkt_list
+	global buffered_craters_wkb_list
 	
 	try:
 			
@@ -2975,27 +3755,20 @@ def NSC_BNSC_buffer_craters(buffered_craters_out_q, craters_for_counting_list, f
 		if isinstance(sr_wkt, basestring) == False:
 			sr = sr_wkt
 		
-		""" Get geographic reference system. """
+		buffered_craters_wkb_list = []
 		
-		if sr.IsProjected():
-			geogr_sr = sr.CloneGeogCS()
-		if sr.IsGeographic():
-			geogr_sr = sr
+		""" Determine buffer distances in meter """
 		
-		buffered_craters_wkt_list = []
+		crater_diameters = craters_for_counting_list['diameter']
+		dist_buffers = ((crater_diameters * 1000) / 2) + ((crater_diameters * 1000)/2 * (bufferfactor_crater - 1))
 		
-		""" Create list of angles used for polar coordinates (equivalent to the number of geodesic buffer polygon's vertices). """
+		""" Calculate vertices of all buffered crater polygons in one call (number of vertices per crater see ejecta_vertex_counts). """
 		
-		no_of_buffer_vertices = 180.0
-		divisor = 360.0/no_of_buffer_vertices
-		ejecta_angles = numpy.arange(0.0, 360.0, divisor)
-		ejecta_angles = numpy.append(ejecta_angles, 0.0)
+		crater_polygons_wkb = ejecta_polygons_wkb(flattening, major_axis, craters_for_counting_list['lon'], craters_for_counting_list['lat'], dist_buffers)
 		
 		""" Get crater information """
 		
-		for crater in craters_for_counting_list:
-			
-			vertices_angle_list = []
+		for crater, crater_polygon_wkb in zip(craters_for_counting_list.tolist(), crater_polygons_wkb):
 			
 			crater_id = crater[0]
 			crater_diameter = crater[1]
@@ -3003,55 +3776,162 @@ def NSC_BNSC_buffer_craters(buffered_craters_out_q, craters_for_counting_list, f
 			crater_centroid_Y = crater[3]
 			distance_crater_polygon = crater[4]
 			
-			""" Check if crater obliterates larger crater from previously added field. """
-			
-			if len(crater) == 6:
-				obliterates = "obliterates"
-			if len(crater) == 5:
-				obliterates = "included"
-			
-			""" Determine buffer distance in meter """
-			
-			dist_buffer = ((crater_diameter * 1000) / 2) + ((crater_diameter * 1000)/2 * (bufferfactor_crater - 1))
-			
-			""" Calculate vertices of buffered crater polygon """
-			
-			for ejecta_angle in ejecta_angles:
-				vertices_angle_list.append([crater_centroid_X, crater_centroid_Y, ejecta_angle, 0, 0])
+			""" Check if crater obliterates larger crater (status field). """
 			
-			""" bufferfactor_crater = 1 in this case since buffer distance has already been determined in this function """
+			obliteration_status = crater[5]
 			
-			direct_vincenty(flattening, major_axis, vertices_angle_list, dist_buffer, 1) 
+			""" Pass polygons as WKB to other functions. Multicore doesn't support GDAL objects to pass. Strings are OK. """
 			
-			""" Define buffered crater polygon """
+			buffered_craters_wkb_list.append([crater_polygon_wkb, distance_crater_polygon, crater_id, crater_diameter, obliteration_status])
 			
-			crater_ring_geometry = ogr.Geometry(ogr.wkbLinearRing)
-			crater_polygon_geometry = ogr.Geometry(ogr.wkbPolygon)
-			
-			crater_ring_geometry.AssignSpatialReference(geogr_sr)
-			crater_polygon_geometry.AssignSpatialReference(geogr_sr)
-			
-			""" Create buffered crater polygon """
-			
-			for crater_buffer_vertex in buffer_vertices_list:
-				crater_ring_geometry.AddPoint(crater_buffer_vertex[0], crater_buffer_vertex[1])
-			
-			crater_polygon_geometry.AddGeometry(crater_ring_geometry)
-			
-			""" Convert polygon to WKT to pass it to other functions. Multicore doesn't support GDAL objects to pass. Text is OK. """
-			
-			buffered_craters_wkt_list.append([crater_polygon_geometry.ExportToWkt(), distance_crater_polygon, crater_id, crater_diameter, obliterates])
-			
-		buffered_craters_out_q.put(buffered_craters_wkt_list)
+		buffered_craters_out_q.put(buffered_craters_wkb_list)
 		
 	except Exception, e:
 		print "\nCSFD measurement failed due to severe exception: \n" + str(e) + "\n" + str(gdal.GetLastErrorMsg()) + "\nScript canceled!"
 		ctypes.windll.user32.MessageBoxA(0, "CSFD measurement failed due to severe exception. Please check modified shapefile geometries and logfile.", "Error", 0)
 		return 
 
-""" Modify initial reference areas for NSC and BNSC. """
+""" Cache of vertex azimuths for BNSC buffering. Successive BNSC buffers of a process share most of their boundary: only the parts changed by the last 
+removed crater are new. The azimuths from the previous vertex and to the next vertex only depend on the latitudes of the three vertices and the longitude 
+differences between them (key values, they do not depend on the reference meridian which is changed for every BNSC buffer). Round join angles are derived 
+from the cached azimuths. 
+
+The reprojection of the reference area for every BNSC buffer moves the vertices by up to ~1e-7 degrees, so the key values are quantised to a coarse grid 
+(vertex_azimuth_cache_resolution, degrees) and a cached entry is only used if all its key values are within vertex_azimuth_cache_tolerance (degrees) of the 
+vertex. The cache is a table of quantised keys (sorted, vertex_azimuth_cache_dtype), key values and azimuths: all vertices of a ring are looked up at once 
+(searchsorted). Only entries used by the latest buffer are kept (the entries of all rings are collected in updated_vertex_azimuth_cache, 
+build_vertex_azimuth_cache replaces vertex_azimuth_cache after each buffer). """
+
+vertex_azimuth_cache_resolution = 1e-4
+vertex_azimuth_cache_tolerance = 1e-6
+vertex_azimuth_cache_dtype = numpy.dtype([('lat_prev', 'i8'), ('lat', 'i8'), ('lat_next', 'i8'), ('delta_lon_prev', 'i8'), ('delta_lon_next', 'i8')])
+
+def vertex_azimuth_cache_keys(ring_vertices, previous_vertex_index, next_vertex_index):
+	lon = ring_vertices[:, 0]
+	lat = ring_vertices[:, 1]
+	delta_lon_prev = (lon - lon[previous_vertex_index] + 180) % 360 - 180
+	delta_lon_next = (lon[next_vertex_index] - lon + 180) % 360 - 180
+	key_values = numpy.column_stack((lat[previous_vertex_index], lat, lat[next_vertex_index], delta_lon_prev, delta_lon_next))
+	
+	keys = numpy.zeros(len(key_values), dtype = vertex_azimuth_cache_dtype)
+	for field_count, field_name in enumerate(vertex_azimuth_cache_dtype.names):
+		keys[field_name] = numpy.round(key_values[:, field_count] / vertex_azimuth_cache_resolution)
+	return keys, key_values
+
+def build_vertex_azimuth_cache(cache_entries):
+	if len(cache_entries) == 0:
+		return numpy.zeros(0, dtype = vertex_azimuth_cache_dtype), numpy.zeros((0, 5)), numpy.zeros(0), numpy.zeros(0)
+	
+	keys, key_values, angles_prev, angles_next = [numpy.concatenate(cache_column) for cache_column in zip(*cache_entries)]
+	cache_order = numpy.argsort(keys, kind = 'mergesort')
+	return keys[cache_order], key_values[cache_order], angles_prev[cache_order], angles_next[cache_order]
+
+def cached_vertex_azimuths(vertex_azimuth_cache, updated_vertex_azimuth_cache, ring_vertices, previous_vertex_index, next_vertex_index, flattening, major_axis):
+	keys, key_values = vertex_azimuth_cache_keys(ring_vertices, previous_vertex_index, next_vertex_index)
+	cache_keys, cache_key_values, cache_angles_prev, cache_angles_next = vertex_azimuth_cache
+	angles_prev = numpy.zeros(len(keys))
+	angles_next = numpy.zeros(len(keys))
+	cached_vertices = numpy.zeros(len(keys), dtype = bool)
+	
+	if len(cache_keys) > 0:
+		cache_positions = numpy.minimum(numpy.searchsorted(cache_keys, keys), len(cache_keys) - 1)
+		cached_vertices = (cache_keys[cache_positions] == keys) & (numpy.abs(cache_key_values[cache_positions] - key_values).max(axis = 1) <= vertex_azimuth_cache_tolerance)
+		angles_prev[cached_vertices] = cache_angles_prev[cache_positions[cached_vertices]]
+		angles_next[cached_vertices] = cache_angles_next[cache_positions[cached_vertices]]
+	
+	""" Azimuths of new vertices (all vertices in one call). """
+	
+	missing_vertices = numpy.nonzero(~cached_vertices)[0]
+	if len(missing_vertices) > 0:
+		previous_vertices = ring_vertices[previous_vertex_index[missing_vertices]]
+		current_vertices = ring_vertices[missing_vertices]
+		next_vertices = ring_vertices[next_vertex_index[missing_vertices]]
+		distances_prev, angles_prev[missing_vertices], back_angles_prev = geodesic_inverse(flattening, major_axis, previous_vertices[:, 1], previous_vertices[:, 0], current_vertices[:, 1], current_vertices[:, 0])
+		distances_next, angles_next[missing_vertices], back_angles_next = geodesic_inverse(flattening, major_axis, current_vertices[:, 1], current_vertices[:, 0], next_vertices[:, 1], next_vertices[:, 0])
+	
+	updated_vertex_azimuth_cache.append((keys, key_values, angles_prev, angles_next))
+	
+	return angles_prev, angles_next
+
+""" Subtract the buffered craters first_index .. last_index - 1 from the reference area. Buffered craters are skipped if their envelope (bounding box, 
+buffered_craters_envelopes: minX, maxX, minY, maxY per crater) does not intersect the envelope of the reference area. The remaining buffered craters are 
+merged with one cascaded union and subtracted with a single difference. """
+
+def build_buffered_craters_envelopes(buffered_craters_geometry_list):
+	buffered_craters_envelopes = numpy.zeros((len(buffered_craters_geometry_list), 4))
+	for crater_index, buffered_crater_geometry in enumerate(buffered_craters_geometry_list):
+		buffered_craters_envelopes[crater_index] = buffered_crater_geometry.GetEnvelope()
+	return buffered_craters_envelopes
+
+def subtract_buffered_craters(union_polygon, buffered_craters_geometry_list, buffered_craters_envelopes, first_index, last_index):
+	if last_index <= first_index or union_polygon.IsEmpty():
+		return union_polygon
+	
+	union_envelope = union_polygon.GetEnvelope()
+	envelopes = buffered_craters_envelopes[first_index:last_index]
+	overlapping_craters = numpy.nonzero((envelopes[:, 0] <= union_envelope[1]) & (envelopes[:, 1] >= union_envelope[0]) & (envelopes[:, 2] <= union_envelope[3]) & (envelopes[:, 3] >= union_envelope[2]))[0] + first_index
+	
+	if len(overlapping_craters) == 0:
+		return union_polygon
+	if len(overlapping_craters) == 1:
+		return union_polygon.Difference(buffered_craters_geometry_list[overlapping_craters[0]])
+	
+	buffered_craters_batch = ogr.Geometry(ogr.wkbMultiPolygon)
+	for crater_index in overlapping_craters:
+		add_polygons_to_multipolygon(buffered_craters_batch, buffered_craters_geometry_list[crater_index])
+	return union_polygon.Difference(buffered_craters_batch.UnionCascaded())
 
-def NSC_BNSC_exclude_craters(self, approach, buffered_craters_wkt_list, union_polygon, sr_wkt, generate_polygon_file, path_to_outfile, craters_for_counting_list, craters_for_counting_list_BNSC, multicore_operation, layer_polygon, bufferfactor, bufferfactor_crater, process_count, crater_area_out_q, flattening, major_axis, Area_IDs, write_logfile, logfile, status_out_q, multicore_log_out_q):
+""" Reference area snapshots for multi-core BNSC. Every process needs the reference area after the subtraction of all buffered craters which are larger 
+than its own craters. Instead of repeating the complete chain of subtractions in every process, the chain is calculated once: snapshot m is the reference 
+area (in the input spatial reference, as in NSC_BNSC_exclude_craters) after the subtraction of the first m * snapshot_interval buffered craters. The 
+processes resume from the closest snapshot. Snapshots are passed as compressed WKB. The number of snapshots is limited by difference_snapshot_limit 
+(the interval grows with the number of craters). The chain runs in the GUI process before the processes are started, its progress is shown in the 
+process label. """
+
+difference_snapshot_limit = 200
+
+def build_difference_snapshots(self, union_polygon, buffered_craters_wkb_list, sr_wkt):
+	st = time.time()
+	sr = osr.SpatialReference()
+	sr.ImportFromWkt(sr_wkt)
+	geogr_sr = sr.CloneGeogCS()
+	geog_to_proj = osr.CoordinateTransformation(geogr_sr, sr)
+	proj_to_geogr = osr.CoordinateTransformation(sr, geogr_sr)
+	
+	union_polygon = union_polygon.Clone()
+	if sr.IsProjected():
+		union_polygon_sr = union_polygon.GetSpatialReference()
+		if not union_polygon_sr or union_polygon_sr.IsProjected():
+			union_polygon.Transform(proj_to_geogr)
+		union_polygon.Transform(geog_to_proj)
+	
+	buffered_craters_geometry_list = []
+	for buffered_crater in buffered_craters_wkb_list:
+		buffered_crater_polygon = ogr.CreateGeometryFromWkb(buffered_crater[0])
+		buffered_crater_polygon.Transform(geog_to_proj)
+		buffered_craters_geometry_list.append(buffered_crater_polygon)
+	buffered_craters_envelopes = build_buffered_craters_envelopes(buffered_craters_geometry_list)
+	
+	snapshot_interval = max(1, int(math.ceil(float(len(buffered_craters_wkb_list)) / difference_snapshot_limit)))
+	difference_snapshots = [zlib.compress(str(union_polygon.ExportToWkb()))]
+	for crater_index in xrange(snapshot_interval, len(buffered_craters_wkb_list), snapshot_interval):
+		union_polygon = subtract_buffered_craters(union_polygon, buffered_craters_geometry_list, buffered_craters_envelopes, crater_index - snapshot_interval, crater_index)
+		difference_snapshots.append(zlib.compress(str(union_polygon.ExportToWkb())))
+		
+		""" Write status information """
+		
+		results_percent = round((float(crater_index) / float(len(buffered_craters_wkb_list))) * 100, 2)
+		self.update_process_label("Process 3/3 Preparing reference area snapshots... " + str(results_percent) + "%")
+		QApplication.processEvents()
+	
+	print "Reference area snapshots:", len(difference_snapshots), "snapshots (interval", snapshot_interval, "craters) in", round(time.time() - st, 2), "s"
+	return snapshot_interval, difference_snapshots
+
+""" Modify initial reference areas for NSC and BNSC. difference_snapshots (snapshot interval and snapshots from build_difference_snapshots) is only given 
+during multi-core BNSC: buffered craters which are not in craters_for_counting_list_BNSC are skipped and the reference area is resumed from the closest 
+snapshot. """
+
+def NSC_BNSC_exclude_craters(self, approach, buffered_craters_wkb_list, union_polygon, sr_wkt, generate_polygon_file, path_to_outfile, craters_for_counting_list, craters_for_counting_list_BNSC, multicore_operation, layer_polygon, bufferfactor, bufferfactor_crater, process_count, crater_area_out_q, flattening, major_axis, Area_IDs, write_logfile, logfile, status_out_q, multicore_log_out_q, difference_snapshots):
 	from shapely.geometry import Point
 	global crater_area_list
 	
@@ -3135,6 +4015,10 @@ def NSC_BNSC_exclude_craters(self, approach, buffered_craters_wkt_list, union_po
 			if projection_center_X < 80 and projection_center_X > -80:
 				projection_center_X = projection_center_X + 100
 		
+		""" Largest latitude of the reference area (adaptive densification during BNSC, the reference area only shrinks). """
+		
+		union_polygon_max_latitude = max_abs_latitude(union_polygon)
+		
 		sr_text = 'PROJCS["PROJECTED_LAMBERT_AEA",'+str(geogr_sr)+',PROJECTION["Lambert_Azimuthal_Equal_Area"],PARAMETER["False_Easting",0.0],PARAMETER["False_Northing",0.0],PARAMETER["central_meridian",0.0],PARAMETER["latitude_of_origin",0.0],UNIT["Meter",1.0]]'
 		
 		if sr.IsProjected():
@@ -3155,21 +4039,35 @@ def NSC_BNSC_exclude_craters(self, approach, buffered_craters_wkt_list, union_po
 		
 		""" Get Geometry from WKT, reproject buffered craters to input spatial reference and store geometry in buffered_craters_geometry list. """
 		
-		for buffered_crater in buffered_craters_wkt_list:
-			buffered_crater_polygon = ogr.CreateGeometryFromWkt(buffered_crater[0])
+		for buffered_crater in buffered_craters_wkb_list:
+			buffered_crater_polygon = ogr.CreateGeometryFromWkb(buffered_crater[0])
 			buffered_crater_polygon.Transform(geog_to_proj)
 			buffered_craters_geometry_list.append(buffered_crater_polygon)
 		
 		buffered_craters_geometry_list_2 = list(buffered_craters_geometry_list)
+		buffered_craters_envelopes = build_buffered_craters_envelopes(buffered_craters_geometry_list)
 		crater_index = 0
+		BNSC_crater_id_index = build_crater_id_index(craters_for_counting_list_BNSC)
+		vertex_azimuth_cache = build_vertex_azimuth_cache([])
+		
+		""" union_polygon_crater_index: union_polygon is the reference area after the subtraction of the first union_polygon_crater_index buffered craters. """
+		
+		union_polygon_crater_index = 0
 		
 		for buffered_crater in buffered_craters_geometry_list:
 			
 			""" Get distance to crater from previous list (determined in get_craters_for_buffering_NSC_BNSC function via Vincenty's formulae) """
 			
-			distance_crater_area = buffered_craters_wkt_list[crater_index][1]
-			original_crater_id = buffered_craters_wkt_list[crater_index][2]
-			obliteration_status = buffered_craters_wkt_list[crater_index][4]
+			distance_crater_area = buffered_craters_wkb_list[crater_index][1]
+			original_crater_id = buffered_craters_wkb_list[crater_index][2]
+			obliteration_status = buffered_craters_wkb_list[crater_index][4]
+			
+			""" Skip craters of other processes (multi-core BNSC). """
+			
+			if difference_snapshots is not None:
+				if int(crater_id_lookup(BNSC_crater_id_index, original_crater_id)) < 0:
+					crater_index += 1
+					continue
 			
 			if len(craters_for_counting_list) > 0:
 				print "Process", process_count, ": Processing crater", original_crater_id, ":", round(((float(crater_index) / float(len(craters_for_counting_list)))*100), 1), "%"
@@ -3179,17 +4077,25 @@ def NSC_BNSC_exclude_craters(self, approach, buffered_craters_wkt_list, union_po
 				if write_logfile == True and multicore_operation == True:
 					multicore_log.append(["Process " + str(process_count) + " : Processing crater " + str(original_crater_id) + " : " + str (round(((float(crater_index) / float(len(craters_for_counting_list)))*100), 1)) + " %"])
 			
-			""" Start with largest crater, erase larger craters (craters with index -1) from initial reference area """
+			""" Start with largest crater, erase larger craters (craters with index -1) from initial reference area. During multi-core BNSC, the 
+			reference area is resumed from the closest snapshot if that is further advanced than union_polygon. Buffered craters which do not 
+			overlap the reference area are skipped (see subtract_buffered_craters). """
 			
-			if crater_index > 0:
-				buffered_crater_geometry_larger = buffered_craters_geometry_list[crater_index - 1]
-				union_polygon = union_polygon.Difference(buffered_crater_geometry_larger)
-				
-				""" Ignore craters that are located on top of an ejecta blanket for CSFD measurement. """
-				
-				if obliteration_status == "obliterates":
-					crater_index += 1
-					continue
+			if difference_snapshots is not None:
+				snapshot_interval, snapshots = difference_snapshots
+				snapshot_count = crater_index / snapshot_interval
+				if snapshot_count * snapshot_interval > union_polygon_crater_index:
+					union_polygon = ogr.CreateGeometryFromWkb(zlib.decompress(snapshots[snapshot_count]))
+					union_polygon_crater_index = snapshot_count * snapshot_interval
+			
+			union_polygon = subtract_buffered_craters(union_polygon, buffered_craters_geometry_list, buffered_craters_envelopes, union_polygon_crater_index, crater_index)
+			union_polygon_crater_index = crater_index
+			
+			""" Ignore craters that are located on top of an ejecta blanket for CSFD measurement. """
+			
+			if crater_index > 0 and obliteration_status == crater_status_obliterates:
+				crater_index += 1
+				continue
 				
 			""" Buffer reference area during BNSC after a crater + ejecta blanket is removed. """
 				
@@ -3201,358 +4107,233 @@ def NSC_BNSC_exclude_craters(self, approach, buffered_craters_wkt_list, union_po
 				crater diameters. When a crater is removed from the reference area, the script checks if that particular crater is included in craters_for_counting_list_BNSC. 
 				If it is included, the reference area is buffered. This procedure is conducted to optimize the BNSC buffering for multicore computation. In every process, all craters in 
 				buffered_craters_geometry_list are removed from the reference area but the area is only buffered if the crater is included in the splitted 
-				craters_for_counting_list_BNSC list. The process of removing craters is conducted multiple times (one time in each process - extra effort but not very time consuming) 
-				while the areas for buffering are unique for each process. """
+				craters_for_counting_list_BNSC list. The chain of removed craters is calculated once (difference_snapshots) and every process resumes from the closest 
+				snapshot, while the areas for buffering are unique for each process. """
 				
-				""" Check if crater which was currently removed from the reference area is in craters_for_counting_list_BNSC """
+				""" Check if crater which was currently removed from the reference area is in craters_for_counting_list_BNSC (crater ID index) """
 				
-				for BNSC_crater in craters_for_counting_list_BNSC:
-					BNSC_crater_id = BNSC_crater[0]
+				BNSC_crater_index = int(crater_id_lookup(BNSC_crater_id_index, original_crater_id))
+				
+				if BNSC_crater_index >= 0:
 					
-					if BNSC_crater_id == original_crater_id:
-						
-						BNSC_crater_diameter = BNSC_crater[1]
-						buffer_distance_polygon_BNSC = ((BNSC_crater_diameter * 1000)/2) * bufferfactor
-						
-						#####################################################################
-						#																	#
-						# BNSC BUFFER (not in a separate function due to multicore support)	#
-						#																	#
-						#####################################################################
-						
-						BNSC_union_polygon = ogr.Geometry(ogr.wkbPolygon)
-						
-						""" Segmentize polygon to decreacse the effect of angular distortion in polar regions. """
-						
-						if sr.IsProjected():
-							union_polygon.Segmentize(10000)
-							union_polygon.Transform(proj_to_geogr)
-						if sr.IsGeographic():
-							union_polygon.Segmentize(1)
-						
-						""" Consider dateline intersections: Get center of research area to define projection center. """
-						
-						union_polygon_centroid = union_polygon.Centroid()
-						union_polygon_centroid_X, union_polygon_centroid_Y, union_polygon_centroid_Z = union_polygon_centroid.GetPoint()
-						projection_center_X = round(union_polygon_centroid_X, 1)
-						projection_center_Y = round(union_polygon_centroid_Y, 1)
-						
-						""" If a polygon intersects a dateline, it may happen that the centroid is wrongly identified (Polygon intersects dateline vs. 
-						Polygon spans globe with a hole over dateline). If polygon cuts lines (which we assume to be datelines) at lon -179.8 and lon 179.8, we assume that a dateline 
-						intersection is present. In this case, we set the projection center to (false projection center (if closer than 80 deg lon to central meridian) + 100 deg 
-						lon). It is quite experimental to set a fixed lon value but it works in all cases we tested. """
-						
-						dateline_1 = ogr.Geometry(ogr.wkbLineString)
-						dateline_1.AddPoint(-179, 90)
-						dateline_1.AddPoint(-179, -90)
+					BNSC_crater_diameter = float(craters_for_counting_list_BNSC['diameter'][BNSC_crater_index])
+					buffer_distance_polygon_BNSC = ((BNSC_crater_diameter * 1000)/2) * bufferfactor
 					
-						dateline_2 = ogr.Geometry(ogr.wkbLineString)
-						dateline_2.AddPoint(179, 90)
-						dateline_2.AddPoint(179, -90)
-						
-						""" If both lines (lon +179.8 & -179.8) are intersecting the polygon, we assume a dateline intersection rather than a global polygon. """
-						
-						if union_polygon.Intersects(dateline_1) == True and union_polygon.Intersects(dateline_2) == True:
-							if projection_center_X < 80 and projection_center_X > -80:
-								projection_center_X = projection_center_X + 100
-						
-						""" Change reference meridian in geographic coordinate system to center of input polygon to avoid problems during dateline intersection. """
-						
-						geogr_sr_reprojection_text = re.sub('(PRIMEM)(.*)(,)', r'\1["Reference_Meridian",' + str(projection_center_X) + '],', str(geogr_sr))
-						geogr_sr_reprojection = osr.SpatialReference(geogr_sr_reprojection_text)
+					#####################################################################
+					#																	#
+					# BNSC BUFFER (not in a separate function due to multicore support)	#
+					#																	#
+					#####################################################################
+					
+					BNSC_ring_buffers = []
+					
+					""" Segmentize polygon to decreacse the effect of angular distortion in polar regions (adaptive densification, see 
+					adaptive_segment_length and adaptive_join_step). """
+					
+					segment_length = adaptive_segment_length(buffer_distance_polygon_BNSC, union_polygon_max_latitude, major_axis, sr.IsProjected())
+					join_step = adaptive_join_step(buffer_distance_polygon_BNSC)
+					
+					union_polygon.Segmentize(segment_length)
+					if sr.IsProjected():
+						union_polygon.Transform(proj_to_geogr)
+					
+					""" Consider dateline intersections: Get center of research area to define projection center. """
+					
+					union_polygon_centroid = union_polygon.Centroid()
+					union_polygon_centroid_X, union_polygon_centroid_Y, union_polygon_centroid_Z = union_polygon_centroid.GetPoint()
+					projection_center_X = round(union_polygon_centroid_X, 1)
+					projection_center_Y = round(union_polygon_centroid_Y, 1)
+					
+					""" If a polygon intersects a dateline, it may happen that the centroid is wrongly identified (Polygon intersects dateline vs. 
+					Polygon spans globe with a hole over dateline). If polygon cuts lines (which we assume to be datelines) at lon -179.8 and lon 179.8, we assume that a dateline 
+					intersection is present. In this case, we set the projection center to (false projection center (if closer than 80 deg lon to central meridian) + 100 deg 
+					lon). It is quite experimental to set a fixed lon value but it works in all cases we tested. """
+					
+					dateline_1 = ogr.Geometry(ogr.wkbLineString)
+					dateline_1.AddPoint(-179, 90)
+					dateline_1.AddPoint(-179, -90)
+				
+					dateline_2 = ogr.Geometry(ogr.wkbLineString)
+					dateline_2.AddPoint(179, 90)
+					dateline_2.AddPoint(179, -90)
+					
+					""" If both lines (lon +179.8 & -179.8) are intersecting the polygon, we assume a dateline intersection rather than a global polygon. """
+					
+					if union_polygon.Intersects(dateline_1) == True and union_polygon.Intersects(dateline_2) == True:
+						if projection_center_X < 80 and projection_center_X > -80:
+							projection_center_X = projection_center_X + 100
+					
+					""" Change reference meridian in geographic coordinate system to center of input polygon to avoid problems during dateline intersection. """
+					
+					geogr_sr_reprojection_text = re.sub('(PRIMEM)(.*)(,)', r'\1["Reference_Meridian",' + str(projection_center_X) + '],', str(geogr_sr))
+					geogr_sr_reprojection = osr.SpatialReference(geogr_sr_reprojection_text)
+					
+					sr_reprojection_text = 'PROJCS["LAEA_REPROJECTION_EQ_AREA",'+str(geogr_sr_reprojection_text)+',PROJECTION["Lambert_Azimuthal_Equal_Area"],PARAMETER["False_Easting",0.0],PARAMETER["False_Northing",0.0],PARAMETER["central_meridian",' + str(projection_center_X) + '],PARAMETER["latitude_of_origin",' + str(projection_center_Y) + '],UNIT["Meter",1.0]]'
+					sr_reprojection = osr.SpatialReference(sr_reprojection_text)
+					
+					geogr_to_proj_reprojection = osr.CoordinateTransformation(geogr_sr, sr_reprojection)
+					proj_reprojection_to_geogr_reprojection = osr.CoordinateTransformation(sr_reprojection, geogr_sr_reprojection)
+					geogr_reprojection_to_proj_reprojection = osr.CoordinateTransformation(geogr_sr_reprojection, sr_reprojection) 
+					proj_reprojection_to_geogr = osr.CoordinateTransformation(sr_reprojection, geogr_sr)
+					
+					""" Reproject input polygon to consider dateline intersections """
+					
+					union_polygon.Transform(geogr_to_proj_reprojection)
+					union_polygon.Transform(proj_reprojection_to_geogr_reprojection)
+					
+					updated_vertex_azimuth_cache = []
+					
+					""" LINEARRING features must be used when MULTIPOLYGON (multiple areas) is present and LINEARRING must be taken when POLYGON (single area) 
+					is present. """
+					
+					for area in union_polygon:
+						number_of_inner_polygons = 0
+						number_of_holes = 0
 						
-						sr_reprojection_text = 'PROJCS["LAEA_REPROJECTION_EQ_AREA",'+str(geogr_sr_reprojection_text)+',PROJECTION["Lambert_Azimuthal_Equal_Area"],PARAMETER["False_Easting",0.0],PARAMETER["False_Northing",0.0],PARAMETER["central_meridian",' + str(projection_center_X) + '],PARAMETER["latitude_of_origin",' + str(projection_center_Y) + '],UNIT["Meter",1.0]]'
-						sr_reprojection = osr.SpatialReference(sr_reprojection_text)
+						#############################
+						#	Step 1: CUT POLYGON		#
+						#############################
 						
-						geogr_to_proj_reprojection = osr.CoordinateTransformation(geogr_sr, sr_reprojection)
-						proj_reprojection_to_geogr_reprojection = osr.CoordinateTransformation(sr_reprojection, geogr_sr_reprojection)
-						geogr_reprojection_to_proj_reprojection = osr.CoordinateTransformation(geogr_sr_reprojection, sr_reprojection) 
-						proj_reprojection_to_geogr = osr.CoordinateTransformation(sr_reprojection, geogr_sr)
+						""" Determine number of polygons and number of holes to correctly split and buffer the data. """
 						
-						""" Reproject input polygon to consider dateline intersections """
+						if area.GetGeometryName() == "LINEARRING":
+							area_polygon = ogr.Geometry(ogr.wkbPolygon)
+							area_polygon.AddGeometry(area)
+						else:
+							area_polygon = ogr.Geometry(ogr.wkbPolygon)
+							area_polygon.AddGeometry(area.GetGeometryRef(0)) 
 						
-						union_polygon.Transform(geogr_to_proj_reprojection)
-						union_polygon.Transform(proj_reprojection_to_geogr_reprojection)
+						if area.GetGeometryName() == "LINEARRING":
+							number_of_holes = union_polygon.GetGeometryCount() - 1
+							#print "There is one inner polygon and", number_of_holes, "holes for this polygon."
+							
+						if area.GetGeometryName() == "POLYGON":
+							number_of_inner_polygons = union_polygon.GetGeometryCount()
+							number_of_holes = area.GetGeometryCount() - 1 # When union_polygon becomes MULTIPOLYGON due to clip and buffer (formation of islands) 
+							#print "There are", number_of_inner_polygons, "inner polygons and", area.GetGeometryCount() - 1, "holes for this polygon."
 						
-						""" LINEARRING features must be used when MULTIPOLYGON (multiple areas) is present and LINEARRING must be taken when POLYGON (single area) 
-						is present. """
+						""" Get inner rings: Get centroid of hole and split union_polygon or area into multiple parts according to holes. This way, only outlines need to be buffered (buffering 
+						outlines is faster than buffering inner ring). """
 						
-						for area in union_polygon:
-							number_of_inner_polygons = 0
-							number_of_holes = 0
-							
-							#############################
-							#	Step 1: CUT POLYGON		#
-							#############################
-							
-							""" Determine number of polygons and number of holes to correctly split and buffer the data. """
-							
+						if number_of_holes > 0:
 							if area.GetGeometryName() == "LINEARRING":
-								area_polygon = ogr.Geometry(ogr.wkbPolygon)
-								area_polygon.AddGeometry(area)
-							else:
-								area_polygon = ogr.Geometry(ogr.wkbPolygon)
-								area_polygon.AddGeometry(area.GetGeometryRef(0)) 
+								union_polygon_2 = ogr.CreateGeometryFromWkt(union_polygon.ExportToWkt())
 							
-							if area.GetGeometryName() == "LINEARRING":
-								number_of_holes = union_polygon.GetGeometryCount() - 1
-								#print "There is one inner polygon and", number_of_holes, "holes for this polygon."
-								
 							if area.GetGeometryName() == "POLYGON":
-								number_of_inner_polygons = union_polygon.GetGeometryCount()
-								number_of_holes = area.GetGeometryCount() - 1 # When union_polygon becomes MULTIPOLYGON due to clip and buffer (formation of islands) 
-								#print "There are", number_of_inner_polygons, "inner polygons and", area.GetGeometryCount() - 1, "holes for this polygon."
+								area_2 = ogr.CreateGeometryFromWkt(area.ExportToWkt())
 							
-							""" Get inner rings: Get centroid of hole and split union_polygon or area into multiple parts according to holes. This way, only outlines need to be buffered (buffering 
-							outlines is faster than buffering inner ring). """
-							
-							if number_of_holes > 0:
-								if area.GetGeometryName() == "LINEARRING":
-									union_polygon_2 = ogr.CreateGeometryFromWkt(union_polygon.ExportToWkt())
+							for hole_count in range(number_of_holes):
+								if number_of_inner_polygons == 0:
+									inner_ring_geometry = union_polygon.GetGeometryRef(hole_count + 1)
+								if number_of_inner_polygons > 0:
+									inner_ring_geometry = area.GetGeometryRef(hole_count + 1)
 								
-								if area.GetGeometryName() == "POLYGON":
-									area_2 = ogr.CreateGeometryFromWkt(area.ExportToWkt())
+								""" Get center of inner ring. Inner ring geometry has to be transformed from LINEARRING to POLYGON geometry. """
 								
-								for hole_count in range(number_of_holes):
-									if number_of_inner_polygons == 0:
-										inner_ring_geometry = union_polygon.GetGeometryRef(hole_count + 1)
-									if number_of_inner_polygons > 0:
-										inner_ring_geometry = area.GetGeometryRef(hole_count + 1)
-									
-									""" Get center of inner ring. Inner ring geometry has to be transformed from LINEARRING to POLYGON geometry. """
-									
-									inner_ring_polygon_geometry = ogr.Geometry(ogr.wkbPolygon)
-									inner_ring_polygon_geometry.AddGeometry(inner_ring_geometry)
-									
-									inner_ring_centroid = inner_ring_polygon_geometry.Centroid()
-									inner_ring_centroid_X, inner_ring_centroid_Y, inner_ring_centroid_Z = inner_ring_centroid.GetPoint()
-									
-									""" Generate lines which intersect centroid of inner rings.  """
-									
-									cut_line = ogr.Geometry(ogr.wkbLineString)
-									cut_line.AddPoint(0, 90)
-									cut_line.AddPoint(inner_ring_centroid_X, inner_ring_centroid_Y)
-									cut_line.AddPoint(0, -90)
-									
-									""" Generate splitted area from reference area and (buffered) split lines. OGR doesn't support polygon splitting 
-									by lines. """
-									
-									buffered_cut_line = cut_line.Buffer(0.00000000001) 
-									if area.GetGeometryName() == "LINEARRING":
-										union_polygon_2 = union_polygon_2.Difference(buffered_cut_line)
-										area_polygon = union_polygon_2
-									if area.GetGeometryName() == "POLYGON":
-										area_2 = area_2.Difference(buffered_cut_line)
-										area_polygon = area_2
-							
-							#################################
-							#	Step 2: BUFFER POLYGON		#
-							#################################
-							
-							""" Get each linear ring in the area polygon (polygon outlines or splitted polygon parts when polygon has holes) and buffer outlines. 
-							Holes are not present anymore. """
-							
-							for linear_ring in area_polygon:
+								inner_ring_polygon_geometry = ogr.Geometry(ogr.wkbPolygon)
+								inner_ring_polygon_geometry.AddGeometry(inner_ring_geometry)
 								
-								""" area_polygon is MULTIPOLYGON when polygon with holes (splitted polygon) is present. area_polygon is LINEARRING when no holes 
-								are present (no splitted polygon). Using GetGeometryRef(0) we get the linear ring from the polygon when splitting was conducted. """
+								inner_ring_centroid = inner_ring_polygon_geometry.Centroid()
+								inner_ring_centroid_X, inner_ring_centroid_Y, inner_ring_centroid_Z = inner_ring_centroid.GetPoint()
 								
-								if linear_ring.GetGeometryName() == "LINEARRING":
-									linear_ring = linear_ring
-								else:
-									linear_ring = linear_ring.GetGeometryRef(0)
+								""" Generate lines which intersect centroid of inner rings.  """
 								
-								splitted_buffered_polygon = ogr.Geometry(ogr.wkbPolygon)
-								splitted_buffered_ring = ogr.Geometry(ogr.wkbLinearRing)
+								cut_line = ogr.Geometry(ogr.wkbLineString)
+								cut_line.AddPoint(0, 90)
+								cut_line.AddPoint(inner_ring_centroid_X, inner_ring_centroid_Y)
+								cut_line.AddPoint(0, -90)
 								
-								no_of_polygon_vertices = linear_ring.GetPointCount()
-								vertices_angle_list = []
+								""" Generate splitted area from reference area and (buffered) split lines. OGR doesn't support polygon splitting 
+								by lines. """
 								
-								""" Get buffer points for outer polygon boundary. """
+								buffered_cut_line = cut_line.Buffer(0.00000000001) 
+								if area.GetGeometryName() == "LINEARRING":
+									union_polygon_2 = union_polygon_2.Difference(buffered_cut_line)
+									area_polygon = union_polygon_2
+								if area.GetGeometryName() == "POLYGON":
+									area_2 = area_2.Difference(buffered_cut_line)
+									area_polygon = area_2
 						
-								for vertex in xrange(no_of_polygon_vertices):
-									current_vertex_X, current_vertex_Y, z = linear_ring.GetPoint(vertex)
-									
-									""" Check if polygon is closed (first and last vertex share same coordinates) and modify neighboring vertices accordingly. """
-									
-									if linear_ring.GetPoint(0) == linear_ring.GetPoint(no_of_polygon_vertices - 1):
-										if vertex == 0:
-											vertex_position = "first"
-											previous_vertex_X, previous_vertex_Y, z = linear_ring.GetPoint(no_of_polygon_vertices - 2)
-											next_vertex_X, next_vertex_Y, z = linear_ring.GetPoint(vertex + 1)
-										if vertex == no_of_polygon_vertices - 1:
-											vertex_position = "last"
-											previous_vertex_X, previous_vertex_Y, z = linear_ring.GetPoint(vertex - 1)
-											next_vertex_X, next_vertex_Y, z = linear_ring.GetPoint(1)
-										if vertex > 0 and vertex < no_of_polygon_vertices - 1:
-											vertex_position = "middle" 
-											previous_vertex_X, previous_vertex_Y, z = linear_ring.GetPoint(vertex - 1)
-											next_vertex_X, next_vertex_Y, z = linear_ring.GetPoint(vertex + 1)
-									else:
-										if vertex == 0:
-											vertex_position = "first"
-											previous_vertex_X, previous_vertex_Y, z = linear_ring.GetPoint(no_of_polygon_vertices - 1)
-											next_vertex_X, next_vertex_Y, z = linear_ring.GetPoint(vertex + 1)
-										if vertex == no_of_polygon_vertices - 1:
-											vertex_position = "last"
-											previous_vertex_X, previous_vertex_Y, z = linear_ring.GetPoint(vertex - 1)
-											next_vertex_X, next_vertex_Y, z = linear_ring.GetPoint(0)
-										if vertex > 0 and vertex < no_of_polygon_vertices - 1:
-											vertex_position = "middle" 
-											previous_vertex_X, previous_vertex_Y, z = linear_ring.GetPoint(vertex - 1)
-											next_vertex_X, next_vertex_Y, z = linear_ring.GetPoint(vertex + 1)
-									
-									""" Calculate angle between previous vertex - current vertex and current vertex - next vertex from vincenty's inverse formula 
-									( calculation on a spheroid ). """
-									
-									inverse_vincenty(flattening, major_axis, previous_vertex_Y, previous_vertex_X, current_vertex_Y, current_vertex_X )
-									angle_prev = direction12
-									
-									inverse_vincenty(flattening, major_axis, current_vertex_Y, current_vertex_X, next_vertex_Y, next_vertex_X )
-									angle_next = direction12
-									
-									""" Ensure that angles remain within 0-360 deg range. """
-									
-									if angle_prev < 0:
-										angle_prev = angle_prev + 360
-									if angle_next < 0:
-										angle_next = angle_next + 360
-									
-									angle_prev_BP = angle_prev - 90 
-									angle_next_BP = angle_next - 90 
-									
-									""" Ensure that buffer points are perpendicular to reference area and remain within 0-360 deg range. """
-									
-									if angle_prev_BP < 0:
-										angle_prev_BP = angle_prev_BP + 360  
-									if angle_next_BP < 0:
-										angle_next_BP = angle_next_BP + 360 
-									
-									""" Add to list in which coordinates and angles for buffer vertices calculation are stored """
-									
-									vertices_angle_list.append([current_vertex_X, current_vertex_Y, angle_prev_BP, angle_prev, angle_next])
-									
-									""" Remember coordinates of the buffer polygon's first vertex - used later to close polygon """
-									
-									if vertex == 0:
-										X_0 = current_vertex_X
-										Y_0 = current_vertex_Y
-										angle_0 = angle_prev_BP
-										angle_prev_0 = angle_prev
-										angle_next_0 = angle_next
-									
-									""" Calculate buffer points between angle_prev-90 and angle_next-90 (used for round buffer edges). """
-									
-									if angle_next_BP > angle_prev_BP:
-										if (angle_next_BP) - (angle_prev_BP) <= 180:
-											
-											""" Angles between previous and next buffer point - generate buffer points which are outside the original polygon """
-											
-											angles = numpy.arange(angle_prev_BP, angle_next_BP, 8)
-											for angle in angles:
-												vertices_angle_list.append([current_vertex_X, current_vertex_Y, angle, angle_prev, angle_next])
-										if (angle_next_BP) - (angle_prev_BP) > 180:
-											
-											""" Scissor intersection: angles between next buffer point and 360 degrees and between 0 degrees and previous buffer point - generate buffer points which are outside the original polygon """
-											
-											angles = numpy.arange(angle_next_BP, 360, 8)
-											for angle in angles:
-												vertices_angle_list.append([current_vertex_X, current_vertex_Y, angle, angle_prev, angle_next])
-											angles = numpy.arange(0, angle_prev_BP, 8)
-											for angle in angles:
-												vertices_angle_list.append([current_vertex_X, current_vertex_Y, angle, angle_prev, angle_next])
-									if angle_next_BP < angle_prev_BP:
-										if angle_next_BP - angle_prev_BP > -180:
-											
-											""" Angles between next and previous buffer point - generate buffer points which are outside the original polygon """
-											
-											angles = numpy.arange(angle_next_BP, angle_prev_BP, 8)
-											for angle in angles:
-												vertices_angle_list.append([current_vertex_X, current_vertex_Y, angle, angle_prev, angle_next])
-										if angle_next_BP - angle_prev_BP <= -180:
-											
-											""" Scissor intersection - angles between previous buffer point and 360 degrees and between 0 degrees and next buffer point - generate buffer points which are outside the original polygon """
-											
-											angles = numpy.arange(angle_prev_BP, 360, 8)
-											for angle in angles:
-												vertices_angle_list.append([current_vertex_X, current_vertex_Y, angle, angle_prev, angle_next])
-											angles = numpy.arange(0, angle_next_BP, 8)
-											for angle in angles:
-												vertices_angle_list.append([current_vertex_X, current_vertex_Y, angle, angle_prev, angle_next])
-									
-									vertices_angle_list.append([current_vertex_X, current_vertex_Y, angle_next_BP, angle_prev, angle_next])
-								
-								""" Close polygon using the first vertex. """
-								
-								vertices_angle_list.append([X_0, Y_0, angle_0, angle_prev_0, angle_next_0])
-								
-								""" Calculate coordinates of buffer points for outer polygon. """
-								
-								direct_vincenty(flattening, major_axis, vertices_angle_list, buffer_distance_polygon_BNSC, 1)
-								
-								for buffer_vertex in buffer_vertices_list:
-									
-									""" Add point to ring geometry. """
-									
-									splitted_buffered_ring.AddPoint(buffer_vertex[0], buffer_vertex[1])
-								
-								""" Add ring to polygon geometry. """
-								
-								splitted_buffered_polygon.AddGeometry(splitted_buffered_ring)
-								
-								""" Eliminate unwanted holes due to self-intersections on outer boundary using a planar buffer of zero distance. """
-								
-								splitted_buffered_polygon = splitted_buffered_polygon.Buffer(0)
-								
-								""" Errors may occur during Buffer(0) so that two polygons are formed from one polygon dur to severe self-intersections. 
-								This would lead to an invalid geometry which could not be added to the BNSC_union_polygon. To prevent this, all geometries 
-								in the splitted_buffered_polygon are investigated, Buffered (0) again and then added to the BNSC_union_polygon. """
-								
-								if splitted_buffered_polygon.IsValid() == False:
-								
-									for linear_ring_splitted_buffered_polygon in splitted_buffered_polygon:
-										
-										""" Add linear_ring_splitted_buffered_polygon to new polygon. """
-										
-										polygon_part_splitted_buffered_polygon = ogr.Geometry(ogr.wkbPolygon)
-										polygon_part_splitted_buffered_polygon.AddGeometry(linear_ring_splitted_buffered_polygon)
-										polygon_part_splitted_buffered_polygon = polygon_part_splitted_buffered_polygon.Buffer(0)
-										
-									if polygon_part_splitted_buffered_polygon.IsValid() == False:
-										print "Error due to severe self-intersection during buffering. Please use shapefile output and check the modified shapefile for errors."
-										ctypes.windll.user32.MessageBoxA(0, "Error due to severe self-intersection during buffering.", "Error", 0)
-										if write_logfile == True and multicore_operation == False:
-											logfile.flush()
-										if write_logfile == True and multicore_operation == True:
-											multicore_log.append(["Error due to severe self-intersection during buffering. Please use shapefile output and check the modified shapefile for errors."])
-											raise Exception("Self-intersection")
-										
-										BNSC_union_polygon = BNSC_union_polygon.Union(polygon_part_splitted_buffered_polygon)
-								
-								if splitted_buffered_polygon.IsValid() == True:
-									
-									BNSC_union_polygon = BNSC_union_polygon.Union(splitted_buffered_polygon)
-							
-							""" Special case: If only one research area with hole(s) is investigated, iteration in union_polygon would not consider polygon1, polygon2, 
-							polygon3, etc., but ring1, ring2, ring3, etc. As the inner ring is already considered during iteration (because it is assumed that in 'for area in union_polygon' 
-							area is a research area and not a linear ring), the function has to be stopped here. Otherwise, every further iteration in union polygon would consider 
-							the linear rings which have already been considered in the function. This would lead to too many resulting polygons (rings*no_of_craters and not no_of_craters). """
-							
-							if len(Area_IDs) == 1 and number_of_inner_polygons == 0 and number_of_holes >= 1:
-								break
+						#################################
+						#	Step 2: BUFFER POLYGON		#
+						#################################
 						
-						""" Project union_polygon & BNSC_union_polygon back to original spatial reference (to be used in NSC_BNSC_exclude_craters function). """
+						""" Get each linear ring in the area polygon (polygon outlines or splitted polygon parts when polygon has holes) and buffer outlines. 
+						Holes are not present anymore. """
 						
-						BNSC_union_polygon.Transform(geogr_reprojection_to_proj_reprojection)
-						BNSC_union_polygon.Transform(proj_reprojection_to_geogr)
+						for linear_ring in area_polygon:
+							
+							""" area_polygon is MULTIPOLYGON when polygon with holes (splitted polygon) is present. area_polygon is LINEARRING when no holes 
+							are present (no splitted polygon). Using GetGeometryRef(0) we get the linear ring from the polygon when splitting was conducted. """
+							
+							if linear_ring.GetGeometryName() == "LINEARRING":
+								linear_ring = linear_ring
+							else:
+								linear_ring = linear_ring.GetGeometryRef(0)
+							
+							""" Get coordinates of the ring vertices (array) and indices of their neighbors (see ring_vertices_and_neighbors). """
+							
+							ring_vertices, previous_vertex_index, next_vertex_index = ring_vertices_and_neighbors(linear_ring)
+							
+							""" Calculate angles between previous vertex - current vertex and current vertex - next vertex from vincenty's inverse formula 
+							(calculation on a spheroid). Only vertices which are not in the vertex azimuth cache (boundary changed by the last removed crater) 
+							are calculated. """
+							
+							angles_prev, angles_next = cached_vertex_azimuths(vertex_azimuth_cache, updated_vertex_azimuth_cache, ring_vertices, previous_vertex_index, next_vertex_index, flattening, major_axis)
+							
+							""" Get buffer points for outer polygon boundary (see ring_buffer_vertices_angles). """
+							
+							vertices_angle_list = ring_buffer_vertices_angles(ring_vertices, angles_prev, angles_next, join_step)
+							
+							""" Calculate coordinates of buffer points for outer polygon (all points of the ring in one call). """
+							
+							buffer_vertices_X, buffer_vertices_Y = geodesic_direct(flattening, major_axis, vertices_angle_list[:, 0], vertices_angle_list[:, 1], vertices_angle_list[:, 2], buffer_distance_polygon_BNSC)
+							
+							""" Create polygon geometry from buffer points. """
+							
+							splitted_buffered_polygon = polygon_from_coordinate_arrays(buffer_vertices_X, buffer_vertices_Y)
+							
+							""" Eliminate unwanted holes due to self-intersections (see clean_ring_buffer). The cleaned parts are merged after all rings 
+							are buffered. """
+							
+							ring_buffer_parts, ring_self_intersection = clean_ring_buffer(splitted_buffered_polygon)
+							BNSC_ring_buffers.extend(ring_buffer_parts)
+							
+							if ring_self_intersection == True:
+								print "Error due to severe self-intersection during buffering. Please use shapefile output and check the modified shapefile for errors."
+								ctypes.windll.user32.MessageBoxA(0, "Error due to severe self-intersection during buffering.", "Error", 0)
+								if write_logfile == True and multicore_operation == False:
+									logfile.flush()
+								if write_logfile == True and multicore_operation == True:
+									multicore_log.append(["Error due to severe self-intersection during buffering. Please use shapefile output and check the modified shapefile for errors."])
+									raise Exception("Self-intersection")
 						
-						union_polygon.Transform(geogr_reprojection_to_proj_reprojection)
-						union_polygon.Transform(proj_reprojection_to_geogr)
+						""" Special case: If only one research area with hole(s) is investigated, iteration in union_polygon would not consider polygon1, polygon2, 
+						polygon3, etc., but ring1, ring2, ring3, etc. As the inner ring is already considered during iteration (because it is assumed that in 'for area in union_polygon' 
+						area is a research area and not a linear ring), the function has to be stopped here. Otherwise, every further iteration in union polygon would consider 
+						the linear rings which have already been considered in the function. This would lead to too many resulting polygons (rings*no_of_craters and not no_of_craters). """
 						
-						if sr.IsProjected(): 
-							union_polygon.Transform(geog_to_proj)
-							BNSC_union_polygon.Transform(geog_to_proj)
-			
+						if len(Area_IDs) == 1 and number_of_inner_polygons == 0 and number_of_holes >= 1:
+							break
+					
+					vertex_azimuth_cache = build_vertex_azimuth_cache(updated_vertex_azimuth_cache)
+					
+					""" Merge buffered rings with one cascaded union. """
+					
+					BNSC_union_polygon = union_ring_buffers(BNSC_ring_buffers)
+					
+					""" Project union_polygon & BNSC_union_polygon back to original spatial reference (to be used in NSC_BNSC_exclude_craters function). """
+					
+					BNSC_union_polygon.Transform(geogr_reprojection_to_proj_reprojection)
+					BNSC_union_polygon.Transform(proj_reprojection_to_geogr)
+					
+					union_polygon.Transform(geogr_reprojection_to_proj_reprojection)
+					union_polygon.Transform(proj_reprojection_to_geogr)
+					
+					if sr.IsProjected(): 
+						union_polygon.Transform(geog_to_proj)
+						BNSC_union_polygon.Transform(geog_to_proj)
+		
 			#########################
 			#						#
 			# END OF BNSC BUFFERING	#
@@ -3576,9 +4357,9 @@ def NSC_BNSC_exclude_craters(self, approach, buffered_craters_wkt_list, union_po
 					polygon_feature.SetField('crater_ID', original_crater_id)
 					layer_polygon.CreateFeature(polygon_feature)
 				
-				crater_diam = craters_for_counting_list[crater_index][1]
-				crater_X = craters_for_counting_list[crater_index][2]
-				crater_Y = craters_for_counting_list[crater_index][3]
+				crater_diam = float(craters_for_counting_list['diameter'][crater_index])
+				crater_X = float(craters_for_counting_list['lon'][crater_index])
+				crater_Y = float(craters_for_counting_list['lat'][crater_index])
 				crater_area_list.append([crater_diam, crater_X, crater_Y, crater_diam * bufferfactor_crater, geodesic_area])
 			
 			if approach == "BNSC":
@@ -3608,9 +4389,9 @@ def NSC_BNSC_exclude_craters(self, approach, buffered_craters_wkt_list, union_po
 						polygon_feature.SetField('crater_ID', original_crater_id)
 						layer_polygon.CreateFeature(polygon_feature)
 					
-					crater_diam = craters_for_counting_list[crater_index][1]
-					crater_X = craters_for_counting_list[crater_index][2]
-					crater_Y = craters_for_counting_list[crater_index][3]
+					crater_diam = float(craters_for_counting_list['diameter'][crater_index])
+					crater_X = float(craters_for_counting_list['lon'][crater_index])
+					crater_Y = float(craters_for_counting_list['lat'][crater_index])
 					crater_area_list.append([crater_diam, crater_X, crater_Y, crater_diam * bufferfactor_crater, geodesic_area])
 					
 					del BNSC_union_polygon
@@ -3722,20 +4503,18 @@ def write_crater_stats_file_header():
 
 """ Write area information to SCC/DIAM file. """
 
-def write_crater_stats_file_area(n_area, area_feature, area_feature2, area_feature_SCC_File, union_polygon, Area_Names, Area_ID, an, write_logfile, logfile):
+def write_crater_stats_file_area(n_area, area_shape, area_shape2, area_shape_SCC_File, Area_Names, Area_ID, an, write_logfile, logfile):
 	global previous_vertex_count, vertices_list, inner_vertices_list, ring_index
 	
-	""" Get vertices from original polygon (area_feature_SCC_File) - to write original vertices to SCC File and segmentized polygon (area_feature) - to work with during processing. """
+	""" Get vertices from original polygon (area_shape_SCC_File) - to write original vertices to SCC File and segmentized polygon (area_shape) - to work with during processing. 
+	area_shape, area_shape2 and area_shape_SCC_File are separate copies of the area geometry (area_shape2 is used to determine the area size). """
 	
 	vertices_list = []
 	inner_vertices_list = []
 	vertices_list_SCC_File = []
 	inner_vertices_list_SCC_File = []
 	
-	area_shape = area_feature.GetGeometryRef()
 	area_polygon = area_shape.GetGeometryRef(0)
-	
-	area_shape_SCC_File = area_feature_SCC_File.GetGeometryRef()
 	area_polygon_SCC_File = area_shape_SCC_File.GetGeometryRef(0)
 
 	""" Transform vertices to geographic coordinates if spatial reference is projected (used for vertices in SCC/DIAM file). """
@@ -3746,8 +4525,6 @@ def write_crater_stats_file_area(n_area, area_feature, area_feature2, area_featu
 
 	""" Get area size. """
 	
-	area_shape2 = area_feature2.GetGeometryRef()
-	
 	if area_shape2.GetGeometryCount() == 1: # Polygon without hole
 		area_polygon2 = area_shape2.GetGeometryRef(0)
 		get_area_size(area_polygon2)
@@ -3885,7 +4662,7 @@ def write_crater_stats_file_craters_TRAD(all_craters):
 								"# crater_diameters: \n"\
 								"crater = {diam, fraction, lon, lat, topo_scale_factor\n")
 								
-		for crater_id, crater_diam, crater_x, crater_y in all_craters:
+		for crater_diam, crater_x, crater_y in zip(all_craters['diameter'].tolist(), all_craters['lon'].tolist(), all_craters['lat'].tolist()):
 			crater_stats_file.write(str(crater_diam) + "\t" + "1" + "\t" + str(crater_x) + "\t" + str(crater_y) + "\t" + "1" + "\n")
 		crater_stats_file.write("}")
 		crater_stats_file.close()
@@ -3897,7 +4674,7 @@ def write_crater_stats_file_craters_TRAD(all_craters):
 								"#\n"\
 								"# crater_diameters: \n"\
 								"crater = {diameter, fraction, lon, lat, topo_scale_factor\n")
-		for crater_id, crater_diam, crater_x, crater_y in all_craters:
+		for crater_diam, crater_x, crater_y in zip(all_craters['diameter'].tolist(), all_craters['lon'].tolist(), all_craters['lat'].tolist()):
 			crater_stats_file.write(str(crater_diam) + "\t" + "1" + "\t" + str(crater_x) + "\t" + str(crater_y) + "\t" + "1" + "\n")
 		crater_stats_file.write("}")
 		crater_stats_file.close()